@@ -3,76 +3,197 @@
 lint.py — Architecture-as-code linter for DataViz-for-Indian-Cities.
 
 Encodes the project's conventions so they can be verified automatically.
-Run: python3 lint.py         — report errors and warnings
-     python3 lint.py --strict — exit 1 on warnings too
+Run: python3 lint.py                       — report errors and warnings, every city
+     python3 lint.py --strict              — exit 1 on warnings too
+     python3 lint.py --city PCMC           — one city only (repeatable)
+     python3 lint.py --jobs 4              — cities linted in parallel (default: CPUs)
+     python3 lint.py --rules 'SQL_*,DATA_*' — only these rules (comma-separated fnmatch
+                                             patterns, repeatable); others never run
+     python3 lint.py --skip SQL_PERF_*     — every rule except these
+     python3 lint.py --fail-fast           — stop at the first error
+     python3 lint.py --format jsonl        — one JSON object per line on stdout as each
+                                             finding is made, then a summary per city
+     python3 lint.py --list-rules          — every check and the rules it reports
 
 Rules are grouped by what they protect:
-  SQL        — DuckDB query correctness and safety
+  SQL        — DuckDB query correctness, safety and in-browser cost (SQL_PERF_*)
   COMPONENT  — Evidence.dev component conventions
   CHART      — Per-diagram-type affordance enforcement (Evidence.dev)
   MAP        — Map component prop correctness
-  DATA       — CSV source file integrity
-  LINK       — Markdown link encoding
+  DATA       — CSV source file integrity, outliers and derived-column formulas
+  LINK       — Markdown link encoding and internal link / anchor targets
   META       — Page frontmatter completeness
-
-─── Adapting this linter for another Indian city ───────────────────────────
-
-About 57% of these rules are purely Evidence.dev + DuckDB conventions that
-apply to any project built with this stack (LINK_ENCODING, COMPONENT_SELF_CLOSE,
-COMPONENT_QUERY_REF, all CHART/MAP/UX/narrative rules, SQL safety patterns).
-They can be kept verbatim.
-
-About 30% are PMPML-specific data integrity rules (SQL_UTIL_CAP, SQL_GROSS_KM,
+  ASSET      — Static asset size budget
+
+─── Cities ─────────────────────────────────────────────────────────────────
+
+One engine lints every city. A city is any pages/<City>/ directory or
+cities/<City>.json file; each is linted in its own process, with its own
+report, and the run fails if any city fails.
+
+cities/<City>.json holds everything city-specific; every key is optional:
+  pages, sources, drafts  → page tree, CSV folder and drafts folder
+                            (default pages/<City>, sources/<City>, Drafts)
+  default                 → true for the city that also owns the site-level
+                            pages/*.md and static/ assets (PCMC)
+  monthly_tables          → PMPML-style (Date, Depot) tables, PMPML_TABLES
+  known_gaps              → KNOWN_GAPS, [{table, start, end, note}]
+  known_data_issues       → KNOWN_DATA_ISSUES, [{file, date, depot, column, note}]
+  deprecated_depot_names  → DEPRECATED_DEPOT_NAMES, {old spelling: canonical}
+  brt_only_depots         → BRT_ONLY_DEPOTS, {depot: note}
+  disabled_rules          → rule names or fnmatch patterns this city skips
+
+Most rules are Evidence.dev + DuckDB conventions and apply to any city as-is
+(LINK_ENCODING, COMPONENT_SELF_CLOSE, COMPONENT_QUERY_REF, all CHART/MAP/UX/
+narrative rules, SQL safety patterns). Hybrid rules (COMPONENT_GAPS,
+SQL_NULL_GUARD, SQL_DEPOT_NAME, DATA_COORDS, COMPONENT_COLOR_ORDER,
+AREACHART_MISSING, DATA_ANOMALY and the other tools/ checks) read the
+configuration above. PMPML-specific rules (SQL_UTIL_CAP, SQL_GROSS_KM,
 SQL_SCHEDULE_SWAP, DATA_PNL, DATA_PVR, DATA_BS, DATA_EARNINGS, META_CITATION,
-REFERENCELINE_EBUS_FLEET, REFERENCELINE_DIESEL_EST).
-Delete these and replace with your own city's data quality checks — the structure
-(KNOWN_DATA_ISSUES dict, per-file schema validators) is the pattern to follow.
-
-About 14% are hybrid rules (COMPONENT_GAPS, SQL_NULL_GUARD, SQL_DEPOT_NAME,
-DATA_COORDS, COMPONENT_COLOR_ORDER, AREACHART_MISSING): the rule logic is general
-but the constants are PMPML-specific. Update:
-  - KNOWN_GAPS         → your city's data gap date ranges
-  - DEPRECATED_DEPOT_NAMES → your agency's renamed stations/depots
-  - BRT_ONLY_DEPOTS    → your city's transit-mode-specific locations
-  - Table name strings ("extracted", "brt_extracted", ...) → your CSV names
-
-The main() loop, findings collector, _tag_bodies() helper, and all rule
-function signatures are fully reusable without modification.
+REFERENCELINE_EBUS_FLEET, REFERENCELINE_DIESEL_EST) belong in a new city's
+disabled_rules until it has equivalents of its own.
+
+─── Rule registry ──────────────────────────────────────────────────────────
+
+Every check_* function is registered with @rules(scope, *rule names): "page"
+checks run once per page, "data" checks once per city with a sources folder,
+"site" checks once for the default city. A check runs only if at least one of
+its rules survives --rules, --skip and the city's disabled_rules, so
+`--rules 'SQL_*'` reads the pages and runs the SQL checks and nothing else.
+A new rule name must be added to its check's @rules line, or it is never
+reported.
+
+--format jsonl records are {"type": "finding", city, severity ("error" |
+"warn"), rule, file, message}, then {"type": "skipped", city, note} for each
+rule that could not run and {"type": "summary", city, pages, data_files,
+errors, warnings, stopped}. Findings are not kept in memory in this mode.
+
+tools/ modules read the active city from DATAVIZ_CITY (default PCMC), e.g.
+DATAVIZ_CITY=Nagpur npm run calendar.
 """
 
 import calendar
 import csv
 import datetime
+import difflib
+import fnmatch
+import json
+import multiprocessing
+import os
 import re
 import sys
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
+from typing import Callable, TextIO
 
 BASE = Path(__file__).parent
 PAGES_DIR = BASE / "pages"
+CITIES_DIR = BASE / "cities"
+DEFAULT_CITY = "PCMC"
+
+# ── Per-city configuration ─────────────────────────────────────────────────────
+# Everything city-specific lives in cities/<City>.json (see load_city()).
+# activate() rebinds the globals below, so rules and tools/ read the active
+# city's values through the same names. The active city is the one named by
+# DATAVIZ_CITY, else DEFAULT_CITY; one process lints one city.
+
+CITY: dict = {}
 SOURCES_DIR = BASE / "sources" / "CMP"
+DRAFTS_DIR = BASE / "Drafts"
 
-# ── Known acceptable exceptions ────────────────────────────────────────────────
-# These suppress specific linter warnings for documented reasons.
+# PMPML-style monthly depot tables: (Date, Depot, …) with one row per depot-month.
+PMPML_TABLES: tuple[str, ...] = ()
 
-# BRT depots that exist only in brt_extracted.csv, not in extracted.csv.
-# M.Yard: main PMPML maintenance yard used as a BRT operational base in 2023.
-# From April 2024 it appears as "Upper Depot" — same coordinates, renamed.
-BRT_ONLY_DEPOTS = {"M.Yard"}
+# Depots that exist only in brt_extracted.csv, not in extracted.csv.
+BRT_ONLY_DEPOTS: set[str] = set()
 
 # Date ranges where source reports are known to be missing.
 # Format: (file_label, start_inclusive, end_inclusive, note)
-KNOWN_GAPS = [
-    ("extracted",      "Jan 2024", "Mar 2024", "Reports not retrieved for Q4 FY2023-24"),
-    ("extracted",      "Nov 2024", "Mar 2025", "Reports not retrieved for partial FY2024-25"),
-    ("extracted",      "Jul 2025", "Sep 2025", "Reports not retrieved; PMPML publishes quarterly batches"),
-    ("brt_extracted",  "Jan 2023", "Jan 2023", "BRT Jan 2023 report not retrieved"),
-    ("brt_extracted",  "Jan 2024", "Mar 2024", "Reports not retrieved for Q4 FY2023-24"),
-    ("brt_extracted",  "Nov 2024", "Mar 2025", "Reports not retrieved for partial FY2024-25"),
-    ("brt_extracted",  "Jul 2025", "Sep 2025", "Reports not retrieved; PMPML publishes quarterly batches"),
-    ("ebus_extracted", "Jan 2024", "Mar 2024", "Reports not retrieved for Q4 FY2023-24"),
-    ("ebus_extracted", "Nov 2024", "Mar 2025", "Reports not retrieved for partial FY2024-25"),
-    ("ebus_extracted", "Jul 2025", "Sep 2025", "Reports not retrieved; PMPML publishes quarterly batches"),
-]
+KNOWN_GAPS: list[tuple[str, str, str, str]] = []
+
+# Known data quality issues in source CSVs that have been handled in SQL/notes.
+# An entry suppresses the linter check and documents the known issue.
+# Format: {(file, date, depot, column): explanation}, "*" matching any value.
+KNOWN_DATA_ISSUES: dict[tuple[str, str, str, str], str] = {}
+
+# Deprecated depot name spellings that must not appear in source data or SQL.
+DEPRECATED_DEPOT_NAMES: dict[str, str] = {}
+
+# Rule names (fnmatch patterns, e.g. "DATA_P*") this city does not run.
+DISABLED_RULES: list[str] = []
+
+
+def load_city(name):
+    """Return the configuration of city `name` as a dict of resolved values.
+
+    cities/<name>.json is optional; missing keys fall back to the conventional
+    layout (pages/<name>/, sources/<name>/) with no exceptions registered.
+    """
+    path = CITIES_DIR / f"{name}.json"
+    raw = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+    return {
+        "name": name,
+        "title": raw.get("title", name),
+        "config": path if path.exists() else None,
+        "default": raw.get("default", False),
+        "pages": BASE / raw.get("pages", f"pages/{name}"),
+        "sources": BASE / raw.get("sources", f"sources/{name}"),
+        "drafts": BASE / raw.get("drafts", "Drafts"),
+        "monthly_tables": tuple(raw.get("monthly_tables", [])),
+        "brt_only_depots": set(raw.get("brt_only_depots", {})),
+        "deprecated_depot_names": dict(raw.get("deprecated_depot_names", {})),
+        "known_gaps": [(g["table"], g["start"], g["end"], g["note"])
+                       for g in raw.get("known_gaps", [])],
+        "known_data_issues": {(i["file"], i["date"], i["depot"], i["column"]): i["note"]
+                              for i in raw.get("known_data_issues", [])},
+        "disabled_rules": list(raw.get("disabled_rules", [])),
+    }
+
+
+def discover_cities():
+    """Every city with a pages/<City>/ tree or a cities/<City>.json file."""
+    names = {p.stem for p in CITIES_DIR.glob("*.json")}
+    names |= {p.name for p in PAGES_DIR.iterdir() if p.is_dir()}
+    return sorted(names)
+
+
+def city_pages():
+    """Markdown pages linted for the active city.
+
+    The default city also owns the site-level pages directly under pages/.
+    """
+    pages = sorted(CITY["pages"].rglob("*.md")) if CITY["pages"].exists() else []
+    if CITY["default"]:
+        pages = sorted(PAGES_DIR.glob("*.md")) + pages
+    return pages
+
+
+def activate(name):
+    """Make `name` the active city: rebind the per-city globals, clear caches
+    and findings. Also exported as DATAVIZ_CITY, so tools/ modules imported
+    afterwards in this process read the same city."""
+    global CITY, SOURCES_DIR, DRAFTS_DIR, PMPML_TABLES, BRT_ONLY_DEPOTS, KNOWN_GAPS
+    global KNOWN_DATA_ISSUES, DEPRECATED_DEPOT_NAMES, DISABLED_RULES, _GAP_RANGES
+    global _catalog, _column_stats
+    CITY = load_city(name)
+    SOURCES_DIR = CITY["sources"]
+    DRAFTS_DIR = CITY["drafts"]
+    PMPML_TABLES = CITY["monthly_tables"]
+    BRT_ONLY_DEPOTS = CITY["brt_only_depots"]
+    KNOWN_GAPS = CITY["known_gaps"]
+    KNOWN_DATA_ISSUES = CITY["known_data_issues"]
+    DEPRECATED_DEPOT_NAMES = CITY["deprecated_depot_names"]
+    DISABLED_RULES = CITY["disabled_rules"]
+    _GAP_RANGES = _gap_iso_ranges()
+    _catalog = _column_stats = None
+    findings.clear()
+    skipped.clear()
+    counts.update(ERROR=0, WARN=0)
+    os.environ["DATAVIZ_CITY"] = name
+
 
 def _gap_iso_ranges() -> list[tuple[str, str, str]]:
     """Convert KNOWN_GAPS month strings to ISO date ranges for component checks.
@@ -85,8 +206,9 @@ def _gap_iso_ranges() -> list[tuple[str, str, str]]:
     (e.g., BRT Jan 2023 only in brt_extracted) are excluded — they should be
     annotated only on the pages that use that table, not enforced site-wide.
 
-    Update KNOWN_GAPS to add or remove gaps — this derives the ISO dates and
-    filtering automatically so the rule stays in sync with no extra maintenance.
+    Edit known_gaps in cities/<City>.json to add or remove gaps — this derives
+    the ISO dates and filtering automatically so the rule stays in sync with no
+    extra maintenance.
     """
     from collections import defaultdict
     pair_labels: dict[tuple[str, str], set[str]] = defaultdict(set)
@@ -116,73 +238,97 @@ def _gap_iso_ranges() -> list[tuple[str, str, str]]:
 # ISO date ranges derived from KNOWN_GAPS for use in COMPONENT_GAPS checks.
 # Each entry is (xMin_iso, xMax_iso, human_label). Gaps that appear for multiple
 # file labels are de-duplicated — one annotation is enough per chart.
-_GAP_RANGES: list[tuple[str, str, str]] = _gap_iso_ranges()
+_GAP_RANGES: list[tuple[str, str, str]] = []
 
-# Known data quality issues in source CSVs that have been handled in SQL/notes.
-# Adding an entry here suppresses the linter check and documents the known issue.
-KNOWN_DATA_ISSUES = {
-    # (file, date, depot, column): explanation
-    ("extracted.csv", "Dec 2023", "Pune Station", "% of Fleet Utilization(PMPML+PPP)"):
-        "Source report shows 200% — formula quirk when hired fleet > PMPML own schedule count. "
-        "Handled via LEAST(..., 100.0) in all SQL queries.",
-    ("extracted.csv", "Dec 2023", "Nigadi", "% of Fleet Utilization(PMPML+PPP)"):
-        "Source report shows 116.67% — same quirk as Pune Station. Capped in SQL.",
-    ("extracted.csv", "Feb 2023", "*", "All Traffic Earning (₹)"):
-        "Original tabula extraction had a column shift. Values imputed as "
-        "ticket + pass + student earnings (see extract_pdfs.py).",
-    ("extracted.csv", "Apr 2023", "*", "Earning per KMs in Rs.(EPK) (₹)"):
-        "Source report had the all-traffic EPK value in the ticket-only EPK column position. "
-        "Reported values (~₹60-75) were ~3x the correct ~₹25-38. "
-        "Imputed as Passenger Earning (Sale of Ticket) / Total Eff.Km (Own+Hire).",
-    ("extracted.csv", "*", "*", "Total Gross KMs (Diesel+CNG+E)"):
-        "Jan 2023 shows values of 100-2,158 (should be ~1-1.5M). From Feb 2023 onward, "
-        "this column appears to record only PMPML diesel gross KMs for many depots, "
-        "omitting CNG and hire. Not used in any current visualisation.",
-    ("ebus_extracted.csv", "Dec 2023", "Hadapsar", "passengers_per_day"):
-        "Source report shows 21,071 passengers/day (double normal ~11,000). "
-        "Earning, KMs, and EPK columns are internally consistent, suggesting the "
-        "passenger count was entered as a monthly total instead of a daily average. "
-        "Imputed as all_traffic_earning / (days_in_month × earn_per_pax_from_Oct-Nov_2023). "
-        "System Total for Dec 2023 adjusted accordingly.",
-    ("extracted.csv", "Jan 2023", "*", "No.of Schedules Sanctioned Per Day (PMPML + PPP)"):
-        "Sanctioned and Operated columns are content-swapped for 8 depots (Balewadi, Baner, "
-        "Bhekrai Nagar, Wagholi, Bhosari, Nigadi, Pimpri, Pune Station) — Sanctioned holds "
-        "PMPML-only count while Operated holds full PPP+hire total. "
-        "All schedule queries use GREATEST/LEAST to reconstruct correct values.",
-    ("extracted.csv", "Mar 2023", "*", "No.of Schedules Sanctioned Per Day (PMPML + PPP)"):
-        "Same Sanctioned/Operated column swap as Jan 2023 for the same 8 depots. "
-        "All schedule queries use GREATEST/LEAST to reconstruct correct values.",
-    ("extracted.csv", "Oct 2023", "Nigadi", "Gross KMs- Diesel (Own)"):
-        "Reports 104,315 gross diesel km for 9 own buses (373 km/bus/day vs. typical 150-200). "
-        "Appears to be a data entry error — likely hire fleet gross km entered in own-bus column. "
-        "Column not used in any visualisation.",
-    ("extracted.csv", "Nov 2023", "Nigadi", "Gross KMs- Diesel (Own)"):
-        "Reports 81,248 gross diesel km for 5 own buses (541 km/bus/day vs. typical 150-200). "
-        "Same data entry error pattern as Oct 2023. Column not used in any visualisation.",
-}
+# ── Findings collector ─────────────────────────────────────────────────────────
 
-# Deprecated depot name spellings that must not appear in source data or SQL.
-DEPRECATED_DEPOT_NAMES = {
-    "Bhekrainagar":    "Bhekrai Nagar",
-    "P.Station":       "Pune Station",
-    "Shewal-wadi":     "Shewalwadi",
-    "Shewal- wadi":    "Shewalwadi",
-    "Bhekrai\nNagar":  "Bhekrai Nagar",
-    "Pune\nStation":   "Pune Station",
-    "Uppar Depot":     "Upper Depot",
-}
+findings: list[tuple[str, str, str, str]] = []  # [(severity, rule, file, message)]
+skipped: list[str] = []  # rules that could not run (missing optional dependency)
+counts = {"ERROR": 0, "WARN": 0}
+
+# Run options, set per process by configure() (--rules, --skip, --fail-fast,
+# --format jsonl). Rules outside the selection are never run, and a check
+# whose rules are all deselected is not called at all.
+SELECT_RULES: list[str] = []    # fnmatch patterns; empty = every rule
+SKIP_RULES: list[str] = []
+FAIL_FAST = False
+_stream: TextIO | None = None   # text stream for JSONL findings, else buffered in `findings`
+
+
+class FailFast(Exception):
+    """Raised by error() under --fail-fast to stop the run at the first error."""
 
-# ── Findings collector ─────────────────────────────────────────────────────────
 
-findings = []  # [(severity, rule, file, message)]
+def configure(select=(), skip=(), fail_fast=False, stream=None):
+    global SELECT_RULES, SKIP_RULES, FAIL_FAST, _stream
+    SELECT_RULES, SKIP_RULES, FAIL_FAST, _stream = list(select), list(skip), fail_fast, stream
+
+
+def _matches(rule, patterns):
+    return any(fnmatch.fnmatchcase(rule, pattern) for pattern in patterns)
+
+
+def _matches_any(pattern, rule_names):
+    return any(fnmatch.fnmatchcase(r, pattern) for r in rule_names)
+
+
+def rule_enabled(rule):
+    """False for rules the city disables, --skip names, or --rules leaves out."""
+    if _matches(rule, DISABLED_RULES) or _matches(rule, SKIP_RULES):
+        return False
+    return not SELECT_RULES or _matches(rule, SELECT_RULES)
+
+
+def emit(record):
+    """Write one JSONL record to the stream and flush, so readers see it now."""
+    assert _stream is not None, "emit() needs configure(stream=…)"
+    _stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+    _stream.flush()
+
+
+def _finding(severity, rule, file, msg):
+    if not rule_enabled(rule):
+        return
+    counts[severity] += 1
+    if _stream is None:
+        findings.append((severity, rule, str(file), msg))
+    else:
+        emit({"type": "finding", "city": CITY["name"], "severity": severity.lower(),
+              "rule": rule, "file": str(file), "message": msg})
+    if FAIL_FAST and severity == "ERROR":
+        raise FailFast(rule)
 
 
 def error(rule, file, msg):
-    findings.append(("ERROR", rule, str(file), msg))
+    _finding("ERROR", rule, file, msg)
 
 
 def warn(rule, file, msg):
-    findings.append(("WARN", rule, str(file), msg))
+    _finding("WARN", rule, file, msg)
+
+
+# ── Rule registry ──────────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class Check:
+    func: Callable
+    scope: str                  # "page": func(rel, content) per page; "data": once if
+                                # the city has sources; "site": once, default city only
+    rules: tuple[str, ...]      # every rule name func can report
+
+    def enabled(self):
+        return any(rule_enabled(r) for r in self.rules)
+
+
+CHECKS: list[Check] = []
+
+
+def rules(scope, *names):
+    """Register a check_* function and the rule names it reports."""
+    def register(func):
+        CHECKS.append(Check(func, scope, names))
+        return func
+    return register
 
 
 # ── Rule helpers ───────────────────────────────────────────────────────────────
@@ -195,7 +341,7 @@ def extract_sql_blocks(content):
 def uses_pmpml_table(sql_text):
     return any(
         f"FROM {t}" in sql_text or f"JOIN {t}" in sql_text
-        for t in ("extracted", "brt_extracted", "ebus_extracted")
+        for t in PMPML_TABLES
     )
 
 
@@ -231,8 +377,120 @@ _FMT_KEYWORDS = frozenset([
 ])
 
 
+# ── SQL performance helpers ────────────────────────────────────────────────────
+
+# Tables at least this wide make SELECT * expensive in DuckDB-WASM: every column
+# of the CSV is materialised in the browser (extracted.csv has 176).
+WIDE_TABLE_COLUMNS = 50
+
+# Subqueries shorter than this (normalised) are too trivial to flag as repeats.
+_PERF_MIN_SUBQUERY = 40
+
+# Keywords that end a WHERE / ON predicate at its own paren depth.
+_PREDICATE_END = re.compile(
+    r"(?i)\b(?:GROUP\s+BY|ORDER\s+BY|HAVING|LIMIT|QUALIFY|WINDOW|UNION|EXCEPT|INTERSECT|WHERE|"
+    r"(?:LEFT|RIGHT|INNER|FULL|CROSS|OUTER|ASOF|SEMI|ANTI)\b|JOIN)\b")
+
+
+def _sql_mask(sql):
+    """Same-length copy of sql with comments, string literals and quoted
+    identifiers blanked, so parens and keywords inside them are ignored."""
+    def blank(m):
+        s = m.group()
+        return s[0] + "_" * (len(s) - 2) + s[-1] if s[0] in "'\"" else " " * len(s)
+    return re.sub(r"--[^\n]*|'(?:[^']|'')*'|\"[^\"]*\"", blank, sql)
+
+
+def _close_paren(masked, i):
+    """Index of the ')' matching the '(' at masked[i] (len(masked) if unbalanced)."""
+    depth = 0
+    for k in range(i, len(masked)):
+        if masked[k] == "(":
+            depth += 1
+        elif masked[k] == ")":
+            depth -= 1
+            if depth == 0:
+                return k
+    return len(masked)
+
+
+def _depth0(masked, start, end):
+    """masked[start:end] with the inside of every paren group blanked."""
+    out, depth = [], 0
+    for ch in masked[start:end]:
+        if ch == ")":
+            depth -= 1
+        out.append(ch if depth <= 0 else " ")
+        if ch == "(":
+            depth += 1
+    return "".join(out)
+
+
+def _predicates(masked):
+    """Yield (keyword, start, end) for every WHERE and JOIN … ON predicate."""
+    for m in re.finditer(r"(?i)\b(WHERE|ON)\b", masked):
+        start, depth, k = m.end(), 0, m.end()
+        while k < len(masked):
+            ch = masked[k]
+            if ch == "(":
+                depth += 1
+            elif ch == ")":
+                if depth == 0:
+                    break
+                depth -= 1
+            elif depth == 0 and ch.isalpha() and not masked[k - 1].isalnum() and masked[k - 1] != "_":
+                if _PREDICATE_END.match(masked, k):
+                    break
+            k += 1
+        yield ("WHERE clause" if m.group(1).upper() == "WHERE" else "JOIN … ON condition"), start, k
+
+
+def _subqueries(masked):
+    """Yield (start, end) of every parenthesised SELECT / WITH subquery."""
+    for m in re.finditer(r"\(\s*(?:SELECT|WITH)\b", masked, re.IGNORECASE):
+        yield m.start(), _close_paren(masked, m.start())
+
+
+def _window_calls(sql, masked):
+    """Yield whitespace-normalised 'fn(args) OVER (spec)' text for every window function."""
+    for m in re.finditer(r"(?i)\)\s*OVER\s*\(", masked):
+        close, depth, k = m.start(), 0, m.start()
+        while k >= 0:                               # walk back to the call's '('
+            if masked[k] == ")":
+                depth += 1
+            elif masked[k] == "(":
+                depth -= 1
+                if depth == 0:
+                    break
+            k -= 1
+        fn = re.search(r"(\w+)\s*$", masked[:k])
+        if not fn:
+            continue
+        end = _close_paren(masked, m.end() - 1)
+        yield " ".join(sql[fn.start():end + 1].split())
+
+
+def _bounded(name, queries, seen=()):
+    """True if query name, or a query it reads through ${…}, aggregates, limits
+    or filters to a single depot (one row per month, e.g. Depot =
+    '${inputs.selected_depot.value}'); False if it passes PMPML rows through
+    one per (Date, Depot)."""
+    sql = queries.get(name, "")
+    masked = _sql_mask(sql)
+    if re.search(r"(?i)\b(?:GROUP\s+BY|LIMIT|DISTINCT)\b|"
+                 r"\b(?:SUM|AVG|COUNT|MIN|MAX|MEDIAN|STRING_AGG|LIST)\s*\(", masked):
+        return True
+    if re.search(r"(?i)\b(?:\w+\.)?Depot\s*=\s*'", sql):
+        return True
+    refs = [r for r in re.findall(r"\$\{(\w+)\}", sql) if r in queries and r not in seen]
+    if refs:
+        return any(_bounded(r, queries, (*seen, name)) for r in refs)
+    return not uses_pmpml_table(sql)
+
+
 # ── Page rules ─────────────────────────────────────────────────────────────────
 
+@rules("page", "META_FRONTMATTER", "META_YAML_QUOTE")
 def check_meta(path, content):
     """META: every page needs title and description frontmatter."""
     fm = re.match(r"^---\n(.*?)\n---", content, re.DOTALL)
@@ -258,13 +516,105 @@ def check_meta(path, content):
                  f"{line.strip()!r}")
 
 
+# ── Route index ────────────────────────────────────────────────────────────────
+# Every page of the site (all cities: links cross city trees) as its URL path,
+# URL-decoded and without trailing slash, → the anchors its headings produce.
+# Built once per run by route_index().
+_routes: dict[str, frozenset[str]] | None = None
+
+_HEADING = re.compile(r"(?m)^(#{1,6})[ \t]+(.+?)[ \t#]*$")
+_HTML_ID = re.compile(r"""\bid\s*=\s*["']([^"'{}]+)["']""")
+_LINK = re.compile(r"""\[[^\]\n]*\]\(\s*<?([^)\s>]+)>?[^)]*\)|\bhref\s*=\s*["']([^"'{}]+)["']""")
+
+
+def _mask_fences(content):
+    """content with fenced code blocks blanked (newlines kept, so offsets and
+    line numbers still match)."""
+    return re.sub(r"(?ms)^```.*?^```", lambda m: re.sub(r"[^\n]", " ", m.group()), content)
+
+
+def slugify(text):
+    """Heading text → anchor id, as Evidence's github-slugger makes it."""
+    text = re.sub(r"\[([^\]]*)\]\([^)]*\)", r"\1", text)       # [label](url) → label
+    text = re.sub(r"<[^>]+>|[*_`~]{1,3}(?=\S)|(?<=\S)[*_`~]{1,3}", "", text)
+    return re.sub(r"[^\w\- ]", "", text.strip().lower()).replace(" ", "-")
+
+
+def page_route(md_path):
+    """URL path of a page: pages/PCMC/Traffic/index.md → /PCMC/Traffic."""
+    parts = list(md_path.relative_to(PAGES_DIR).with_suffix("").parts)
+    if parts and parts[-1] == "index":
+        parts.pop()
+    return "/" + "/".join(parts)
+
+
+def page_anchors(content):
+    """Anchor ids on a page: slugified headings (duplicates get -1, -2, …)
+    and explicit id="…" attributes."""
+    anchors: set[str] = set()
+    seen: dict[str, int] = {}
+    masked = _mask_fences(content)
+    for m in _HEADING.finditer(masked):
+        slug = slugify(m.group(2))
+        n = seen.get(slug, 0)
+        seen[slug] = n + 1
+        anchors.add(slug if n == 0 else f"{slug}-{n}")
+    anchors.update(_HTML_ID.findall(masked))
+    return frozenset(anchors)
+
+
+def route_index():
+    global _routes
+    if _routes is None:
+        _routes = {page_route(p): page_anchors(p.read_text(encoding="utf-8"))
+                   for p in sorted(PAGES_DIR.rglob("*.md"))}
+    return _routes
+
+
+@rules("page", "LINK_ENCODING", "LINK_BROKEN", "LINK_ANCHOR")
 def check_links(path, content):
-    """LINK: spaces in markdown link destinations must be %20-encoded."""
+    """LINK: internal links must be %20-encoded and resolve to a page and anchor.
+
+    Every markdown link and href on the page is looked up in route_index():
+    site paths must name a page (or a file under static/), and #fragments a
+    heading or id on the target page.
+    """
     for m in re.finditer(r"\[([^\]]+)\]\((/[^)\s]*[ ][^)]*)\)", content):
         error("LINK_ENCODING", path,
               f"Unencoded space in link path — use %%20: ({m.group(2)})")
 
-
+    routes = route_index()
+    here = page_route(BASE / path)
+    masked = _mask_fences(content)
+    for m in _LINK.finditer(masked):
+        target = m.group(1) or m.group(2)
+        if re.match(r"[a-z][a-z0-9+.-]*:|//", target, re.I) or "${" in target:
+            continue                        # external, mailto:, templated
+        url, _, fragment = target.partition("#")
+        url = url.split("?")[0]
+        if url and not url.startswith("/"):
+            continue                        # relative links depend on the trailing slash
+        line = content.count("\n", 0, m.start()) + 1
+        route = (urllib.parse.unquote(url).rstrip("/") or "/") if url else here
+        if route not in routes:
+            if url and (BASE / "static" / urllib.parse.unquote(url).lstrip("/")).is_file():
+                continue
+            close = difflib.get_close_matches(route, list(routes), n=1)
+            error("LINK_BROKEN", path,
+                  f"Line {line}: no page at {url}"
+                  + (f" — did you mean {urllib.parse.quote(close[0])}?" if close else ""))
+        elif fragment and urllib.parse.unquote(fragment) not in routes[route]:
+            close = difflib.get_close_matches(fragment, sorted(routes[route]), n=1)
+            error("LINK_ANCHOR", path,
+                  f"Line {line}: no heading #{fragment} on {route}"
+                  + (f" — did you mean #{close[0]}?" if close else ""))
+
+
+@rules("page",
+       "SQL_TRY_CAST", "SQL_DATE_FORMAT", "SQL_NULL_GUARD", "SQL_NULLIF", "SQL_GROSS_KM",
+       "SQL_SCHEDULE_SWAP", "SQL_PERF_DUP_SUBQUERY", "SQL_UTIL_CAP", "SQL_CALENDAR",
+       "SQL_DEPOT_NAME", "SQL_PERF_WINDOW_REPEAT", "SQL_PERF_TABLE_ALL",
+       "SQL_PERF_SELECT_STAR", "SQL_PERF_PREDICATE_PARSE", "SQL_PERF_CTE_ORDER")
 def check_sql(path, content):
     """SQL: enforce DuckDB safety patterns used throughout this project."""
     blocks = extract_sql_blocks(content)
@@ -282,10 +632,18 @@ def check_sql(path, content):
 
     # Rule: Fleet utilization column must be wrapped in LEAST(..., 100.0)
     # Reason: Dec 2023 has 200%/116% outliers from source report formula quirk.
-    # Optional table alias before column name: TRY_CAST(e."% ..." or TRY_CAST("% ...")
-    util_pattern = r'TRY_CAST\((?:\w+\.)?"% of Fleet Utilization\(PMPML\+PPP\)" AS DOUBLE\)'
+    # Typed tables read the column bare, raw ones through TRY_CAST; either may
+    # carry a table alias: e."% ...", TRY_CAST(e."% ..." AS DOUBLE). A bare
+    # column alone on its line is a subquery passing it through, capped outside.
+    util_pattern = (r'(?:TRY_CAST\()?(?:\w+\.)?"% of Fleet Utilization\(PMPML\+PPP\)"'
+                    r'(?: AS DOUBLE\))?')
     for m in re.finditer(util_pattern, all_sql):
         preceding = all_sql[max(0, m.start() - 7): m.start()]
+        line_start = all_sql.rfind("\n", 0, m.start()) + 1
+        line_end = all_sql.find("\n", m.end())
+        line = all_sql[line_start: line_end if line_end >= 0 else None].strip()
+        if line.rstrip(",") == m.group(0) and not m.group(0).startswith("TRY_CAST"):
+            continue
         if "LEAST(" not in preceding:
             error("SQL_UTIL_CAP", path,
                   "Fleet utilization not wrapped in LEAST(..., 100.0) — "
@@ -315,15 +673,31 @@ def check_sql(path, content):
               "it omits hire fleet and has wrong values in Jan 2023. "
               "Use \"Total Dead KMs (Diesel+CNG+E)\" (independently recorded) instead.")
 
-    # Rule: Raw schedule columns without GREATEST/LEAST correction
-    sanctioned_col = '"No.of Schedules Sanctioned Per Day (PMPML + PPP)"'
-    operated_col   = '"Average No.of Schedule operated Per Day (PMPML+PPP)"'
-    if (sanctioned_col in all_sql or operated_col in all_sql) and "GREATEST(" not in all_sql:
-        error("SQL_SCHEDULE_SWAP", path,
-              "Schedule columns used without GREATEST/LEAST correction — "
-              "Jan 2023 and Mar 2023 have Sanctioned/Operated swapped for 8 depots. "
-              "Wrap both columns in GREATEST(...) and LEAST(...) to reconstruct correct values. "
-              "See CLAUDE.md 'Unreliable Columns' section.")
+    # Rule: schedule columns come from extracted_typed, where tools/coerce.py
+    # realigns the Jan/Mar 2023 rows that tabula shifted one column left
+    sched_cols = ('"No.of Schedules Sanctioned Per Day (PMPML + PPP)"',
+                  '"Average No.of Schedule operated Per Day (PMPML+PPP)"',
+                  '"Hired Vehicles Per Day"', '"Total Per Day (PMPML+HIRED)"',
+                  '"Schedules Total (PMPML+HIRE) Per Day"')
+    for name, sql in blocks:
+        if any(c in sql for c in sched_cols) and re.search(r"\b(?:FROM|JOIN)\s+extracted\b", sql):
+            error("SQL_SCHEDULE_SWAP", path,
+                  f"'{name}': schedule columns read from raw extracted — Jan and Mar 2023 "
+                  "have operated/hired/total schedules shifted one column left. Read them "
+                  "from extracted_typed, where tools/coerce.py realigns those rows.")
+
+    # Rule: calendar attributes come from the generated calendar table
+    # (tools/fiscal.py), not from re-parsing the Date string per query
+    for name, sql in blocks:
+        if re.search(r"\bJOIN\s+calendar\b", sql) and re.search(r"STRPTIME\(\s*(?:\w+\.)?Date\b", sql):
+            warn("SQL_CALENDAR", path,
+                 f"Query '{name}' joins calendar but still parses Date with STRPTIME — "
+                 "use calendar.month_start")
+        elif re.search(r"(?i)\b(?:LAST_DAY|DAYOFMONTH|MONTH|QUARTER)\s*\(\s*STRPTIME\(|"
+                       r"EXTRACT\s*\(\s*(?:MONTH|QUARTER|DAY)\s+FROM\s+(?:LAST_DAY\s*\(\s*)?STRPTIME\(", sql):
+            warn("SQL_CALENDAR", path,
+                 f"Query '{name}' derives month/quarter/days from the Date string — "
+                 "JOIN calendar USING (Date) and use fy, fy_quarter, days_in_month")
 
     # Rule: Deprecated depot names must not appear in SQL string literals
     for bad, good in DEPRECATED_DEPOT_NAMES.items():
@@ -331,7 +705,207 @@ def check_sql(path, content):
             error("SQL_DEPOT_NAME", path,
                   f"Deprecated depot name '{bad}' in SQL — use '{good}'")
 
+    # SQL_PERF rules: query shapes that are slow in the browser (DuckDB-WASM)
+    # on this data and get slower as PMPML history grows (see tools/scaletest.py).
+    # Pages repeat blocks under "Data Queries", so each query name counts once.
+    queries: dict[str, str] = {}
+    for name, sql in blocks:
+        queries.setdefault(name, sql)
+    wide = {key: (table, len(headers)) for key, (table, headers, _) in csv_catalog().items()
+            if len(headers) >= WIDE_TABLE_COLUMNS}
+    subqueries: dict[str, list[str]] = {}
+    windows: dict[str, tuple[str, set[str]]] = {}
+
+    for name, sql in queries.items():
+        masked = _sql_mask(sql)
+
+        # Rule SQL_PERF_SELECT_STAR: SELECT * from a wide table
+        for m in re.finditer(r"(?i)\bSELECT\s+(?:DISTINCT\s+)?(?:\w+\.)?\*\s*"
+                             r"(?:EXCLUDE\s*\([^)]*\)\s*)?FROM\s+(\w+)", masked):
+            if m.group(1).lower() in wide:
+                table, width = wide[m.group(1).lower()]
+                warn("SQL_PERF_SELECT_STAR", path,
+                     f"Query '{name}' selects * from {table} ({width} columns) — "
+                     "list only the columns the page uses; DuckDB-WASM materialises "
+                     "every selected column in the browser")
+                break
+
+        # Rule SQL_PERF_PREDICATE_PARSE: STRPTIME / TRY_CAST evaluated inside a
+        # WHERE or JOIN … ON predicate (nested subqueries are checked on their own)
+        for kw, start, end in _predicates(masked):
+            pred = masked[start:end]
+            for s, e in _subqueries(pred):
+                pred = pred[:s] + " " * (e + 1 - s) + pred[e + 1:]
+            fn = re.search(r"(?i)\b(STRPTIME|TRY_CAST)\s*\(", pred)
+            if fn:
+                hint = ("JOIN calendar USING (Date) and filter on month_start"
+                        if fn.group(1).upper() == "STRPTIME" else
+                        "cast once in a CTE and filter on the typed column")
+                warn("SQL_PERF_PREDICATE_PARSE", path,
+                     f"Query '{name}': {fn.group(1).upper()} in a {kw} is "
+                     f"re-evaluated for every row compared — {hint}")
+                break
+
+        # Rule SQL_PERF_CTE_ORDER: ORDER BY inside an intermediate CTE
+        for m in re.finditer(r"(?i)\b(\w+)\s+AS\s*(\()\s*(?:SELECT|WITH)\b", masked):
+            body = _depth0(masked, m.start(2) + 1, _close_paren(masked, m.start(2)))
+            if re.search(r"(?i)\bORDER\s+BY\b", body) and not re.search(r"(?i)\bLIMIT\b", body):
+                warn("SQL_PERF_CTE_ORDER", path,
+                     f"Query '{name}': CTE '{m.group(1)}' has ORDER BY without LIMIT — "
+                     "the outer query does not keep the order, so the sort is wasted; "
+                     "sort once in the final SELECT")
+
+        for s, e in _subqueries(masked):
+            text = " ".join(sql[s:e + 1].split())
+            if len(text) >= _PERF_MIN_SUBQUERY:
+                subqueries.setdefault(text, []).append(name)
+        for call in _window_calls(sql, masked):
+            windows.setdefault(call.upper(), (call, set()))[1].add(name)
+
+    # Rule SQL_PERF_DUP_SUBQUERY: the same subquery text in more than one place
+    reported: list[str] = []
+    for text, names in sorted(subqueries.items(), key=lambda kv: -len(kv[0])):
+        if len(names) < 2 or any(text in r for r in reported):
+            continue
+        reported.append(text)
+        warn("SQL_PERF_DUP_SUBQUERY", path,
+             f"Identical subquery appears {len(names)}× (in {', '.join(sorted(set(names)))}) — "
+             "define it once as its own sql block and read it with ${name}: "
+             f"{text[:70]}{'…' if len(text) > 70 else ''}")
+
+    # Rule SQL_PERF_WINDOW_REPEAT: the same window function in several queries
+    for call, users in sorted(windows.values()):
+        if len(users) > 1:
+            warn("SQL_PERF_WINDOW_REPEAT", path,
+                 f"Window function {call[:70]} is recomputed in {', '.join(sorted(users))} — "
+                 "compute it once in a shared sql block and read it with ${name}")
+
+    # Rule SQL_PERF_TABLE_ALL: DataTable rows=all over unaggregated PMPML rows
+    for _, attrs in _tag_bodies(content, ("DataTable",)):
+        data = re.search(r"data=\{(\w+)\}", attrs)
+        if data and re.search(r"\brows=\{?all\b", attrs) and data.group(1) in queries \
+                and not _bounded(data.group(1), queries):
+            warn("SQL_PERF_TABLE_ALL", path,
+                 f"DataTable data={{{data.group(1)}}} rows=all renders one row per PMPML "
+                 "report row with no LIMIT or aggregation — aggregate the query, add "
+                 "LIMIT, or drop rows=all so the table paginates")
+
+
+# Header catalog for SQL_UNKNOWN_TABLE / SQL_UNKNOWN_COLUMN: table name (lower)
+# → (table, headers, lower-cased header set), taken from the column statistics
+# catalog (tools/colstats.py) once per run. DuckDB resolves identifiers
+# case-insensitively.
+_catalog: dict[str, tuple[str, list[str], frozenset[str]]] | None = None
+
+# Words that can follow FROM/JOIN without naming a table.
+_FROM_NON_TABLES = frozenset(["__query_ref", "select", "unnest", "lateral", "values", "read_csv", "read_csv_auto"])
+
+
+def csv_catalog() -> dict[str, tuple[str, list[str], frozenset[str]]]:
+    global _catalog
+    if _catalog is None:
+        from tools.colstats import CATALOG_CSV, COLUMNS
+        stats, _ = column_stats()
+        _catalog = {}
+        for table, cols in stats.items():
+            header = [c.column_name for c in sorted(cols, key=lambda c: c.position)]
+            _catalog[table.lower()] = (table, header, frozenset(h.lower() for h in header))
+        _catalog[CATALOG_CSV.stem] = (CATALOG_CSV.stem, COLUMNS, frozenset(COLUMNS))
+    return _catalog
+
+
+# tools/colstats.py catalog for this run: stored stats for unchanged files,
+# recomputed in memory for the rest (reported by DATA_STATS).
+_column_stats = None
+
+
+def column_stats():
+    """Return (stats per table, tables whose stored stats were stale)."""
+    global _column_stats
+    if _column_stats is None:
+        from tools.colstats import build
+        _column_stats = build()
+    return _column_stats
+
+
+def _norm_ident(s):
+    """Collapse case and punctuation so 'Total Eff.km Diesel' finds 'Total Eff;km.Diesel'."""
+    return re.sub(r"[^0-9a-z]", "", s.lower())
+
+
+def _suggest(name, headers):
+    norm = _norm_ident(name)
+    for h in headers:
+        if _norm_ident(h) == norm:
+            return h
+    close = difflib.get_close_matches(name, headers, n=1, cutoff=0.6)
+    return close[0] if close else None
+
+
+@rules("page", "SQL_UNKNOWN_COLUMN", "SQL_UNKNOWN_TABLE")
+def check_sql_identifiers(path, content):
+    """SQL: every table and quoted column must exist in the city's source CSV headers.
+
+    A static stand-in for DuckDB's binder: catches unknown columns, headers that
+    contain a literal newline (valid CSV, but unreachable from SQL) and tables
+    that exist only in Drafts/ without waiting for `evidence build`.
+    """
+    blocks = extract_sql_blocks(content)
+    if not blocks:
+        return
+    catalog = csv_catalog()
+    query_names = {n.lower() for n, _ in blocks}
+    drafts = {p.stem.lower(): p.name for p in DRAFTS_DIR.glob("*.csv")} if DRAFTS_DIR.exists() else {}
+    sources = SOURCES_DIR.relative_to(BASE).as_posix()
+    drafts_dir = DRAFTS_DIR.relative_to(BASE).as_posix()
+
+    for name, sql in blocks:
+        sql = re.sub(r"--[^\n]*", "", sql)
+        sql = re.sub(r"\$\{[^}]*\}", "__query_ref", sql)
+        sql = re.sub(r"'(?:[^']|'')*'", "''", sql)
+        idents = re.findall(r'"([^"]*)"', sql)
+        bare = re.sub(r'"[^"]*"', '""', sql)
+        ctes = {c.lower() for c in re.findall(r"(?i)\b(\w+)\s+AS\s*\(", bare)}
+
+        tables = []
+        for ref in re.findall(r"(?i)\b(?:FROM|JOIN)\s+([A-Za-z_]\w*)\b(?!\s*\()", bare):
+            key = ref.lower()
+            if key in _FROM_NON_TABLES or key in ctes or key in query_names:
+                continue
+            if key in catalog:
+                tables.append(catalog[key])
+            elif key in drafts:
+                error("SQL_UNKNOWN_TABLE", path,
+                      f"Query '{name}': table '{ref}' exists only as {drafts_dir}/{drafts[key]} — "
+                      f"copy it into {sources}/ and run `npm run sources`")
+            else:
+                hint = _suggest(ref, [t for t, _, _ in catalog.values()])
+                error("SQL_UNKNOWN_TABLE", path,
+                      f"Query '{name}': no {sources}/{ref}.csv"
+                      + (f" — did you mean '{hint}'?" if hint else ""))
+        if not tables:
+            continue
+
+        known = frozenset().union(*(cols for _, _, cols in tables))
+        aliases = {a.lower() for a in re.findall(r'(?i)\bAS\s+"([^"]*)"', sql)}
+        headers = [h for _, hs, _ in tables for h in hs]
+        for ident in dict.fromkeys(idents):
+            if ident.lower() in known or ident.lower() in aliases:
+                continue
+            unreachable = [h for h in headers if "\n" in h and _norm_ident(h) == _norm_ident(ident)]
+            if unreachable:
+                error("SQL_UNKNOWN_COLUMN", path,
+                      f"Query '{name}': header {unreachable[0]!r} contains a literal newline and "
+                      "cannot be referenced from DuckDB SQL — rename it in the CSV")
+                continue
+            hint = _suggest(ident, headers)
+            error("SQL_UNKNOWN_COLUMN", path,
+                  f"Query '{name}': column \"{ident}\" not found in "
+                  f"{', '.join(t for t, _, _ in tables)}"
+                  + (f" — did you mean \"{hint}\"?" if hint else ""))
+
 
+@rules("page", "COMPONENT_DEPRECATED", "COMPONENT_CONNECT", "COMPONENT_FMT", "COMPONENT_GAPS")
 def check_components(path, content):
     """COMPONENT: Evidence.dev component patterns."""
 
@@ -401,6 +975,7 @@ def check_components(path, content):
                          "and add gap annotations")
 
 
+@rules("page", "SQL_POSITION")
 def check_sql_position(path, content):
     """SQL_POSITION: SQL blocks should live in '## Data Queries' at page bottom.
 
@@ -434,6 +1009,7 @@ def check_sql_position(path, content):
             # BigValue-only SQL before charts is acceptable (summary cards)
 
 
+@rules("page", "COMPONENT_QUERY_REF")
 def check_component_query_refs(path, content):
     """COMPONENT_QUERY_REF: every data={query} reference must have a matching sql block.
 
@@ -471,6 +1047,7 @@ def check_component_query_refs(path, content):
                  "updating the SQL block")
 
 
+@rules("page", "META_CITATION")
 def check_financial_citation(path, content):
     """META_CITATION: Financial_Performance.md must cite pmpml.org/financial_performance.
 
@@ -486,6 +1063,107 @@ def check_financial_citation(path, content):
              "https://pmpml.org/financial_performance — add to the source footnote")
 
 
+# Component prop schema (tools/propschema.py): component → {"props", "open"},
+# loaded once per run.
+_prop_schema: dict | None = None
+
+
+def prop_schema():
+    global _prop_schema
+    if _prop_schema is None:
+        from tools.propschema import load
+        _prop_schema = load().get("components", {})
+    return _prop_schema
+
+
+def _attributes(attrs):
+    """Yield (name, value, is_literal) for each attribute of a component tag.
+
+    value is None for a bare flag; {shorthand} yields the variable as name.
+    is_literal is False for {expressions}, whose value can't be checked.
+    """
+    i, n = 0, len(attrs)
+    while i < n:
+        if attrs[i].isspace() or attrs[i] == "/":
+            i += 1
+            continue
+        if attrs[i] == "{":
+            j = _close_brace(attrs, i)
+            inner = attrs[i + 1:j].strip()
+            if re.fullmatch(r"\w+", inner):
+                yield inner, None, False
+            i = j + 1
+            continue
+        m = re.compile(r"[\w:$.|-]+").match(attrs, i)
+        if not m:
+            i += 1
+            continue
+        name, i = m.group(), m.end()
+        if i < n and attrs[i] == "=":
+            i += 1
+            if i < n and attrs[i] in "'\"":
+                j = attrs.find(attrs[i], i + 1)
+                j = n if j == -1 else j
+                yield name, attrs[i + 1:j], True
+                i = j + 1
+            elif i < n and attrs[i] == "{":
+                j = _close_brace(attrs, i)
+                yield name, attrs[i + 1:j], False
+                i = j + 1
+            else:
+                m = re.compile(r"[^\s]+").match(attrs, i)
+                value = m.group() if m else ""
+                yield name, value, "{" not in value
+                i += len(value)
+        else:
+            yield name, None, False
+
+
+def _close_brace(text, i):
+    """Index of the '}' matching the '{' at text[i] (len(text) if unbalanced)."""
+    depth = 0
+    for k in range(i, len(text)):
+        if text[k] == "{":
+            depth += 1
+        elif text[k] == "}":
+            depth -= 1
+            if depth == 0:
+                return k
+    return len(text)
+
+
+@rules("page", "COMPONENT_PROP", "COMPONENT_PROP_VALUE")
+def check_component_props(path, content):
+    """COMPONENT_PROP / COMPONENT_PROP_VALUE: props checked against the schema.
+
+    tools/component_props.json lists the props of every Evidence core component
+    and components/*.svelte. A prop the component does not declare is dropped
+    silently at render time (lon= on a PointMap); a literal outside a prop's
+    string-literal type (handleMissing=gaps) falls back to the default.
+    Components that forward unresolvable props are only value-checked.
+    """
+    schema = prop_schema()
+    if not schema:
+        return
+    for tag, attrs in _tag_bodies(content, list(schema)):
+        spec = schema[tag]
+        props = spec["props"]
+        for name, value, literal in _attributes(attrs):
+            if ":" in name or name == "slot":
+                continue                        # bind:, on:, let: directives
+            if name not in props:
+                if not spec["open"]:
+                    close = difflib.get_close_matches(name, list(props), n=1)
+                    error("COMPONENT_PROP", path,
+                          f"<{tag}> has no prop {name}= — Evidence ignores it"
+                          + (f"; did you mean {close[0]}=?" if close else ""))
+            elif literal and props[name] and value not in props[name]:
+                error("COMPONENT_PROP_VALUE", path,
+                      f"<{tag} {name}={value}> — expected one of "
+                      + ", ".join(props[name]))
+
+
+@rules("page", "COMPONENT_SELF_CLOSE")
 def check_component_self_close(path, content):
     """COMPONENT_SELF_CLOSE: Charts with children must use open/close tags.
 
@@ -519,6 +1197,7 @@ def check_component_self_close(path, content):
               f"children are silently ignored. Change '/>' to '>' and add a closing tag.")
 
 
+@rules("page", "COMPONENT_COLOR_ORDER")
 def check_series_color_order(path, content):
     """COMPONENT_COLOR_ORDER: When the same concept appears in multiple charts on a page,
     series order (and therefore auto-assigned colors) should be consistent.
@@ -552,6 +1231,9 @@ def check_series_color_order(path, content):
 
 # ── Per-diagram affordance rules ──────────────────────────────────────────────
 
+@rules("page",
+       "CHART_XFMT_YEAR", "REFERENCELINE_EBUS_FLEET", "REFERENCELINE_DIESEL_EST",
+       "BARCHART_MULTITYPE", "AREACHART_MISSING", "REFERENCELINE_ZERO")
 def check_chart_affordances(path, content):
     """CHART_XFMT_YEAR / BARCHART_MULTITYPE / AREACHART_MISSING / REFERENCELINE_ZERO
     / REFERENCELINE_EBUS_FLEET / REFERENCELINE_DIESEL_EST: per-diagram-type affordances.
@@ -688,6 +1370,7 @@ def check_chart_affordances(path, content):
                  "hideValue=true color=base-content-muted lineType=dashed/>")
 
 
+@rules("page", "MAP_LON_PROP", "MAP_VALUE_FMT")
 def check_map_props(path, content):
     """MAP_LON_PROP / MAP_VALUE_FMT: PointMap prop correctness and affordances.
 
@@ -721,6 +1404,9 @@ def check_map_props(path, content):
 
 # ── UX / Design rules ─────────────────────────────────────────────────────────
 
+@rules("page",
+       "COMPONENT_INVALID_PROP", "CHART_TITLE", "CHART_YAXIS", "CHART_AREA_TYPE",
+       "CHART_DATATABLE_ROWS", "BIGVALUE_FMT")
 def check_chart_ux(path, content):
     """UX rules for chart components: titles, axis labels, type, invalid props.
 
@@ -777,6 +1463,7 @@ def check_chart_ux(path, content):
                      "add a format string (e.g. '#,##0' or '\"₹\"#,##0\" Cr\"')")
 
 
+@rules("page", "ARTIFACT_OPENER")
 def check_artifact_opener(path, content):
     """ARTIFACT_OPENER: pages must not open with an artifact-forward sentence.
 
@@ -806,6 +1493,7 @@ def check_artifact_opener(path, content):
         break  # only check the first non-empty, non-heading line
 
 
+@rules("page", "CONTENT_IFELSE")
 def check_content_ifelse(path, content):
     """CONTENT_IFELSE: ButtonGroup/conditional views must have prose before first chart.
 
@@ -878,6 +1566,7 @@ def check_content_ifelse(path, content):
                  "add at least one orienting sentence before the first chart")
 
 
+@rules("page", "PAGE_SEE_ALSO", "PAGE_FOOTER", "PAGE_INTRO", "META_DESCRIPTION")
 def check_page_ux(path, content):
     """UX rules for page narrative structure: intro prose, See Also, source footnote.
 
@@ -947,43 +1636,55 @@ def check_page_ux(path, content):
 
 # ── Data file rules ────────────────────────────────────────────────────────────
 
+def _load_source_csv(name):
+    """(rows as dicts or None if the file is missing, path relative to BASE)."""
+    p = SOURCES_DIR / name
+    if not p.exists():
+        return None, p.relative_to(BASE)
+    with open(p, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f)), p.relative_to(BASE)
+
+
+@rules("data",
+       "DATA_DEPOT_BRT_ONLY", "DATA_KNOWN_ISSUE", "DATA_DATE_FMT", "DATA_DEPOT_NAME",
+       "DATA_COORDS", "DATA_EARNINGS", "DATA_UTIL_OUTLIER", "DATA_DUPLICATE_ROW")
 def check_data_files():
-    """DATA: CSV source integrity, depot name consistency, value ranges."""
+    """DATA: monthly table integrity, depot name consistency, value ranges.
 
-    def load_csv(name):
-        p = SOURCES_DIR / name
-        if not p.exists():
-            return None, p
-        with open(p, newline="", encoding="utf-8") as f:
-            return list(csv.DictReader(f)), p
+    The tables are the city's monthly_tables; the PMPML-only value checks run
+    when the city has an extracted table.
+    """
 
-    rows_ext,  p_ext  = load_csv("extracted.csv")
-    rows_brt,  p_brt  = load_csv("brt_extracted.csv")
-    rows_ebus, p_ebus = load_csv("ebus_extracted.csv")
-    rows_dl,   p_dl   = load_csv("depot_locations.csv")
+    # The monthly tables are read through their (Date, Depot) row index
+    # (tools/rowindex.py): depot sets come straight from the index, and only
+    # the rows a check needs are parsed.
+    from tools.rowindex import open_all
+    indexes = open_all()
+    rel = SOURCES_DIR.relative_to(BASE)
+    p_ext = rel / "extracted.csv"
+    rows_dl, p_dl = _load_source_csv("depot_locations.csv")
+
+    # ── Duplicate (Date, Depot) rows ────────────────────────────────────────
+    # A lookup returns the first of them and the rest double-count in SUMs.
+
+    for table, idx in indexes.items():
+        for (month, depot), n in sorted(idx.duplicates.items()):
+            error("DATA_DUPLICATE_ROW", rel / f"{table}.csv",
+                  f"{n} rows for ({month}, {depot}) — keep one and fix the extraction")
 
     # ── Depot name consistency ──────────────────────────────────────────────
+    # Over the city's monthly_tables; the first one lists every regular depot.
 
-    def depots_in(rows, col="Depot", exclude=("System Total",)):
-        if rows is None:
-            return set()
-        return {r[col] for r in rows if r.get(col, "").strip() and r[col] not in exclude}
-
-    ext_depots = depots_in(rows_ext)
-    brt_depots = depots_in(rows_brt)
-    ebus_depots = depots_in(rows_ebus)
-    dl_depots   = depots_in(rows_dl, col="depot", exclude=())
-
-    for label, depots, path in [
-        ("extracted.csv",      ext_depots,  p_ext),
-        ("brt_extracted.csv",  brt_depots,  p_brt),
-        ("ebus_extracted.csv", ebus_depots, p_ebus),
-        ("depot_locations.csv", dl_depots,  p_dl),
-    ]:
-        if depots is None:
-            continue
+    depots = {t: {d for d in idx.depots() if d and d != "System Total"}
+              for t, idx in indexes.items()}
+    dl_depots = ({r["depot"] for r in rows_dl if r.get("depot", "").strip()}
+                 if rows_dl is not None else set())
+    main = PMPML_TABLES[0] if PMPML_TABLES else ""
+    main_depots = depots.get(main, set())
+
+    for path, names in [(rel / f"{t}.csv", ds) for t, ds in depots.items()] + [(p_dl, dl_depots)]:
         for bad in DEPRECATED_DEPOT_NAMES:
-            if bad in depots:
+            if bad in names:
                 error("DATA_DEPOT_NAME", path,
                       f"Deprecated depot name '{bad}' — "
                       f"use '{DEPRECATED_DEPOT_NAMES[bad]}'")
@@ -996,22 +1697,20 @@ def check_data_files():
                 error("DATA_COORDS", p_dl,
                       f"Depot '{r['depot']}' missing latitude/longitude")
 
-    # All depots in extracted.csv must have coordinates
-    if ext_depots and dl_depots:
-        missing = ext_depots - dl_depots
-        if missing:
-            for d in sorted(missing):
-                error("DATA_COORDS", p_dl,
-                      f"Depot '{d}' in extracted.csv has no entry in depot_locations.csv")
-
-    # BRT-only depots (not in extracted.csv) should either be in depot_locations
-    # or be listed in BRT_ONLY_DEPOTS as a known exception
-    if brt_depots and ext_depots:
-        brt_exclusive = brt_depots - ext_depots - BRT_ONLY_DEPOTS
-        for d in sorted(brt_exclusive):
-            warn("DATA_DEPOT_BRT_ONLY", p_brt,
-                 f"BRT depot '{d}' not in extracted.csv or BRT_ONLY_DEPOTS allowlist — "
-                 "add coordinates to depot_locations.csv or document the exception")
+    # All depots in the main monthly table must have coordinates
+    if main_depots and dl_depots:
+        for d in sorted(main_depots - dl_depots):
+            error("DATA_COORDS", p_dl,
+                  f"Depot '{d}' in {main}.csv has no entry in depot_locations.csv")
+
+    # Depots only the other monthly tables report (BRT yards) should either be
+    # in depot_locations or be listed in BRT_ONLY_DEPOTS as a known exception
+    if main_depots:
+        for t, ds in depots.items():
+            for d in sorted(ds - main_depots - BRT_ONLY_DEPOTS):
+                warn("DATA_DEPOT_BRT_ONLY", rel / f"{t}.csv",
+                     f"Depot '{d}' not in {main}.csv or BRT_ONLY_DEPOTS allowlist — "
+                     "add coordinates to depot_locations.csv or document the exception")
 
     # BRT_ONLY_DEPOTS should also be in depot_locations (for completeness)
     if dl_depots:
@@ -1021,27 +1720,32 @@ def check_data_files():
                      f"BRT-only depot '{d}' ({BRT_ONLY_DEPOTS}) has no entry in depot_locations.csv — "
                      "add coordinates even if this depot only appears in BRT data")
 
-    # ── Value range checks ──────────────────────────────────────────────────
-
-    if rows_ext is not None:
-        for r in rows_ext:
-            date, depot = r.get("Date", ""), r.get("Depot", "")
-            key = ("extracted.csv", date, depot, "% of Fleet Utilization(PMPML+PPP)")
-            key_wild = ("extracted.csv", date, "*", "% of Fleet Utilization(PMPML+PPP)")
-            v = r.get("% of Fleet Utilization(PMPML+PPP)", "").strip()
-            if v:
-                try:
-                    fv = float(v)
-                    if fv > 110 and key not in KNOWN_DATA_ISSUES and key_wild not in KNOWN_DATA_ISSUES:
-                        warn("DATA_UTIL_OUTLIER", p_ext,
-                             f"{date} / {depot}: fleet utilization = {fv}% — "
-                             "add to KNOWN_DATA_ISSUES if this is expected, "
-                             "or fix in source CSV")
-                except ValueError:
-                    pass
+    # ── Value range checks (PMPML extracted.csv columns) ────────────────────
+
+    if "extracted" in indexes:
+        # the column statistics catalog already knows the column maximum; the
+        # rows are only read when it could hold an outlier
+        util = "% of Fleet Utilization(PMPML+PPP)"
+        stats, _ = column_stats()
+        col = next((c for c in stats.get("extracted", []) if c.column_name == util), None)
+        if col is None or col.inferred_type not in ("integer", "double") or float(col.max_value) > 110:
+            for month, depot, v in indexes["extracted"].column(util):
+                key = ("extracted.csv", month, depot, util)
+                key_wild = ("extracted.csv", month, "*", util)
+                v = v.strip()
+                if v:
+                    try:
+                        fv = float(v)
+                        if fv > 110 and key not in KNOWN_DATA_ISSUES and key_wild not in KNOWN_DATA_ISSUES:
+                            warn("DATA_UTIL_OUTLIER", p_ext,
+                                 f"{month} / {depot}: fleet utilization = {fv}% — "
+                                 "add to KNOWN_DATA_ISSUES if this is expected, "
+                                 "or fix in source CSV")
+                    except ValueError:
+                        pass
 
         # Feb 2023 All Traffic Earning sanity check
-        feb = [r for r in rows_ext if r.get("Date") == "Feb 2023"]
+        feb = indexes["extracted"].month("Feb 2023")
         if feb:
             total = sum(
                 float(r.get("All Traffic Earning (₹)", 0) or 0)
@@ -1056,9 +1760,58 @@ def check_data_files():
                           "suspiciously low (expected ~₹450M). "
                           "Add to KNOWN_DATA_ISSUES if this has been addressed.")
 
+    # ── KNOWN_DATA_ISSUES entries must still point at a real cell ──────────
+    # An entry for a row or column that no longer exists (depot renamed, column
+    # renamed by a re-extraction) silently stops suppressing anything.
+
+    for (file, month, depot, column) in KNOWN_DATA_ISSUES:
+        table_idx = indexes.get(Path(file).stem)
+        if table_idx is None:
+            continue
+        if column != "*" and column not in table_idx.header:
+            warn("DATA_KNOWN_ISSUE", rel / file,
+                 f"KNOWN_DATA_ISSUES entry ({month}, {depot}) names column \"{column}\", "
+                 "which is not in the file header — update or remove the entry")
+        elif "*" not in (month, depot) and table_idx.get(month, depot) is None:
+            warn("DATA_KNOWN_ISSUE", rel / file,
+                 f"KNOWN_DATA_ISSUES entry ({month}, {depot}) has no matching row — "
+                 "update or remove the entry")
+        elif depot == "*" and month != "*" and not table_idx.month(month):
+            warn("DATA_KNOWN_ISSUE", rel / file,
+                 f"KNOWN_DATA_ISSUES entry for {month} matches no rows — "
+                 "update or remove the entry")
+    for table_idx in indexes.values():
+        table_idx.close()
+
+    # ── Date format consistency (from the column statistics catalog) ───────
+
+    stats, _ = column_stats()
+    for label in PMPML_TABLES:
+        date = next((c for c in stats.get(label, []) if c.column_name == "Date"), None)
+        if date is None or not date.row_count:
+            continue
+        path = rel / f"{label}.csv"
+        if date.inferred_type not in ("month", "empty"):
+            error("DATA_DATE_FMT", path,
+                  f"Date column is {date.inferred_type}, not 'Mon YYYY' months "
+                  f"(range {date.min_value!r}–{date.max_value!r}). Fix in extract_pdfs.py parse_date().")
+        elif date.parse_failures:
+            error("DATA_DATE_FMT", path,
+                  f"{date.parse_failures} non-standard date value(s) ({date.failure_samples}) — "
+                  "expected 'Mon YYYY' format (e.g. 'Jan 2023'). Fix in extract_pdfs.py parse_date().")
+
+
+@rules("data", "DATA_PNL", "DATA_PVR", "DATA_BS")
+def check_pmpml_financials():
+    """DATA: PMPML financial and vehicle registration CSVs (PMPML-only rules).
+
+    A city without these files lists the rules in its disabled_rules, and the
+    check is not called.
+    """
+
     # ── PMPML_Financial_PnL.csv integrity ───────────────────────────────────
 
-    rows_pnl, p_pnl = load_csv("PMPML_Financial_PnL.csv")
+    rows_pnl, p_pnl = _load_source_csv("PMPML_Financial_PnL.csv")
     if rows_pnl is None:
         error("DATA_PNL", p_pnl,
               "PMPML_Financial_PnL.csv not found — run /tmp/build_pnl_csv.py to regenerate")
@@ -1088,7 +1841,7 @@ def check_data_files():
 
     # ── pune_vehicle_registrations.csv integrity ─────────────────────────────
 
-    rows_pvr, p_pvr = load_csv("pune_vehicle_registrations.csv")
+    rows_pvr, p_pvr = _load_source_csv("pune_vehicle_registrations.csv")
     if rows_pvr is None:
         error("DATA_PVR", p_pvr,
               "pune_vehicle_registrations.csv not found — source: "
@@ -1113,7 +1866,7 @@ def check_data_files():
 
     # ── PMPML_Balance_Sheet.csv integrity ────────────────────────────────────
 
-    rows_bs, p_bs = load_csv("PMPML_Balance_Sheet.csv")
+    rows_bs, p_bs = _load_source_csv("PMPML_Balance_Sheet.csv")
     if rows_bs is None:
         error("DATA_BS", p_bs,
               "PMPML_Balance_Sheet.csv not found")
@@ -1146,62 +1899,400 @@ def check_data_files():
             warn("DATA_BS", p_bs,
                  f"PMPML_Balance_Sheet.csv has {len(rows_bs)} rows — expected 9")
 
-    # ── Date format consistency ─────────────────────────────────────────────
 
-    for label, rows, path in [
-        ("extracted",      rows_ext,  p_ext),
-        ("brt_extracted",  rows_brt,  p_brt),
-        ("ebus_extracted", rows_ebus, p_ebus),
-    ]:
-        if rows is None:
+@rules("data", "DATA_ANOMALY")
+def check_data_anomalies():
+    """DATA_ANOMALY: robust outliers in the latest month of each PMPML table.
+
+    tools/anomalies.py scores every numeric cell against the same depot's
+    previous months (rolling median / MAD, gap-aware via KNOWN_GAPS) and checks
+    per-bus daily rates against their RATE_LIMITS ceiling. Only the
+    most recent month is checked here so each ingestion surfaces its own
+    outliers; run `npm run anomalies` for the full-history report. Suppress
+    reviewed cells by adding them to KNOWN_DATA_ISSUES.
+    """
+    try:
+        from tools.anomalies import detect_all
+    except ImportError:
+        skipped.append("DATA_ANOMALY (numpy not installed)")
+        return
+    for a in detect_all(latest_only=True):
+        warn("DATA_ANOMALY", SOURCES_DIR.relative_to(BASE) / f"{a.table}.csv",
+             f"{a.month} / {a.depot}: \"{a.column}\" = {a.value:,.2f} vs. {a.reference} "
+             f"{a.median:,.2f} (score {a.score:,.1f}) — fix in source CSV or "
+             "add to KNOWN_DATA_ISSUES once reviewed")
+
+
+@rules("data", "DATA_SHIFT")
+def check_data_shift():
+    """DATA_SHIFT: tabula column shifts in the latest month of each PMPML table.
+
+    tools/colshift.py fingerprints every column (magnitude and ratio to its left
+    neighbour) from the other months and flags column blocks in the newest month
+    that fit a neighbouring column's fingerprint instead of their own — the
+    Feb 2023 earnings and Apr 2023 EPK pattern. Run `npm run colshift -- --all`
+    for every month.
+    """
+    try:
+        from tools.colshift import describe, detect_all
+    except ImportError:
+        skipped.append("DATA_SHIFT (numpy not installed)")
+        return
+    for s in detect_all(latest_only=True):
+        warn("DATA_SHIFT", SOURCES_DIR.relative_to(BASE) / f"{s.table}.csv",
+             f"{s.month}: {describe(s)} — re-extract the month or fix the column "
+             "alignment, then add to KNOWN_DATA_ISSUES once reviewed")
+
+
+@rules("data", "DATA_FORMULA")
+def check_data_formulas():
+    """DATA_FORMULA: derived columns must match their formula in the latest month.
+
+    tools/formulas.py recomputes every derivable column (totals, per-day
+    averages, EPK and other ratios) from its raw inputs and checks order
+    invariants such as schedules operated ≤ sanctioned. Only the most recent
+    month is checked here; `npm run formulas` prints the full history, with
+    groups where several depots deviate together marked as systematic (a
+    column shift or swap rather than a typo). Suppress reviewed cells by adding
+    them to KNOWN_DATA_ISSUES.
+    """
+    try:
+        from tools.formulas import check_all
+    except ImportError:
+        skipped.append("DATA_FORMULA (numpy not installed)")
+        return
+    for d in check_all(latest_only=True):
+        kind = "systematic, " if d.systematic else ""
+        warn("DATA_FORMULA", SOURCES_DIR.relative_to(BASE) / f"{d.table}.csv",
+             f"{d.month} / {d.depot}: \"{d.column}\" = {d.reported:,.2f} but "
+             f"{d.rule} gives {d.expected:,.2f} ({kind}fix in source CSV or add to "
+             "KNOWN_DATA_ISSUES once reviewed)")
+
+
+@rules("data", "DATA_CROSS")
+def check_data_cross():
+    """DATA_CROSS: the same quantity must agree across the three PMPML tables.
+
+    check_data_files only compares depot name sets. tools/crosscheck.py joins
+    brt_extracted and ebus_extracted onto extracted by (Date, canonical Depot)
+    and compares overlapping measures month by month: e-bus effective km must
+    match, BRT and e-bus figures must not exceed the depot's whole-operation
+    total, and every BRT/e-bus depot row needs an extracted row. Suppress a
+    reviewed cell with a KNOWN_DATA_ISSUES entry for either table.
+    """
+    try:
+        from tools.crosscheck import crosscheck
+        from tools.cube import load_cubes
+    except ImportError:
+        skipped.append("DATA_CROSS (numpy not installed)")
+        return
+    for x in crosscheck(load_cubes()):
+        path = SOURCES_DIR.relative_to(BASE) / f"{x.table}.csv"
+        if x.kind == "presence":
+            warn("DATA_CROSS", path,
+                 f"{x.month} / {x.depot}: row has no matching row in extracted.csv. "
+                 "Check the depot name, or add it to BRT_ONLY_DEPOTS")
+        else:
+            rel = "disagrees with" if x.kind == "equal" else "exceeds"
+            warn("DATA_CROSS", path,
+                 f"{x.month} / {x.depot}: \"{x.column}\" = {x.value:,.2f} {rel} extracted.csv "
+                 f"{x.reference_column} = {x.reference:,.2f} — fix in source CSV or add to "
+                 "KNOWN_DATA_ISSUES once reviewed")
+
+
+@rules("data", "DATA_RECONCILE")
+def check_data_reconcile():
+    """DATA_RECONCILE: depot rows must add up to each month's System Total row.
+
+    tools/reconcile.py sums additive columns and recomputes ratio columns (EPK,
+    utilization %, km/bus/day, …) from their summed numerator and denominator,
+    then compares both against the System Total row of brt_extracted and
+    ebus_extracted. A column shift in one depot row or in the total row shows up
+    here on ingestion. Suppress a reviewed total row with a KNOWN_DATA_ISSUES
+    entry keyed (file, month, "System Total", column or "*").
+    """
+    try:
+        from tools.reconcile import reconcile_all
+    except ImportError:
+        skipped.append("DATA_RECONCILE (numpy not installed)")
+        return
+    for m in reconcile_all():
+        warn("DATA_RECONCILE", SOURCES_DIR.relative_to(BASE) / f"{m.table}.csv",
+             f"{m.month}: \"{m.column}\" ({m.kind}) — depot rows give {m.expected:,.2f} "
+             f"but System Total row says {m.reported:,.2f}. Check for a column shift, "
+             "or add to KNOWN_DATA_ISSUES once reviewed")
+
+
+@rules("data", "DATA_CALENDAR")
+def check_calendar():
+    """DATA_CALENDAR: the city's calendar.csv must match tools/fiscal.py output.
+
+    The calendar table is generated from the months present in the PMPML tables
+    and from KNOWN_GAPS, so ingesting a month or editing a gap makes it stale.
+    """
+    from tools.fiscal import CALENDAR_CSV, is_stale
+    if is_stale():
+        error("DATA_CALENDAR", CALENDAR_CSV.relative_to(BASE),
+              "calendar.csv is missing or out of date with the PMPML tables / "
+              "KNOWN_GAPS — run `npm run calendar` and commit the result")
+
+
+@rules("data", "DATA_SITEMATCH")
+def check_site_matches():
+    """DATA_SITEMATCH: traffic_site_matches.csv must match tools/sitematch.py output.
+
+    The 2008↔2021 traffic survey pairing is computed from both surveys'
+    coordinates, so editing either survey CSV (or the match thresholds)
+    makes the checked-in comparison table stale.
+    """
+    from tools.sitematch import MATCHES_CSV, is_stale
+    if is_stale():
+        error("DATA_SITEMATCH", MATCHES_CSV.relative_to(BASE),
+              "traffic_site_matches.csv is missing or out of date with the traffic "
+              "surveys — run `npm run sitematch` and commit the result")
+
+
+@rules("data", "DATA_VEHGROWTH")
+def check_vehicle_growth():
+    """DATA_VEHGROWTH: the vehicle_* growth tables must match tools/vehgrowth.py output.
+
+    vehicle_trends, vehicle_growth and vehicle_projection are computed from
+    pune_vehicle_registrations.csv, so editing it (or the category mapping,
+    fit window or horizon) makes the checked-in tables stale.
+    """
+    try:
+        from tools.vehgrowth import stale_files
+    except ImportError:
+        skipped.append("DATA_VEHGROWTH (numpy not installed)")
+        return
+    for name in stale_files():
+        error("DATA_VEHGROWTH", SOURCES_DIR.relative_to(BASE) / name,
+              f"{name} is missing or out of date with pune_vehicle_registrations.csv "
+              "— run `npm run vehgrowth` and commit the result")
+
+
+@rules("data", "DATA_SPARKLINES")
+def check_sparklines():
+    """DATA_SPARKLINES: depot_sparklines.csv must match tools/sparklines.py output.
+
+    The arrays are cut from the PMPML tables with KNOWN_GAPS and
+    KNOWN_DATA_ISSUES months nulled, so ingesting a month or editing either
+    list makes them stale.
+    """
+    try:
+        from tools.sparklines import SPARKLINES_CSV, is_stale
+    except ImportError:
+        skipped.append("DATA_SPARKLINES (numpy not installed)")
+        return
+    if is_stale():
+        error("DATA_SPARKLINES", SPARKLINES_CSV.relative_to(BASE),
+              "depot_sparklines.csv is missing or out of date with the PMPML tables / "
+              "KNOWN_GAPS / KNOWN_DATA_ISSUES — run `npm run sparklines` and commit the result")
+
+
+@rules("data", "DATA_PARSE")
+def check_parse_failures():
+    """DATA_PARSE: numeric cells of the PMPML tables must parse as numbers.
+
+    tools/coerce.py writes <table>_typed.csv (numbers cleaned once, failures
+    blank) and parse_failures.csv from the PMPML tables, so ingesting a month
+    makes them stale. Each failed cell (merged report lines, stray text) is a
+    warning until it is fixed in the source CSV or added to KNOWN_DATA_ISSUES.
+    """
+    try:
+        from tools.coerce import coerce_all, failures, stale_files
+    except ImportError:
+        skipped.append("DATA_PARSE (numpy not installed)")
+        return
+    coerced = coerce_all()
+    for name in stale_files(coerced):
+        error("DATA_PARSE", SOURCES_DIR.relative_to(BASE) / name,
+              f"{name} is missing or out of date with the PMPML tables "
+              "— run `npm run coerce` and commit the result")
+    for f in failures(coerced):
+        if f.reviewed:
             continue
-        for r in rows:
-            d = r.get("Date", "").strip()
-            if d:
-                try:
-                    datetime.datetime.strptime(d, "%b %Y")
-                except ValueError:
-                    error("DATA_DATE_FMT", path,
-                          f"Non-standard date value '{d}' — expected 'Mon YYYY' format "
-                          "(e.g. 'Jan 2023'). Fix in extract_pdfs.py parse_date().")
+        warn("DATA_PARSE", SOURCES_DIR.relative_to(BASE) / f"{f.table}.csv",
+             f"row {f.row} ({f.date} / {f.depot}): \"{f.column}\" = {f.raw!r} does not parse "
+             f"({f.reason}) and reads as NULL — fix in source CSV or add to "
+             "KNOWN_DATA_ISSUES once reviewed")
+
+
+@rules("data", "DATA_UNITECON")
+def check_unit_economics():
+    """DATA_UNITECON: fy_unit_economics.csv must match tools/uniteconomics.py output.
+
+    The FY table joins the P&L, balance sheet, annual statistics and the
+    monthly extracted rows (gap months excluded), so editing any of them or
+    KNOWN_GAPS makes it stale.
+    """
+    from tools.uniteconomics import UNIT_ECONOMICS_CSV, is_stale
+    if is_stale():
+        error("DATA_UNITECON", UNIT_ECONOMICS_CSV.relative_to(BASE),
+              "fy_unit_economics.csv is missing or out of date with the financial / "
+              "operating CSVs — run `npm run uniteconomics` and commit the result")
+
+
+@rules("data", "DATA_STATS")
+def check_column_stats():
+    """DATA_STATS: the city's column_stats.csv must match its source CSVs.
+
+    Each catalog row records the SHA-256 of the file it was computed from;
+    any CSV added, edited or removed since the last `npm run colstats` makes
+    the catalog stale, and the pages that query it show outdated figures.
+    """
+    from tools.colstats import CATALOG_CSV, load, stale_tables
+    stale = stale_tables(load())
+    if stale:
+        error("DATA_STATS", CATALOG_CSV.relative_to(BASE),
+              f"column_stats.csv is missing or out of date for {', '.join(stale)} — "
+              "run `npm run colstats` and commit the result")
+
+
+@rules("site", "COMPONENT_SCHEMA")
+def check_component_schema():
+    """COMPONENT_SCHEMA: tools/component_props.json matches what is installed.
+
+    Without node_modules the checked-in core component props are used as-is;
+    the project's own components/ are always compared. A schema without core
+    components is stale once the package is installed; before that it can
+    only be noted as skipped.
+    """
+    from tools.propschema import SCHEMA_JSON, core_version, load, stale_reasons
+    stored = load()
+    if not stored.get("core_components") and not core_version():
+        skipped.append("COMPONENT_PROP for core components (none in the schema — "
+                       "npm install, then npm run propschema)")
+    for reason in stale_reasons(stored):
+        warn("COMPONENT_SCHEMA", SCHEMA_JSON.relative_to(BASE),
+             f"Component prop schema is stale: {reason} — run `npm run propschema`")
+
+
+# ── Asset rules ────────────────────────────────────────────────────────────────
+
+# Raster images above this size must be served as a tile pyramid (tools/tiles.py).
+# GitHub Pages gives us no compression control — a 1.6 MB JPEG is 1.6 MB on the wire.
+RASTER_BUDGET_BYTES = 500_000
+_RASTER_EXTS = frozenset([".jpg", ".jpeg", ".png", ".webp", ".gif", ".tif", ".tiff", ".bmp"])
+_ASSET_SKIP_DIRS = frozenset([".git", "node_modules", "build", ".evidence", ".svelte-kit"])
+
+
+@rules("site", "ASSET_SIZE")
+def check_raster_assets():
+    """ASSET_SIZE: raster images over RASTER_BUDGET_BYTES must be tiled.
+
+    A large image is acceptable only when tools/tiles.py has cut it into a
+    pyramid under static/<name>/ and that pyramid's manifest.json records the
+    image's current SHA-256. Pages then load the thumbnail and a few tiles via
+    <DeepZoomImage> instead of the whole file on first paint.
+    """
+    import os
+    from tools.tiles import is_stale, load_manifests
+
+    manifests = load_manifests()
+    for root, dirs, files in os.walk(BASE):
+        dirs[:] = [d for d in dirs if d not in _ASSET_SKIP_DIRS]
+        for name in files:
+            p = Path(root) / name
+            if p.suffix.lower() not in _RASTER_EXTS:
+                continue
+            size = p.stat().st_size
+            if size <= RASTER_BUDGET_BYTES:
+                continue
+            rel = p.relative_to(BASE)
+            manifest = manifests.get(rel.as_posix())
+            if manifest is None:
+                error("ASSET_SIZE", rel,
+                      f"Raster asset is {size / 1e6:.1f} MB (budget "
+                      f"{RASTER_BUDGET_BYTES / 1e6:.1f} MB) and has no tile pyramid — "
+                      "add it to TILED_IMAGES in tools/tiles.py, run `npm run assets`, "
+                      "and embed it with <DeepZoomImage> instead of the raw file")
+            elif is_stale(p, manifest):
+                error("ASSET_SIZE", rel,
+                      "Tile pyramid is stale — image changed since it was tiled. "
+                      "Run `npm run assets` to regenerate static tiles.")
+
+
+# The active city: DATAVIZ_CITY (set by activate() for worker processes and
+# tools/ modules) or DEFAULT_CITY.
+activate(os.environ.get("DATAVIZ_CITY", DEFAULT_CITY))
 
 
 # ── Main ───────────────────────────────────────────────────────────────────────
 
-def main():
-    strict = "--strict" in sys.argv
+def lint_city(name, select=(), skip=(), fail_fast=False, jsonl=False):
+    """Run the selected rules for one city; return its report data (picklable).
+
+    With jsonl, findings are written to stdout as they are found and only
+    their counts are kept, so memory does not grow with the report.
+    """
+    configure(select, skip, fail_fast, sys.stdout if jsonl else None)
+    activate(name)
+    md_files = city_pages()
+    enabled = [c for c in CHECKS if c.enabled()]
+    page_checks = [c.func for c in enabled if c.scope == "page"]
+    stopped = None
+    try:
+        for md_path in md_files if page_checks else []:
+            content = md_path.read_text(encoding="utf-8")
+            rel = md_path.relative_to(BASE)
+            for check in page_checks:
+                check(rel, content)
+        for c in enabled:
+            if (c.scope == "data" and SOURCES_DIR.exists()) or (c.scope == "site" and CITY["default"]):
+                c.func()
+    except FailFast as e:
+        stopped = str(e)
+
+    result = {
+        "city": name,
+        "title": CITY["title"],
+        "pages": len(md_files),
+        "data_files": len(list(SOURCES_DIR.glob("*.csv"))),
+        "findings": list(findings),
+        "skipped": list(skipped),
+        "errors": counts["ERROR"],
+        "warnings": counts["WARN"],
+        "stopped": stopped,
+    }
+    if jsonl:
+        for note in skipped:
+            emit({"type": "skipped", "city": name, "note": note})
+        emit({"type": "summary", **{k: v for k, v in result.items() if k not in ("findings", "skipped")}})
+    return result
+
+
+def _wrap(msg, width):
+    """Split msg into lines of at most width characters (longer words stay whole)."""
+    lines: list[str] = []
+    cur: list[str] = []
+    used = 0
+    for w in msg.split():
+        if cur and used + 1 + len(w) > width:
+            lines.append(" ".join(cur))
+            cur, used = [], 0
+        used += len(w) + (1 if cur else 0)
+        cur.append(w)
+    if cur:
+        lines.append(" ".join(cur))
+    return lines or [""]
+
+
+def report(result, strict):
+    """Print one city's findings grouped by file; return True if it fails."""
+    findings = result["findings"]
+    errors, warnings = result["errors"], result["warnings"]
 
-    md_files = sorted(PAGES_DIR.rglob("*.md"))
-    for md_path in md_files:
-        content = md_path.read_text(encoding="utf-8")
-        rel = md_path.relative_to(BASE)
-        check_meta(rel, content)
-        check_links(rel, content)
-        check_sql(rel, content)
-        check_components(rel, content)
-        check_sql_position(rel, content)
-        check_component_query_refs(rel, content)
-        check_component_self_close(rel, content)
-        check_series_color_order(rel, content)
-        check_financial_citation(rel, content)
-        check_chart_affordances(rel, content)
-        check_map_props(rel, content)
-        check_chart_ux(rel, content)
-        check_page_ux(rel, content)
-        check_artifact_opener(rel, content)
-        check_content_ifelse(rel, content)
-
-    check_data_files()
-
-    # ── Report ──────────────────────────────────────────────────────────────
-    errors   = [f for f in findings if f[0] == "ERROR"]
-    warnings = [f for f in findings if f[0] == "WARN"]
-
-    csv_count = len(list(SOURCES_DIR.glob("*.csv")))
     print(f"\n{'═' * 68}")
-    print(f"  DataViz Linter  ·  {len(md_files)} pages  ·  {csv_count} data files")
+    print(f"  DataViz Linter  ·  {result['city']}  ·  {result['pages']} pages  ·  "
+          f"{result['data_files']} data files")
     print(f"{'═' * 68}\n")
 
+    for note in result["skipped"]:
+        print(f"  ·  skipped {note}")
+    if result["skipped"]:
+        print()
+
     if not findings:
         print("  ✓  All checks passed\n")
     else:
@@ -1214,34 +2305,81 @@ def main():
             print(f"  {rel_file}")
             for sev, rule, msg in by_file[file]:
                 icon = "✗" if sev == "ERROR" else "⚠"
-                # Wrap long messages
                 prefix = f"    {icon} [{rule}] "
-                wrap = 68 - len(prefix)
-                words = msg.split()
-                lines: list[str]
-                cur: list[str]
-                lines, cur = [], []
-                for w in words:
-                    if sum(len(x) + 1 for x in cur) + len(w) > wrap and cur:
-                        lines.append(" ".join(cur))
-                        cur = [w]
-                    else:
-                        cur.append(w)
-                if cur:
-                    lines.append(" ".join(cur))
+                lines = _wrap(msg, 68 - len(prefix))
                 print(prefix + lines[0])
                 for l in lines[1:]:
                     print(" " * len(prefix) + l)
             print()
 
+    failed = bool(errors or (strict and warnings))
     print(f"{'─' * 68}")
-    status = "FAIL" if errors or (strict and warnings) else "PASS"
-    print(f"  {status}  ·  {len(errors)} error(s)  ·  {len(warnings)} warning(s)")
+    print(f"  {'FAIL' if failed else 'PASS'}  ·  {errors} error(s)  ·  {warnings} warning(s)")
+    if result["stopped"]:
+        print(f"  (--fail-fast: stopped at the first error, {result['stopped']})")
     if strict and warnings and not errors:
         print("  (--strict: warnings treated as errors)")
     print(f"{'─' * 68}\n")
+    return failed
+
+
+def _arg_values(flag):
+    return [sys.argv[i + 1] for i, a in enumerate(sys.argv[:-1]) if a == flag]
+
+
+def _patterns(flag):
+    return [p.strip() for v in _arg_values(flag) for p in v.split(",") if p.strip()]
+
 
-    sys.exit(1 if (errors or (strict and warnings)) else 0)
+def main():
+    strict = "--strict" in sys.argv
+    fail_fast = "--fail-fast" in sys.argv
+    jsonl = (_arg_values("--format") or ["text"])[0] == "jsonl"
+    select, skip = _patterns("--rules"), _patterns("--skip")
+
+    all_rules = sorted({r for c in CHECKS for r in c.rules})
+    if "--list-rules" in sys.argv:
+        for c in CHECKS:
+            print(f"  {c.scope:<5} {c.func.__name__:<28} {', '.join(c.rules)}")
+        return
+    unmatched = [p for p in select + skip if not _matches_any(p, all_rules)]
+    if unmatched:
+        print(f"  no rule matches {', '.join(unmatched)} — see python3 lint.py --list-rules")
+        sys.exit(2)
+
+    known = discover_cities()
+    cities = _arg_values("--city") or known
+    unknown = [c for c in cities if c not in known]
+    if unknown:
+        print(f"  unknown city {', '.join(unknown)} — expected one of: {', '.join(known)}")
+        sys.exit(2)
+    jobs = int((_arg_values("--jobs") or [os.cpu_count() or 1])[0])
+    run = partial(lint_city, select=select, skip=skip, fail_fast=fail_fast, jsonl=jsonl)
+
+    if len(cities) == 1:
+        results = [run(cities[0])]
+    else:
+        # One fresh process per city, even with --jobs 1: tools/ modules copy
+        # the per-city globals at import time, so a process never lints twice.
+        with ProcessPoolExecutor(max_workers=max(1, min(jobs, len(cities))),
+                                 mp_context=multiprocessing.get_context("spawn"),
+                                 max_tasks_per_child=1) as pool:
+            futures = [pool.submit(run, c) for c in cities]
+            results = []
+            for future in futures:
+                results.append(future.result())
+                if fail_fast and results[-1]["errors"]:
+                    pool.shutdown(cancel_futures=True)
+                    break
+
+    if jsonl:
+        failed = [r["city"] for r in results if r["errors"] or (strict and r["warnings"])]
+    else:
+        failed = [r["city"] for r in results if report(r, strict)]
+        if len(results) > 1:
+            print(f"  {len(results) - len(failed)}/{len(results)} cities passed"
+                  + (f"  ·  failing: {', '.join(failed)}" if failed else ""))
+    sys.exit(1 if failed else 0)
 
 
 if __name__ == "__main__":
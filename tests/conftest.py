@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# tests import lint and tools/ the way `python3 -m tools.x` does: from the repo root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,11 @@
+// Layout of @evidence-dev/core-components dist/index.js as svelte-package
+// writes it: one re-export per component, relative .svelte paths, mixed with
+// re-exports of plain modules that are not components.
+export { default as LineChart } from './unsorted/viz/line/LineChart.svelte';
+export { default as DataTable } from './unsorted/viz/table/DataTable.svelte';
+export {
+	default as Value
+} from './unsorted/viz/value/Value.svelte';
+export { default as Column } from "./unsorted/viz/table/Column.svelte";
+export * from './utils.js';
+export { formatValue } from './utils/formatting.js';
@@ -0,0 +1,49 @@
+"""tools/anomalies.py must catch the hand-found issues that motivated it.
+
+The checked-in CSVs keep some of those cells (registered in KNOWN_DATA_ISSUES)
+and have others imputed; imputed cells are put back to what the report said
+before scoring. Detection runs with suppress=False so the registrations do not
+hide the cells under test.
+"""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from tools.anomalies import detect  # noqa: E402
+from tools.cube import load_cube  # noqa: E402
+
+
+def _hits(cube, month, column):
+    return {a.depot: a for a in detect(cube, suppress=False)
+            if a.month == month and a.column == column}
+
+
+@pytest.mark.parametrize("month", ["Oct 2023", "Nov 2023"])
+def test_nigadi_gross_km_per_bus(month):
+    cube = load_cube("extracted")
+    assert "Nigadi" in _hits(cube, month, "Gross KMs- Diesel (Own)")
+
+
+def test_nigadi_gross_km_no_false_rate_hits():
+    cube = load_cube("extracted")
+    hits = [a for a in detect(cube, suppress=False) if a.column == "Gross KMs- Diesel (Own)"
+            and a.reference != "local median"]
+    assert {(a.depot, a.month) for a in hits} == {("Nigadi", "Oct 2023"), ("Nigadi", "Nov 2023")}
+
+
+def test_apr_2023_epk_column_swap():
+    # the report put ~₹60-75 in the column that holds ~₹25-38 (imputed since)
+    cube = load_cube("extracted")
+    column = "Earning per KMs in Rs.(EPK) (₹)"
+    m = cube.month_labels.index("Apr 2023")
+    cube.values[:, m, cube.columns.index(column)] *= 2
+    reporting = [d for d, present in zip(cube.depots, cube.present[:, m])
+                 if present and d != "System Total"]
+    hits = _hits(cube, "Apr 2023", column)
+    assert len(hits) >= 0.8 * len(reporting)
+
+
+def test_hadapsar_ebus_passengers_dec_2023():
+    cube = load_cube("ebus_extracted")
+    assert "Hadapsar" in _hits(cube, "Dec 2023", "passengers_per_day")
@@ -0,0 +1,41 @@
+"""tools/formulas.py SHIFTS must realign exactly the Jan/Mar 2023 schedule rows."""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from tools.coerce import coerce_table  # noqa: E402
+
+SANCTIONED = "No.of Schedules Sanctioned Per Day (PMPML + PPP)"
+HIRED = "Hired"
+TOTAL = "Schedules Total (PMPML+HIRE) Per Day"
+OPERATED = "Average No.of Schedule operated Per Day (PMPML+PPP)"
+HIRED_OPERATED = "Hired Vehicles Per Day"
+TOTAL_OPERATED = "Total Per Day (PMPML+HIRED)"
+
+
+def _rows(coerced):
+    h = {c: i for i, c in enumerate(coerced.header)}
+    return [{c: r[h[c]] for c in coerced.header} for r in coerced.rows]
+
+
+def test_only_jan_and_mar_2023_are_realigned():
+    c = coerce_table("extracted")
+    months = {c.rows[r][c.header.index("Date")] for r in c.realigned}
+    assert months == {"Jan 2023", "Mar 2023"}
+
+
+@pytest.mark.parametrize("month", ["Jan 2023", "Mar 2023"])
+def test_realigned_schedules_add_up(month):
+    rows = [r for r in _rows(coerce_table("extracted")) if r["Date"] == month]
+    assert rows
+    for r in rows:
+        n = {k: float(r[k]) for k in (SANCTIONED, HIRED, TOTAL, OPERATED, HIRED_OPERATED, TOTAL_OPERATED)}
+        assert n[TOTAL] == n[SANCTIONED] + n[HIRED]
+        assert n[TOTAL_OPERATED] == n[OPERATED] + n[HIRED_OPERATED]
+
+
+def test_nigadi_jan_2023():
+    r = next(r for r in _rows(coerce_table("extracted"))
+             if r["Date"] == "Jan 2023" and r["Depot"] == "Nigadi")
+    assert (r[SANCTIONED], r[OPERATED], r[HIRED_OPERATED], r[TOTAL_OPERATED]) == ("15", "7", "145", "152")
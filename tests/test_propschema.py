@@ -0,0 +1,54 @@
+"""tools/propschema.py against a fixture laid out like @evidence-dev/core-components."""
+
+from pathlib import Path
+
+import pytest
+
+from tools import propschema
+
+FIXTURE = Path(__file__).parent / "fixtures" / "core-components"
+
+
+@pytest.fixture
+def core(monkeypatch):
+    monkeypatch.setattr(propschema, "CORE_DIR", FIXTURE)
+    return propschema.core_components()
+
+
+def test_export_regex_reads_every_component_reexport():
+    text = (FIXTURE / "dist" / "index.js").read_text(encoding="utf-8")
+    assert dict(propschema._EXPORT.findall(text)) == {
+        "LineChart": "./unsorted/viz/line/LineChart.svelte",
+        "DataTable": "./unsorted/viz/table/DataTable.svelte",
+        "Value": "./unsorted/viz/value/Value.svelte",
+        "Column": "./unsorted/viz/table/Column.svelte",
+    }
+
+
+def test_prop_regex_skips_module_context_exports(core):
+    props = core["LineChart"]["props"]
+    assert "evidenceInclude" not in props
+    assert props["handleMissing"] == ["gap", "zero", "connect"]
+    assert props["x"] is None and props["markers"] is None
+
+
+def test_forwarded_props_are_inherited(core):
+    line = core["LineChart"]
+    assert {"title", "connectGroup", "legendPosition"} <= set(line["props"])
+    assert line["props"]["legendPosition"] == ["top", "bottom"]
+    assert line["open"]                         # Chart spreads $$restProps onto a <div>
+
+
+def test_closed_component(core):
+    assert core["DataTable"] == {
+        "source": "tests/fixtures/core-components/dist/unsorted/viz/table/DataTable.svelte",
+        "open": False,
+        "props": {"data": None, "rows": None, "search": None},
+    }
+
+
+def test_installed_package_without_core_props_is_stale(monkeypatch):
+    monkeypatch.setattr(propschema, "CORE_DIR", FIXTURE)
+    stored = propschema.load()
+    reasons = propschema.stale_reasons({**stored, "core_components": None})
+    assert any("5.2.2" in r for r in reasons)
@@ -0,0 +1,35 @@
+"""tools/sitematch.py match(): distance decides between 2008 points, names only within one."""
+
+from tools.sitematch import match
+
+# ~1 m per 0.000009° of latitude near Pune
+_M = 0.000009
+
+
+def _site(no: str, name: str, north_m: float) -> dict:
+    return {"location_no": no, "location_detail": name,
+            "latitude": str(18.6 + north_m * _M), "longitude": "73.8"}
+
+
+def _pairs(old, new):
+    return {o["location_no"]: n["location_no"] for o, n, _ in match(old, new)}
+
+
+def test_closer_2008_point_wins_a_contested_site():
+    # both 2008 points have SL1 as their nearest candidate; V2's name matches
+    # it far better, but V1 is 10 m away and V2 300 m
+    new = [_site("SL1", "Nashik Phata Chowk", 0)]
+    old = [_site("V1", "Kasarwadi", 10), _site("V2", "Nashik Phata Chowk", 300)]
+    assert _pairs(old, new) == {"V1": "SL1"}
+
+
+def test_names_break_ties_within_one_2008_point():
+    new = [_site("SL1", "Pimpri Chowk", 0), _site("SL2", "Nigdi Bhakti Shakti", 60)]
+    old = [_site("V1", "Nigdi Bhakti Shakti Chowk", 20)]
+    assert _pairs(old, new) == {"V1": "SL2"}
+
+
+def test_loser_of_a_contest_takes_its_next_site():
+    new = [_site("SL1", "Nashik Phata", 0), _site("SL2", "Kasarwadi Station", 600)]
+    old = [_site("V1", "Kasarwadi", 10), _site("V2", "Nashik Phata", 250)]
+    assert _pairs(old, new) == {"V1": "SL1", "V2": "SL2"}
@@ -0,0 +1,8 @@
+"""
+tools — build stages and data checks that sit alongside lint.py.
+
+Each module is runnable on its own (python3 -m tools.<name>) and is wired to an
+npm script in package.json. Project constants (KNOWN_GAPS, KNOWN_DATA_ISSUES,
+DEPRECATED_DEPOT_NAMES, ...) are imported from lint.py, which loads them from
+cities/<City>.json for the city named by DATAVIZ_CITY (default PCMC).
+"""
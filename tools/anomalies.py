@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+tools/anomalies.py — Robust per-depot temporal outlier detector.
+
+Every hand-found entry in KNOWN_DATA_ISSUES (Hadapsar's doubled e-bus
+passengers_per_day in Dec 2023, Nigadi's 373 and 541 km/bus/day, the Apr 2023
+EPK) is a value far from what the same depot reported in neighbouring months.
+This module scores every numeric cell of extracted, brt_extracted and
+ebus_extracted that way, all columns at once.
+
+Method — rolling median / MAD on the depot × month × column cube (tools/cube.py):
+  1. Gap months (KNOWN_GAPS) and missing rows are NaN, never scored, and never
+     used as neighbours. The window spans calendar months, so a point next to a
+     gap simply has fewer neighbours rather than borrowing from across it.
+  2. For each cell, take the ±WINDOW calendar months around it, *excluding the
+     cell itself*, and compute their median and median absolute deviation.
+  3. score = |value − median| / max(1.4826·MAD, REL_FLOOR·|median|, ABS_FLOOR)
+     The floors stop flat series (MAD = 0) from turning every wobble into an
+     outlier.
+  4. Cells with score > Z_THRESHOLD and at least MIN_NEIGHBOURS neighbours are
+     reported unless KNOWN_DATA_ISSUES already covers them.
+
+A depot whose fleet is still ramping up has no stable history to compare
+against: Nigadi's own diesel gross km rose every month through 2023, so its
+Oct and Nov values (373 and 541 km per bus per day) score below 3 however
+the window or threshold is set. RATE_LIMITS adds the check those cases need —
+a column divided by its per-bus denominator and the days in the month, against
+a physical daily maximum — reported with the same Anomaly record.
+
+Run: python3 -m tools.anomalies            — full history, grouped report
+     python3 -m tools.anomalies --latest   — latest month per table only, scored
+                                             against the months before it
+
+lint.py runs the --latest variant as DATA_ANOMALY, so each ingestion is
+checked for new outliers without re-reporting the historical backlog.
+
+Requires numpy.
+"""
+
+import calendar
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from tools.cube import Cube, known_issue, load_cubes, month_label
+
+WINDOW = 4              # months either side of the scored cell
+MIN_NEIGHBOURS = 4      # non-NaN neighbours needed to score a cell
+Z_THRESHOLD = 8.0
+REL_FLOOR = 0.10        # scale never below 10% of the local median…
+ABS_FLOOR = 1.0         # …nor below one unit (keeps small counts quiet)
+
+# column → (per-bus denominator column, most one bus can do in a day)
+RATE_LIMITS = {
+    "Gross KMs- Diesel (Own)": ("Avg. Vehicles On Road- PMPML Per Day (OWN)", 350.0),
+}
+
+
+@dataclass
+class Anomaly:
+    table: str
+    depot: str
+    month: str
+    column: str
+    value: float
+    median: float               # the reference value: local median, or the rate limit's cell value
+    score: float
+    reference: str = "local median"
+
+
+def _masked_median(sorted_w: np.ndarray, n: np.ndarray) -> np.ndarray:
+    """Median along the last axis of an ascending-sorted, NaN-last array.
+
+    n holds the non-NaN count per slice. Much faster than np.nanmedian, which
+    falls back to a Python loop over slices.
+    """
+    lo = np.clip((n - 1) // 2, 0, None)[..., None]
+    hi = np.clip(n // 2, 0, None)[..., None]
+    a = np.take_along_axis(sorted_w, lo, axis=-1)[..., 0]
+    b = np.take_along_axis(sorted_w, hi, axis=-1)[..., 0]
+    med = (a + b) / 2
+    return np.where(n > 0, med, np.nan)
+
+
+def robust_scores(values: np.ndarray, window: int = WINDOW,
+                  trailing: bool = False) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return (score, median, neighbours) arrays shaped like values (depots, months, cols).
+
+    values must already have gap months and missing rows set to NaN. A centred
+    window uses ±window months; a trailing window uses the 2·window months
+    before each cell, which is what a freshly ingested month has to go on.
+    """
+    before, after = (2 * window, 0) if trailing else (window, window)
+    padded = np.pad(values, ((0, 0), (before, after), (0, 0)), constant_values=np.nan)
+    w = sliding_window_view(padded, before + after + 1, axis=1).copy()
+    w[..., before] = np.nan                          # leave the scored cell out
+    n = np.sum(~np.isnan(w), axis=-1)
+
+    med = _masked_median(np.sort(w, axis=-1), n)
+    dev = np.abs(w - med[..., None])
+    mad = _masked_median(np.sort(dev, axis=-1), n)
+
+    scale = np.maximum(1.4826 * mad, np.maximum(REL_FLOOR * np.abs(med), ABS_FLOOR))
+    with np.errstate(invalid="ignore"):
+        score = np.abs(values - med) / scale
+    return score, med, n
+
+
+def rate_scores(cube: Cube, values: np.ndarray) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    """column → (rate / limit, cell value at the limit), each (depots, months),
+    for every RATE_LIMITS column the cube has. values is detect()'s masked cube."""
+    days = np.array([calendar.monthrange(m.year, m.month)[1] for m in cube.months], dtype=float)
+    out = {}
+    for column, (per_bus, limit) in RATE_LIMITS.items():
+        if column not in cube.columns or per_bus not in cube.columns:
+            continue
+        buses = values[:, :, cube.columns.index(per_bus)]
+        ceiling = np.where(buses > 0, buses * days[None, :] * limit, np.nan)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[column] = values[:, :, cube.columns.index(column)] / ceiling, ceiling
+    return out
+
+
+def detect(cube: Cube, latest_only: bool = False, suppress: bool = True) -> list[Anomaly]:
+    """Score every depot/month/column cell in cube and return outliers, leaving out
+    the ones KNOWN_DATA_ISSUES covers unless suppress is False."""
+    depots = [d for d, keep in zip(cube.depots, cube.depot_mask()) if keep]
+    values = cube.values[cube.depot_mask()].copy()
+    values[~cube.present[cube.depot_mask()]] = np.nan
+    values[:, cube.gap, :] = np.nan
+
+    score, med, n = robust_scores(values, trailing=latest_only)
+    with np.errstate(invalid="ignore"):
+        hit = (score > Z_THRESHOLD) & (n >= MIN_NEIGHBOURS)
+    rates = rate_scores(cube, values)
+    rate_hit = {c: np.nan_to_num(r) > 1 for c, (r, _) in rates.items()}
+    if latest_only:
+        observed = np.flatnonzero(cube.present.any(axis=0))
+        if observed.size == 0:
+            return []
+        hit[:, : observed[-1], :] = False
+        for h in rate_hit.values():
+            h[:, : observed[-1]] = False
+
+    file = cube.path.name
+    found = [(int(d), int(m), cube.columns[c], float(values[d, m, c]), float(med[d, m, c]),
+              float(score[d, m, c]), "local median") for d, m, c in np.argwhere(hit)]
+    for column, (ratio, ceiling) in rates.items():
+        j = cube.columns.index(column)
+        found += [(int(d), int(m), column, float(values[d, m, j]), float(ceiling[d, m]),
+                   float(ratio[d, m]), f"{RATE_LIMITS[column][1]:g} km/bus/day ceiling")
+                  for d, m in np.argwhere(rate_hit[column])]
+    out = []
+    for d, m, column, value, reference, s, basis in found:
+        month = month_label(cube.months[m])
+        if suppress and known_issue(file, month, depots[d], column):
+            continue
+        out.append(Anomaly(cube.table, depots[d], month, column, value, reference, s, basis))
+    return out
+
+
+def detect_all(latest_only: bool = False) -> list[Anomaly]:
+    found = []
+    for cube in load_cubes().values():
+        found.extend(detect(cube, latest_only))
+    return found
+
+
+def group(anomalies: list[Anomaly]) -> dict[tuple[str, str, str], list[Anomaly]]:
+    """Group by (table, month, column). Many depots in one group points at a
+    column-level extraction problem rather than a single bad cell."""
+    groups: dict[tuple[str, str, str], list[Anomaly]] = {}
+    for a in anomalies:
+        groups.setdefault((a.table, a.month, a.column), []).append(a)
+    return groups
+
+
+def main():
+    latest = "--latest" in sys.argv
+    t0 = time.perf_counter()
+    found = detect_all(latest_only=latest)
+    elapsed = time.perf_counter() - t0
+
+    groups = group(found)
+    for (table, month, column), items in sorted(groups.items()):
+        print(f"  {table} · {month} · {column}")
+        for a in sorted(items, key=lambda a: -a.score):
+            print(f"      {a.depot:<15} {a.value:>14,.2f}  ({a.reference} {a.median:,.2f}, "
+                  f"score {a.score:,.1f})")
+    print(f"\n  {len(found)} outlier cell(s) in {len(groups)} group(s) · {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+tools/buildsize.py — Per-page payload audit of the Evidence build output.
+
+GitHub Pages gives us no control over compression or caching headers, so the
+bytes a page pulls in are the one latency lever we own. This stage walks
+build/DataViz-for-Indian-Cities/ after `npm run build` and attributes every
+file to the pages that load it:
+
+    html     the prerendered <route>/index.html
+    js, css  _app/ chunks the HTML preloads, imports or links, followed
+             through the static and dynamic imports of each JS chunk
+    data     source tables the page's SQL reads (data/<source>/<table>/…,
+             parquet fetched by DuckDB-WASM) and files under the route's own
+             folder or api/<route>/ (prerendered query results, __data.json)
+    geojson, image
+             files referenced from the HTML or from the page's markdown
+             (geoJsonUrl='/pcmcg.geojson', <img src>, …)
+
+A page's transfer size is what a first visit downloads: text files (html, js,
+css, json, svg, csv) at their gzip -6 size, everything else raw. Chunks shared
+by every page are counted in each page and listed once as "shared".
+
+Output: the heaviest pages (transfer, raw, split by kind, delta vs. baseline)
+and the heaviest assets (transfer, number of pages that load them).
+
+The baseline is build-size.json at the repository root, written by --record
+and committed. A page fails when its transfer size grows by more than
+GROWTH_LIMIT (default 10%, --threshold to override) and by at least
+MIN_GROWTH_BYTES over its baseline; the exit status is then 1. Pages without
+a baseline are reported as new, never failed. While no baseline is committed,
+the deploy workflow records one and uploads it as the build-size artifact.
+
+Run: python3 -m tools.buildsize                      — audit, compare against baseline
+     python3 -m tools.buildsize --record             — audit and write the baseline
+     python3 -m tools.buildsize --threshold 5 --top 20 --json out.json
+     python3 -m tools.buildsize --build path/to/build
+
+Standard library only.
+"""
+
+import gzip
+import json
+import re
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from lint import BASE, PAGES_DIR, extract_sql_blocks
+
+BUILD_DIR = BASE / "build" / "DataViz-for-Indian-Cities"
+BASELINE_JSON = BASE / "build-size.json"
+GROWTH_LIMIT = 0.10         # fraction of the baseline transfer size
+MIN_GROWTH_BYTES = 20_000   # growth below this never fails, whatever the ratio
+TOP = 10
+
+COMPRESSED = frozenset([".html", ".js", ".mjs", ".css", ".json", ".svg", ".csv", ".txt", ".map"])
+IMAGES = frozenset([".png", ".jpg", ".jpeg", ".webp", ".gif", ".avif", ".ico"])
+
+# URLs inside HTML attributes, inline scripts and markdown props / links.
+_URL = re.compile(r"""(?:href|src|geoJsonUrl|url)\s*=\s*[{`'"]*([^'"`}\s>]+)|\]\(([^)\s]+)\)|import\(\s*["']([^"']+)["']""")
+# Relative imports between built JS chunks: from"./x.js", import("../y.js").
+_JS_IMPORT = re.compile(r"""(?:from\s*|import\s*\(?\s*)["'](\.{1,2}/[^"']+?\.js)["']""")
+_SQL_TABLE = re.compile(r"""(?i)\b(?:FROM|JOIN)\s+["']?(\w+)""")
+
+
+@dataclass
+class Asset:
+    path: str               # relative to the build directory
+    kind: str
+    raw: int
+    transfer: int
+    pages: int = 0          # pages that load it
+
+
+@dataclass
+class PageSize:
+    route: str
+    assets: list[str] = field(default_factory=list)
+    by_kind: dict[str, int] = field(default_factory=dict)     # kind → transfer bytes
+    raw: int = 0
+    transfer: int = 0
+    baseline: int | None = None
+
+    @property
+    def growth(self) -> int:
+        return self.transfer - self.baseline if self.baseline is not None else 0
+
+
+def kind_of(rel: str) -> str:
+    suffix = Path(rel).suffix.lower()
+    if suffix in (".js", ".mjs"):
+        return "js"
+    if suffix == ".css":
+        return "css"
+    if suffix == ".html":
+        return "html"
+    if suffix == ".geojson" or rel.endswith(".topojson"):
+        return "geojson"
+    if suffix in IMAGES or suffix == ".svg":
+        return "image"
+    if rel.startswith(("data/", "api/")) or suffix in (".parquet", ".arrow", ".json", ".csv"):
+        return "data"
+    return "other"
+
+
+def _base_path() -> str:
+    """deployment.basePath from evidence.config.yaml ("" when unset)."""
+    cfg = BASE / "evidence.config.yaml"
+    m = re.search(r"(?m)^\s+basePath:\s*['\"]?(/[^'\"\s#]*)", cfg.read_text(encoding="utf-8")) if cfg.exists() else None
+    return m.group(1).rstrip("/") if m else ""
+
+
+class Build:
+    """The build directory, with file sizes computed once per file."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.base_path = _base_path()
+        self.assets: dict[str, Asset] = {}
+        for p in sorted(root.rglob("*")):
+            if p.is_file():
+                rel = p.relative_to(root).as_posix()
+                raw = p.stat().st_size
+                data = p.read_bytes() if p.suffix.lower() in COMPRESSED else None
+                transfer = len(gzip.compress(data, 6)) if data is not None else raw
+                self.assets[rel] = Asset(rel, kind_of(rel), raw, transfer)
+
+    def resolve(self, url: str, from_dir: str) -> str | None:
+        """Build-relative path of a URL found in a file under from_dir, if it exists."""
+        parts = urlsplit(url)
+        if parts.scheme or parts.netloc or not parts.path:
+            return None
+        path = unquote(parts.path)
+        if path.startswith("/"):
+            if self.base_path and path.startswith(self.base_path + "/"):
+                path = path[len(self.base_path):]
+            rel = path.lstrip("/")
+        else:
+            rel = (Path(from_dir) / path).as_posix()
+        rel = _normalise(rel)
+        return rel if rel in self.assets else None
+
+    def routes(self) -> dict[str, str]:
+        """Route ("/", "/PCMC/City_Context") → its prerendered HTML file."""
+        out = {}
+        for rel in self.assets:
+            if not rel.endswith(".html") or rel.startswith(("_app/", "api/", "data/")):
+                continue
+            if rel == "index.html":
+                out["/"] = rel
+            elif rel.endswith("/index.html"):
+                out["/" + rel[: -len("/index.html")]] = rel
+            else:
+                out["/" + rel[: -len(".html")]] = rel
+        return out
+
+    def tables(self) -> dict[str, list[str]]:
+        """Source table (lower-case) → its data/<source>/<table>/ files."""
+        out: dict[str, list[str]] = {}
+        for rel in self.assets:
+            parts = rel.split("/")
+            if parts[0] == "data" and len(parts) >= 4:
+                out.setdefault(parts[2].lower(), []).append(rel)
+        return out
+
+
+def _normalise(rel: str) -> str:
+    out: list[str] = []
+    for part in rel.split("/"):
+        if part == "..":
+            if out:
+                out.pop()
+        elif part not in ("", "."):
+            out.append(part)
+    return "/".join(out)
+
+
+def _urls(text: str):
+    for m in _URL.finditer(text):
+        yield next(g for g in m.groups() if g)
+
+
+def _js_closure(build: Build, start: set[str]) -> set[str]:
+    """start plus every JS chunk reachable through relative imports."""
+    seen, todo = set(), [r for r in start if build.assets[r].kind == "js"]
+    while todo:
+        rel = todo.pop()
+        if rel in seen:
+            continue
+        seen.add(rel)
+        text = (build.root / rel).read_text(encoding="utf-8", errors="replace")
+        for spec in _JS_IMPORT.findall(text):
+            dep = build.resolve(spec, str(Path(rel).parent))
+            if dep and dep not in seen:
+                todo.append(dep)
+    return start | seen
+
+
+def _page_source(route: str) -> Path | None:
+    """The pages/ markdown file a route was rendered from."""
+    stem = route.strip("/")
+    candidates = [PAGES_DIR / f"{stem}.md"] if stem else []
+    candidates.append(PAGES_DIR / stem / "index.md")
+    return next((c for c in candidates if c.exists()), None)
+
+
+def page_assets(build: Build, route: str, html: str, tables: dict[str, list[str]]) -> set[str]:
+    page_dir = Path(html).parent.as_posix()
+    found = {html}
+    text = (build.root / html).read_text(encoding="utf-8", errors="replace")
+    for url in _urls(text):
+        rel = build.resolve(url, page_dir)
+        if rel and not rel.endswith(".html"):
+            found.add(rel)
+
+    src = _page_source(route)
+    if src is not None:
+        md = src.read_text(encoding="utf-8")
+        for url in _urls(md):
+            rel = build.resolve(url, page_dir)
+            if rel and build.assets[rel].kind in ("geojson", "image", "data"):
+                found.add(rel)
+        for _, sql in extract_sql_blocks(md):
+            for table in _SQL_TABLE.findall(sql):
+                found.update(tables.get(table.lower(), []))
+
+    # files prerendered into the route's own folder or api/<route>/ (not a child route's)
+    stem = route.strip("/")
+    for prefix in ([f"{stem}/", f"api/{stem}/"] if stem else ["api/"]):
+        for rel in build.assets:
+            if rel.startswith(prefix) and "/" not in rel[len(prefix):] and not rel.endswith(".html"):
+                found.add(rel)
+    return _js_closure(build, found)
+
+
+def audit(build_dir: Path = BUILD_DIR) -> tuple[list[PageSize], Build]:
+    build = Build(build_dir)
+    tables = build.tables()
+    pages = []
+    for route, html in sorted(build.routes().items()):
+        page = PageSize(route)
+        for rel in sorted(page_assets(build, route, html, tables)):
+            a = build.assets[rel]
+            a.pages += 1
+            page.assets.append(rel)
+            page.raw += a.raw
+            page.transfer += a.transfer
+            page.by_kind[a.kind] = page.by_kind.get(a.kind, 0) + a.transfer
+        pages.append(page)
+    return pages, build
+
+
+def load_baseline() -> dict[str, int]:
+    if not BASELINE_JSON.exists():
+        return {}
+    return json.loads(BASELINE_JSON.read_text(encoding="utf-8"))["pages"]
+
+
+def record(pages: list[PageSize]):
+    BASELINE_JSON.write_text(json.dumps({"pages": {p.route: p.transfer for p in pages}},
+                                        indent=1, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def over_limit(page: PageSize, limit: float = GROWTH_LIMIT) -> bool:
+    return (page.baseline is not None and page.growth >= MIN_GROWTH_BYTES
+            and page.growth > page.baseline * limit)
+
+
+def _kb(n: int) -> str:
+    return f"{n / 1024:,.1f} kB"
+
+
+def _arg(argv: list[str], flag: str) -> str:
+    return argv[argv.index(flag) + 1] if flag in argv and argv.index(flag) + 1 < len(argv) else ""
+
+
+def main():
+    argv = sys.argv
+    build_dir = Path(_arg(argv, "--build") or BUILD_DIR)
+    limit = float(_arg(argv, "--threshold") or GROWTH_LIMIT * 100) / 100
+    top = int(_arg(argv, "--top") or TOP)
+    if not build_dir.is_dir():
+        print(f"  {build_dir} not found — run `npm run build` first")
+        sys.exit(1)
+
+    t0 = time.perf_counter()
+    pages, build = audit(build_dir)
+    baseline = load_baseline()
+    for p in pages:
+        p.baseline = baseline.get(p.route)
+    elapsed = time.perf_counter() - t0
+
+    shared = [a for a in build.assets.values() if pages and a.pages == len(pages) and a.kind != "html"]
+    print(f"  {len(pages)} pages · {_kb(sum(a.raw for a in build.assets.values()))} on disk · "
+          f"shared by every page: {_kb(sum(a.transfer for a in shared))} in {len(shared)} file(s)\n")
+
+    print("  heaviest pages (transfer, first visit)")
+    for p in sorted(pages, key=lambda p: -p.transfer)[:top]:
+        kinds = "  ".join(f"{k} {_kb(v)}" for k, v in sorted(p.by_kind.items(), key=lambda kv: -kv[1]))
+        delta = ("new" if p.baseline is None
+                 else f"{'+' if p.growth >= 0 else '−'}{_kb(abs(p.growth))} vs. baseline")
+        print(f"    {_kb(p.transfer):>10}  {p.route}  ({_kb(p.raw)} raw · {delta})")
+        print(f"                {kinds}")
+
+    print("\n  heaviest assets (transfer)")
+    for a in sorted(build.assets.values(), key=lambda a: -a.transfer)[:top]:
+        print(f"    {_kb(a.transfer):>10}  {a.path}  ({a.kind}, {a.pages} page(s))")
+
+    failed = [p for p in pages if over_limit(p, limit)]
+    for p in failed:
+        print(f"\n  ✗ {p.route} grew {_kb(p.baseline or 0)} → {_kb(p.transfer)} "
+              f"(+{p.growth / (p.baseline or 1):.0%}, limit {limit:.0%})")
+    gone = sorted(set(baseline) - {p.route for p in pages})
+    if gone:
+        print(f"\n  no longer built: {', '.join(gone)}")
+    print(f"\n  {elapsed * 1000:.0f} ms")
+
+    out = _arg(argv, "--json")
+    if out:
+        Path(out).write_text(json.dumps({"pages": [asdict(p) for p in pages],
+                                         "assets": [asdict(a) for a in build.assets.values()]},
+                                        indent=1), encoding="utf-8")
+        print(f"  wrote {out}")
+    if "--record" in argv:
+        record(pages)
+        print(f"  wrote {BASELINE_JSON.name}")
+    elif failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+tools/coerce.py — Coerce the PMPML monthly tables to typed numbers once, at ingestion.
+
+Tabula output reaches extracted.csv, brt_extracted.csv and ebus_extracted.csv
+as text: "null" placeholders, Indian digit grouping ("1,23,456"), ₹ and %
+signs, stray spaces, and cells where two report lines were merged into one
+("9393\\n9703"). Every page wraps these columns in TRY_CAST(… AS DOUBLE), so
+the cleaning runs in the browser on each query and a cell that does not parse
+silently becomes NULL.
+
+This stage does the cleaning once. The non-key cells of a table are parsed in
+one pass: np.unique over the whole cell matrix, each distinct string parsed
+once (most tables have a few thousand distinct strings for tens of thousands
+of cells), and the results scattered back through the inverse index. A cell:
+
+  null       blank, "null", "NA", "nil" or a lone dash
+  number     after stripping ₹ / Rs. / %, surrounding whitespace and a
+             parenthesised negative; commas must form Indian or Western
+             thousands groups
+  failure    anything else, with a reason: "several values" (whitespace
+             between numbers, the merged-line case), "digit grouping" (commas
+             in the wrong places), "not a number"
+
+A column is numeric when at least NUMERIC_MAJORITY of its non-null cells parse
+(the tools/colstats.py rule); other columns are copied through as text. Rows
+that tabula shifted (tools/formulas.py SHIFTS — the Jan/Mar 2023 schedule
+columns) are realigned in the typed table; the source CSV keeps the extract.
+
+Output, all checked in under sources/CMP/ and loaded by Evidence:
+  <table>_typed.csv    same rows and header as the source; numeric cells
+                       written as plain numbers, nulls and failures blank, so
+                       DuckDB types the columns and pages read them without
+                       TRY_CAST
+  parse_failures.csv   one row per failed cell: table_name, row (1-based data
+                       row), Date, Depot, column_name, raw, reason, reviewed
+                       (true when KNOWN_DATA_ISSUES covers the cell)
+
+Run: python3 -m tools.coerce            — rewrite the typed tables and report
+     python3 -m tools.coerce --check    — exit 1 if any of them is stale
+
+lint.py fails as DATA_PARSE while an output differs from a fresh build, and
+warns as DATA_PARSE for each failed cell not yet in KNOWN_DATA_ISSUES.
+
+Requires numpy.
+"""
+
+import csv
+import io
+import re
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+
+from lint import PMPML_TABLES, SOURCES_DIR
+from tools.colstats import NUMERIC_MAJORITY
+from tools.cube import KEY_COLS, known_issue
+from tools.formulas import realign
+
+FAILURES_CSV = SOURCES_DIR / "parse_failures.csv"
+
+NULL_TOKENS = frozenset(["", "null", "none", "nan", "na", "n.a.", "nil", "-", "–", "—"])
+UNIT_MARKS = ("₹", "Rs.", "%")
+
+_NUMBER = re.compile(r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+_GROUPED = re.compile(r"[+-]?(?:\d{1,2}(?:,\d{2})*,\d{3}|\d{1,3}(?:,\d{3})+)(?:\.\d+)?")
+
+FAILURE_COLUMNS = ["table_name", "row", "Date", "Depot", "column_name", "raw", "reason", "reviewed"]
+
+
+@dataclass
+class ParseFailure:
+    table: str
+    row: int            # 1-based data row (header excluded)
+    date: str
+    depot: str
+    column: str
+    raw: str
+    reason: str
+    reviewed: bool
+
+
+@dataclass
+class Coerced:
+    table: str
+    header: list[str]
+    rows: list[list[str]]
+    numeric: list[str]
+    failures: list[ParseFailure]
+    realigned: list[int]        # 0-based data rows moved back by formulas.realign
+
+
+def typed_name(table: str) -> str:
+    return f"{table}_typed.csv"
+
+
+def parse_cell(raw: str) -> tuple[float | None, str]:
+    """(value, "") for a number, (None, "") for a null, (None, reason) on failure."""
+    s = raw.strip()
+    if s.lower() in NULL_TOKENS:
+        return None, ""
+    negative = s.startswith("(") and s.endswith(")")
+    if negative:
+        s = s[1:-1]
+    for mark in UNIT_MARKS:
+        s = s.replace(mark, "")
+    s = s.strip()
+    parts = s.split()
+    if len(parts) > 1:
+        numbers = all(_NUMBER.fullmatch(p.replace(",", "")) for p in parts)
+        return None, "several values" if numbers else "not a number"
+    if "," in s:
+        if not _GROUPED.fullmatch(s):
+            return None, "digit grouping"
+        s = s.replace(",", "")
+    if not _NUMBER.fullmatch(s):
+        return None, "not a number"
+    value = float(s)
+    return (-value if negative else value), ""
+
+
+def _num_text(v: float) -> str:
+    return str(int(v)) if v.is_integer() else repr(v)
+
+
+def coerce_table(table: str) -> Coerced | None:
+    """Parse every non-key cell of sources/CMP/<table>.csv; None if the file is missing."""
+    path = SOURCES_DIR / f"{table}.csv"
+    if not path.exists():
+        return None
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        source = [r for r in reader if r]
+
+    width = len(header)
+    data_idx = [i for i, h in enumerate(header) if h not in KEY_COLS]
+    cells = np.array([[r[i] if i < len(r) else "" for i in data_idx] for r in source],
+                     dtype=str).reshape(len(source), len(data_idx))
+
+    # one parse per distinct string, scattered back over the matrix
+    uniq, inverse = np.unique(cells, return_inverse=True)
+    parsed = [parse_cell(u) for u in uniq.tolist()]
+    values = np.array([np.nan if v is None else v for v, _ in parsed])[inverse].reshape(cells.shape)
+    failed = np.array([bool(r) for _, r in parsed], dtype=bool)[inverse].reshape(cells.shape)
+    reasons = [r for _, r in parsed]
+    texts = np.array(["" if v is None else _num_text(v) for v, _ in parsed],
+                     dtype=object)[inverse].reshape(cells.shape)
+
+    ok = ~np.isnan(values)
+    numeric = ok.any(axis=0) & (ok.sum(axis=0) >= NUMERIC_MAJORITY * (ok | failed).sum(axis=0))
+
+    i_date, i_depot = header.index("Date"), header.index("Depot")
+    realigned = realign(table, [header[i] for i in data_idx], values,
+                        [r[i_date] for r in source], [r[i_depot] for r in source])
+    for r in realigned:
+        texts[r] = ["" if np.isnan(v) else _num_text(float(v)) for v in values[r]]
+    out = np.where(numeric[None, :], texts, cells.astype(object))
+
+    rows = []
+    for r, src in enumerate(source):
+        row = list(src[:width]) + [""] * (width - len(src))
+        for j, i in enumerate(data_idx):
+            row[i] = out[r, j]
+        rows.append(row)
+
+    uniq_index = inverse.reshape(cells.shape)
+    failures = []
+    for r, j in np.argwhere(failed & numeric[None, :]):
+        date, depot, column = source[r][i_date], source[r][i_depot].strip(), header[data_idx[j]]
+        failures.append(ParseFailure(
+            table, int(r) + 1, date, depot, column, str(cells[r, j]),
+            reasons[uniq_index[r, j]], known_issue(path.name, date, depot, column)))
+
+    return Coerced(table, header, rows, [header[data_idx[j]] for j in np.flatnonzero(numeric)],
+                   failures, realigned)
+
+
+def coerce_all() -> dict[str, Coerced]:
+    """Coerce every PMPML monthly table that exists."""
+    out = {}
+    for t in PMPML_TABLES:
+        c = coerce_table(t)
+        if c is not None:
+            out[t] = c
+    return out
+
+
+def failures(coerced: dict[str, Coerced] | None = None) -> list[ParseFailure]:
+    coerced = coerce_all() if coerced is None else coerced
+    return [f for c in coerced.values() for f in c.failures]
+
+
+def _csv_text(header: list[str], rows: list[list]) -> str:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(header)
+    writer.writerows(rows)
+    return buf.getvalue()
+
+
+def render(coerced: dict[str, Coerced] | None = None) -> dict[str, str]:
+    """File name → CSV text for every typed table and the failure report."""
+    coerced = coerce_all() if coerced is None else coerced
+    out = {typed_name(t): _csv_text(c.header, c.rows) for t, c in coerced.items()}
+    out[FAILURES_CSV.name] = _csv_text(FAILURE_COLUMNS, [
+        [f.table, f.row, f.date, f.depot, f.column, f.raw, f.reason, str(f.reviewed).lower()]
+        for c in coerced.values() for f in c.failures])
+    return out
+
+
+def stale_files(coerced: dict[str, Coerced] | None = None) -> list[str]:
+    """Output CSVs that are missing or differ from a fresh build ([] if current)."""
+    if not any((SOURCES_DIR / f"{t}.csv").exists() for t in PMPML_TABLES):
+        return []
+    return [name for name, text in render(coerced).items()
+            if not (SOURCES_DIR / name).exists()
+            or (SOURCES_DIR / name).read_text(encoding="utf-8") != text]
+
+
+def main():
+    if "--check" in sys.argv:
+        stale = stale_files()
+        for name in stale:
+            print(f"  stale: {name}")
+        if stale:
+            print("  run `npm run coerce`")
+            sys.exit(1)
+        print("  typed tables are up to date")
+        return
+    coerced = coerce_all()
+    for name, text in render(coerced).items():
+        (SOURCES_DIR / name).write_text(text, encoding="utf-8")
+    for t, c in coerced.items():
+        reviewed = sum(f.reviewed for f in c.failures)
+        print(f"  wrote {typed_name(t)} · {len(c.rows)} rows · {len(c.numeric)} numeric columns · "
+              f"{len(c.failures)} failed cell(s), {reviewed} reviewed · {len(c.realigned)} row(s) realigned")
+    print(f"  wrote {FAILURES_CSV.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+tools/colshift.py — Detect tabula column shifts in a month of extracted.csv.
+
+Two of the worst KNOWN_DATA_ISSUES were column misalignments: Feb 2023's
+earnings block moved over by one column, and Apr 2023's all-traffic EPK sat
+in the ticket-only EPK column. A shifted cell is usually a perfectly plausible
+number, just the plausible number for a *neighbouring* column, so per-cell
+outlier scores (tools/anomalies.py) see one odd cell per depot, not a shift.
+This module asks the column-level question directly.
+
+Method — on the depot × month × column cube (tools/cube.py), header order:
+  1. Fingerprint every column from the reference months (every other non-gap
+     month) per depot, as the median and MAD of two features:
+       magnitude  log10(1 + |v|)
+       sibling    log10(1 + |v_c|) − log10(1 + |v_c-1|), the ratio to the
+                  column on its left, which a shifted block carries along
+  2. For the tested month, score the hypothesis "column c holds the data of
+     column c+k" for every offset k in ±MAX_OFFSET at once: the robust z of
+     the observed features against column c+k's fingerprint, combined and
+     medianed over depots. This is one (offsets × depots × columns) array.
+  3. A column is misaligned when it fits its own fingerprint badly
+     (score at k=0 > MISFIT) while some k ≠ 0 fits well (score < FIT and below
+     IMPROVEMENT × the k=0 score). Adjacent columns with the same offset are
+     reported as one shifted block, grown over neighbours that the same
+     offset explains at least as well as their own fingerprint.
+
+A shift between two columns that always hold near-identical values (own vs.
+own+PPP when there is no PPP fleet) is invisible by construction, and does no
+harm either.
+
+Run: python3 -m tools.colshift             — latest month of each PMPML table
+     python3 -m tools.colshift --all       — every month, each tested against
+                                             all the others
+
+lint.py runs the latest-month check as DATA_SHIFT, so each ingestion is tested
+before its numbers reach a page. A block is suppressed once KNOWN_DATA_ISSUES
+covers every column in it.
+
+Requires numpy.
+"""
+
+import sys
+import time
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+
+from tools.cube import Cube, known_issue, load_cubes, month_label
+
+MAX_OFFSET = 2          # columns either way
+MISFIT = 6.0            # k=0 score above which a column no longer looks like itself
+FIT = 2.0               # shifted score below which the shifted column matches
+IMPROVEMENT = 0.35      # …and that is at most this fraction of the k=0 score
+MIN_DEPOTS = 4          # depots with values needed to score a column
+MAD_FLOOR = 0.05        # log10 units (≈12%) — flat series don't make everything a misfit
+
+
+@dataclass
+class Shift:
+    table: str
+    month: str
+    first_column: str
+    last_column: str
+    columns: int        # width of the shifted block
+    offset: int         # block holds the data of the column `offset` places to its right (< 0: left)
+    misfit: float       # median k=0 score over the block
+    fit: float          # median score at the suspected offset
+
+
+def features(values: np.ndarray) -> np.ndarray:
+    """(2, depots, months, columns): magnitude and left-sibling ratio features."""
+    mag = np.log10(1 + np.abs(values))
+    sib = np.full_like(mag, np.nan)
+    sib[..., 1:] = mag[..., 1:] - mag[..., :-1]
+    return np.stack([mag, sib])
+
+
+def _shifted(a: np.ndarray, k: int) -> np.ndarray:
+    """a[..., c + k] at position c, NaN where c + k falls off the column axis."""
+    out = np.full_like(a, np.nan)
+    if k >= 0:
+        out[..., : a.shape[-1] - k] = a[..., k:]
+    else:
+        out[..., -k:] = a[..., :k]
+    return out
+
+
+def offset_scores(feats: np.ndarray, test: int, reference: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Score month `test` against every column offset.
+
+    feats is (2, depots, months, columns); reference is a boolean month mask.
+    Returns (scores, offsets): scores[i, c] is the median over depots of the
+    combined z for "column c holds column c + offsets[i]".
+    """
+    ref = feats[:, :, reference, :]
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)             # all-NaN slices
+        med = np.nanmedian(ref, axis=2)                                  # (2, depots, columns)
+        mad = np.nanmedian(np.abs(ref - med[:, :, None, :]), axis=2)
+    scale = np.maximum(1.4826 * np.nan_to_num(mad), MAD_FLOOR)
+    obs = feats[:, :, test, :]                                           # (2, depots, columns)
+
+    offsets = np.arange(-MAX_OFFSET, MAX_OFFSET + 1)
+    med_k = np.stack([_shifted(med, int(k)) for k in offsets])           # (K, 2, depots, columns)
+    scale_k = np.stack([_shifted(scale, int(k)) for k in offsets])
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)             # all-NaN slices
+        z = np.nanmean(np.abs(obs[None] - med_k) / scale_k, axis=1)     # (K, depots, columns)
+        n = np.sum(~np.isnan(z), axis=1)
+        scores = np.nanmedian(z, axis=1)                                 # (K, columns)
+    scores[n < MIN_DEPOTS] = np.nan
+    return scores, offsets
+
+
+def detect_month(cube: Cube, feats: np.ndarray, m: int, usable: np.ndarray) -> list[Shift]:
+    reference = usable.copy()
+    reference[m] = False
+    if reference.sum() < 2:
+        return []
+    scores, offsets = offset_scores(feats, m, reference)
+    zero = int(np.flatnonzero(offsets == 0)[0])
+    own = scores[zero]
+    other = scores.copy()
+    other[zero] = np.inf
+    other = np.where(np.isnan(other), np.inf, other)
+    best = np.argmin(other, axis=0)
+    best_score = other[best, np.arange(len(cube.columns))]
+    with np.errstate(invalid="ignore"):
+        hit = (own > MISFIT) & (best_score < FIT) & (best_score < IMPROVEMENT * own)
+
+    # Grow each hit into its block: neighbours that the same offset explains
+    # at least as well as their own fingerprint belong to it, even if they are
+    # too similar to their neighbour to misfit on their own.
+    n_cols = len(cube.columns)
+    found, c = [], 0
+    while c < n_cols:
+        if not hit[c]:
+            c += 1
+            continue
+        i = int(best[c])
+        start = end = c
+
+        def explained(j):
+            return 0 <= j < n_cols and scores[i, j] < FIT and scores[i, j] <= np.nan_to_num(own[j], nan=np.inf)
+        while explained(start - 1):
+            start -= 1
+        while explained(end + 1) or (end + 1 < n_cols and hit[end + 1] and best[end + 1] == i):
+            end += 1
+        block = slice(start, end + 1)
+        found.append(Shift(cube.table, month_label(cube.months[m]), cube.columns[start],
+                           cube.columns[end], end - start + 1, int(offsets[i]),
+                           float(np.nanmedian(own[block])), float(np.nanmedian(scores[i, block]))))
+        c = end + 1
+    return found
+
+
+def detect(cube: Cube, latest_only: bool = True) -> list[Shift]:
+    """Shifted column blocks in the latest month (or every month) of cube."""
+    keep = cube.depot_mask()
+    values = cube.values[keep].copy()
+    values[~cube.present[keep]] = np.nan
+    feats = features(values)
+    usable = cube.present[keep].any(axis=0) & ~cube.gap
+    months = np.flatnonzero(usable)
+    if latest_only:
+        months = months[-1:]
+    found = []
+    for m in months:
+        found.extend(detect_month(cube, feats, int(m), usable))
+    file = cube.path.name
+    return [s for s in found if not _suppressed(cube, file, s)]
+
+
+def _suppressed(cube: Cube, file: str, s: Shift) -> bool:
+    i, j = cube.columns.index(s.first_column), cube.columns.index(s.last_column)
+    return all(known_issue(file, s.month, "*", col) for col in cube.columns[i:j + 1])
+
+
+def detect_all(latest_only: bool = True) -> list[Shift]:
+    found = []
+    for cube in load_cubes().values():
+        found.extend(detect(cube, latest_only))
+    return found
+
+
+def describe(s: Shift) -> str:
+    cols = f'"{s.first_column}"' if s.columns == 1 else f'"{s.first_column}" … "{s.last_column}" ({s.columns} columns)'
+    side = "right" if s.offset > 0 else "left"
+    return (f"{cols} look like the column{'s' if s.columns > 1 else ''} {abs(s.offset)} place(s) to the "
+            f"{side} (fit {s.fit:.1f} vs. own {s.misfit:.1f})")
+
+
+def main():
+    latest = "--all" not in sys.argv
+    t0 = time.perf_counter()
+    found = detect_all(latest_only=latest)
+    elapsed = time.perf_counter() - t0
+    for s in sorted(found, key=lambda s: (s.table, s.month)):
+        print(f"  {s.table} · {s.month} · {describe(s)}")
+    print(f"\n  {len(found)} suspected shift(s) · {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
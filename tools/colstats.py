@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+tools/colstats.py — Per-column statistics catalog for every sources/CMP CSV.
+
+Writes sources/CMP/column_stats.csv, one row per (table, column):
+
+    table_name, column_name
+    position                  header order, 0-based
+    inferred_type             integer | double | month | date | boolean | text | empty
+    row_count, null_count     nulls are blank cells and literal "null"
+    parse_failures            non-null cells of a numeric / month / date column that
+                              do not parse as that type: what TRY_CAST silently turns
+                              into NULL ("0\\n0", "1,23,456", "12%", …)
+    failure_samples           up to SAMPLE_FAILURES of those cells, " | "-separated
+    min_value, max_value,     over the non-null parsed values (months chronologically)
+    distinct_count
+    first_month, last_month,  for tables keyed on a "%b %Y" Date column: the months
+    month_count               in which the column has a value, and how many
+    sha256                    of the source file the row was computed from
+
+A column is numeric when at least NUMERIC_MAJORITY of its non-null cells parse
+as numbers; the rest count as parse failures.
+
+Stats are rebuilt only for files whose SHA-256 differs from the one stored in
+the catalog; the rest are copied over. Like calendar.csv, the catalog is checked
+in, so Evidence loads it as the `column_stats` table and pages can query it:
+
+    SELECT SUM(null_count + parse_failures) AS unusable_cells
+    FROM column_stats WHERE table_name = 'extracted'
+
+lint.py reads the header order (SQL_UNKNOWN_COLUMN) and Date parse failures
+(DATA_DATE_FMT) from here, and fails as DATA_STATS while the catalog is stale.
+
+Run: python3 -m tools.colstats            — refresh column_stats.csv
+     python3 -m tools.colstats --check    — exit 1 if column_stats.csv is stale
+
+Standard library only.
+"""
+
+import csv
+import datetime
+import hashlib
+import io
+import sys
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+
+from lint import SOURCES_DIR
+from tools.fiscal import parse_month
+
+CATALOG_CSV = SOURCES_DIR / "column_stats.csv"
+NUMERIC_MAJORITY = 0.5
+SAMPLE_FAILURES = 3
+NULL_TOKENS = frozenset(["", "null"])
+
+
+@dataclass
+class ColumnStats:
+    table_name: str
+    column_name: str
+    position: int
+    inferred_type: str
+    row_count: int
+    null_count: int
+    parse_failures: int
+    failure_samples: str
+    min_value: str
+    max_value: str
+    distinct_count: int
+    first_month: str
+    last_month: str
+    month_count: int
+    sha256: str
+
+
+COLUMNS = [f.name for f in fields(ColumnStats)]
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _iso_date(s: str) -> datetime.date | None:
+    try:
+        return datetime.date.fromisoformat(s)
+    except ValueError:
+        return None
+
+
+def _number(s: str) -> float | None:
+    try:
+        return float(s)
+    except ValueError:
+        return None
+
+
+def _num_text(v: float) -> str:
+    return str(int(v)) if v.is_integer() else repr(v)
+
+
+def _infer(values: list[str]) -> tuple[str, list, list[str]]:
+    """Return (type, parsed values, cells that failed to parse as that type)."""
+    if not values:
+        return "empty", [], []
+    if {v.lower() for v in values} <= {"true", "false"}:
+        return "boolean", [v.lower() == "true" for v in values], []
+    for kind, parse in (("month", parse_month), ("date", _iso_date)):
+        parsed = [parse(v) for v in values]
+        ok = [p for p in parsed if p is not None]
+        if len(ok) >= len(values) * NUMERIC_MAJORITY and ok:
+            return kind, ok, [v for v, p in zip(values, parsed) if p is None]
+    parsed_n = [_number(v) for v in values]
+    ok_n = [p for p in parsed_n if p is not None]
+    if ok_n and len(ok_n) >= len(values) * NUMERIC_MAJORITY:
+        kind = "integer" if all(p.is_integer() for p in ok_n) else "double"
+        return kind, ok_n, [v for v, p in zip(values, parsed_n) if p is None]
+    return "text", values, []
+
+
+def table_stats(path: Path, sha256: str | None = None) -> list[ColumnStats]:
+    """Scan one CSV and return a ColumnStats per header column."""
+    sha256 = sha256 or file_sha256(path)
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        rows = [r for r in reader if any(c.strip() for c in r)]
+
+    i_date = header.index("Date") if "Date" in header else None
+    row_months = [parse_month(r[i_date].strip()) if i_date is not None and i_date < len(r) else None
+                  for r in rows]
+    keyed = any(m is not None for m in row_months)
+
+    out = []
+    for pos, col in enumerate(header):
+        cells = [r[pos].strip() if pos < len(r) else "" for r in rows]
+        values = [c for c in cells if c.lower() not in NULL_TOKENS]
+        kind, parsed, failures = _infer(values)
+
+        lo = hi = ""
+        if parsed:
+            lo_v, hi_v = min(parsed), max(parsed)
+            if kind in ("integer", "double"):
+                lo, hi = _num_text(lo_v), _num_text(hi_v)
+            elif kind == "month":
+                lo, hi = lo_v.strftime("%b %Y"), hi_v.strftime("%b %Y")
+            else:
+                lo, hi = str(lo_v), str(hi_v)
+
+        first = last = ""
+        n_months = 0
+        if keyed:
+            covered = sorted({m for m, c in zip(row_months, cells)
+                              if m is not None and c.lower() not in NULL_TOKENS})
+            if covered:
+                first, last = covered[0].strftime("%b %Y"), covered[-1].strftime("%b %Y")
+            n_months = len(covered)
+
+        out.append(ColumnStats(
+            table_name=path.stem, column_name=col, position=pos, inferred_type=kind,
+            row_count=len(rows), null_count=len(cells) - len(values),
+            parse_failures=len(failures),
+            failure_samples=" | ".join(repr(v)[1:-1] for v in list(dict.fromkeys(failures))[:SAMPLE_FAILURES]),
+            min_value=lo, max_value=hi, distinct_count=len(set(values)),
+            first_month=first, last_month=last, month_count=n_months, sha256=sha256,
+        ))
+    return out
+
+
+def _from_row(r: dict[str, str]) -> ColumnStats:
+    """ColumnStats from one column_stats.csv row."""
+    return ColumnStats(
+        table_name=r["table_name"], column_name=r["column_name"], position=int(r["position"]),
+        inferred_type=r["inferred_type"], row_count=int(r["row_count"]),
+        null_count=int(r["null_count"]), parse_failures=int(r["parse_failures"]),
+        failure_samples=r["failure_samples"], min_value=r["min_value"], max_value=r["max_value"],
+        distinct_count=int(r["distinct_count"]), first_month=r["first_month"],
+        last_month=r["last_month"], month_count=int(r["month_count"]), sha256=r["sha256"],
+    )
+
+
+def source_files() -> list[Path]:
+    return [p for p in sorted(SOURCES_DIR.glob("*.csv")) if p != CATALOG_CSV]
+
+
+def load() -> dict[str, list[ColumnStats]]:
+    """The stored catalog, grouped by table ({} if it does not exist yet)."""
+    if not CATALOG_CSV.exists():
+        return {}
+    out: dict[str, list[ColumnStats]] = {}
+    with open(CATALOG_CSV, newline="", encoding="utf-8") as f:
+        for r in csv.DictReader(f):
+            stats = _from_row(r)
+            out.setdefault(stats.table_name, []).append(stats)
+    return out
+
+
+def build(stored: dict[str, list[ColumnStats]] | None = None,
+          ) -> tuple[dict[str, list[ColumnStats]], list[str]]:
+    """Return (catalog for every source CSV, tables whose stats were recomputed).
+
+    Stored stats are reused for every file whose SHA-256 still matches.
+    """
+    stored = load() if stored is None else stored
+    catalog, rebuilt = {}, []
+    for path in source_files():
+        sha = file_sha256(path)
+        old = stored.get(path.stem)
+        if old and old[0].sha256 == sha:
+            catalog[path.stem] = old
+        else:
+            catalog[path.stem] = table_stats(path, sha)
+            rebuilt.append(path.stem)
+    return catalog, rebuilt
+
+
+def render(catalog: dict[str, list[ColumnStats]]) -> str:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=COLUMNS, lineterminator="\n")
+    writer.writeheader()
+    for table in sorted(catalog):
+        writer.writerows(asdict(s) for s in catalog[table])
+    return buf.getvalue()
+
+
+def stale_tables(stored: dict[str, list[ColumnStats]] | None = None) -> list[str]:
+    """Tables whose stored stats are missing, outdated or have no source file any more."""
+    stored = load() if stored is None else stored
+    files = {p.stem: p for p in source_files()}
+    stale = [t for t, p in files.items() if not stored.get(t) or stored[t][0].sha256 != file_sha256(p)]
+    return stale + sorted(set(stored) - set(files))
+
+
+def main():
+    if "--check" in sys.argv:
+        stale = stale_tables()
+        if stale:
+            print(f"  stale: {CATALOG_CSV.name} ({', '.join(stale)}) — run `npm run colstats`")
+            sys.exit(1)
+        print(f"  {CATALOG_CSV.name} is up to date")
+        return
+    catalog, rebuilt = build()
+    CATALOG_CSV.write_text(render(catalog), encoding="utf-8")
+    n = sum(len(v) for v in catalog.values())
+    print(f"  wrote {CATALOG_CSV.name} · {len(catalog)} tables, {n} columns"
+          f" · rescanned {', '.join(rebuilt) if rebuilt else 'nothing'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+tools/crosscheck.py — Compare measures that appear in more than one PMPML table.
+
+extracted.csv is the full depot-wise report; brt_extracted.csv and
+ebus_extracted.csv are the BRT and e-bus reports for the same depots and
+months. Where they describe the same quantity they must agree:
+
+  EQUAL    the same measure in two tables, within EQUAL_TOLERANCE
+           e-bus effective km = Total Eff.km E-Bus (Own) + Hired Vehicles Eff. KMs - E
+  BOUND    a BRT or e-bus figure is a subset of the depot's whole operation, so it
+           cannot exceed the extracted.csv total by more than BOUND_TOLERANCE
+           (BRT km ≤ depot km, e-buses on road ≤ depot buses on road, …)
+  PRESENCE a depot with a BRT or e-bus row must have an extracted.csv row for the
+           same month (BRT_ONLY_DEPOTS and KNOWN_GAPS months excepted)
+
+Each secondary table is hash-joined onto extracted.csv by (Date, canonical
+Depot) once, and every comparison for every month runs on the joined arrays.
+
+Ticket earnings are deliberately not compared: ebus_extracted's
+ticket_sale_earning exceeds extracted's Passenger Earning (Sale of Ticket) for
+Baner in most months, so the two reports count ticket revenue differently.
+
+Run: python3 -m tools.crosscheck
+
+lint.py reports each disagreement as DATA_CROSS unless KNOWN_DATA_ISSUES
+covers the cell on either side.
+
+Requires numpy.
+"""
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from lint import BRT_ONLY_DEPOTS
+from tools.cube import Cube, SYSTEM_TOTAL, known_issue, load_cubes, month_label
+
+EQUAL_TOLERANCE = 0.01      # 1% — the reports are typed up separately
+BOUND_TOLERANCE = 0.05      # 5% — BRT ticket revenue at BRT-heavy depots sits close to the depot total
+ABS_TOLERANCE = 1.0
+
+_PAX_TRAFFIC = ("Avg. Passenger per day on Traffic (including Ticket Sales, Commuters Passes, "
+                "Student Passes, Monthly Passes & Casual Contract, Luxury Service, Mobile App etc.)")
+
+# (secondary table, secondary column, extracted.csv columns summed blank-as-zero)
+EQUAL_CHECKS = [
+    ("ebus_extracted", "effective_km", ("Total Eff.km E-Bus (Own)", "Hired Vehicles Eff. KMs - E")),
+]
+
+# (secondary table, secondary column, extracted.csv column it must not exceed)
+BOUND_CHECKS = [
+    ("brt_extracted", "effective_km", "Total Eff.Km (Own+Hire)"),
+    ("brt_extracted", "buses_held", "Total Vehicles Per Day"),
+    ("brt_extracted", "avg_on_road", "Total Avg.Veh- On Road Per Day"),
+    ("brt_extracted", "ticket_sale_earning", "Passenger Earning (Sale of Ticket)(₹)"),
+    ("brt_extracted", "all_traffic_earning", "All Traffic Earning (₹)"),
+    ("brt_extracted", "passengers_per_day", _PAX_TRAFFIC),
+    ("ebus_extracted", "buses_held", "Total Vehicles Per Day"),
+    ("ebus_extracted", "avg_on_road", "Total Avg.Veh- On Road Per Day"),
+    ("ebus_extracted", "all_traffic_earning", "All Traffic Earning (₹)"),
+]
+
+
+@dataclass
+class Disagreement:
+    table: str          # secondary table
+    month: str
+    depot: str
+    column: str         # secondary column ("" for PRESENCE)
+    kind: str           # "equal" | "bound" | "presence"
+    value: float        # secondary table value
+    reference: float    # extracted.csv value
+    reference_column: str
+
+
+def join(base: Cube, other: Cube) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Hash-join other's (month, depot) keys onto base's axes.
+
+    Returns (values, present, matched) shaped like base's (depots, months[, cols]):
+    other's values at base positions, whether other has a row there, and whether
+    base has a row for every row of other (False marks rows with no partner).
+    """
+    d_pos = {d: i for i, d in enumerate(base.depots)}
+    m_pos = {m: i for i, m in enumerate(base.months)}
+    values = np.full((len(base.depots), len(base.months), len(other.columns)), np.nan)
+    present = np.zeros((len(base.depots), len(base.months)), dtype=bool)
+    matched = np.ones(other.present.shape, dtype=bool)
+
+    od, om = np.nonzero(other.present)
+    for i, j in zip(od, om):
+        key_d, key_m = d_pos.get(other.depots[i]), m_pos.get(other.months[j])
+        if key_d is None or key_m is None or not base.present[key_d, key_m]:
+            matched[i, j] = False
+            continue
+        values[key_d, key_m] = other.values[i, j]
+        present[key_d, key_m] = True
+    return values, present, matched
+
+
+def _extracted_sum(base: Cube, columns: tuple[str, ...]) -> np.ndarray:
+    stacked = np.stack([base.col(c) for c in columns])
+    return np.where(np.all(np.isnan(stacked), axis=0), np.nan, np.nansum(stacked, axis=0))
+
+
+def crosscheck(cubes: dict[str, Cube]) -> list[Disagreement]:
+    """Join brt_extracted and ebus_extracted onto extracted and compare overlaps."""
+    base = cubes.get("extracted")
+    if base is None:
+        return []
+    found: list[Disagreement] = []
+    active = base.present & ~base.gap[None, :]
+
+    for table in ("brt_extracted", "ebus_extracted"):
+        other = cubes.get(table)
+        if other is None:
+            continue
+        values, present, matched = join(base, other)
+        col = {c: i for i, c in enumerate(other.columns)}
+        rows = present & active
+
+        checks = [(c, "equal", _extracted_sum(base, ref), " + ".join(ref), EQUAL_TOLERANCE)
+                  for t, c, ref in EQUAL_CHECKS if t == table]
+        checks += [(c, "bound", base.col(ref), ref, BOUND_TOLERANCE)
+                   for t, c, ref in BOUND_CHECKS if t == table and ref in base.columns]
+
+        for column, kind, reference, ref_label, rel in checks:
+            if column not in col:
+                continue
+            v = values[:, :, col[column]]
+            with np.errstate(invalid="ignore"):
+                tol = np.maximum(rel * np.abs(reference), ABS_TOLERANCE)
+                diff = np.abs(v - reference) if kind == "equal" else v - reference
+                bad = rows & (diff > tol)
+            for d, m in np.argwhere(bad):
+                found.append(Disagreement(table, month_label(base.months[m]), base.depots[d],
+                                          column, kind, float(v[d, m]), float(reference[d, m]),
+                                          ref_label))
+
+        base_gap = {m for m, g in zip(base.months, base.gap) if g}
+        for i, j in np.argwhere(~matched):
+            depot, month = other.depots[i], other.months[j]
+            if depot in BRT_ONLY_DEPOTS or depot == SYSTEM_TOTAL or month in base_gap:
+                continue
+            found.append(Disagreement(table, month_label(month), depot, "", "presence",
+                                      np.nan, np.nan, ""))
+
+    return [x for x in found if not _suppressed(x, cubes)]
+
+
+def _suppressed(x: Disagreement, cubes: dict[str, Cube]) -> bool:
+    if known_issue(cubes[x.table].path.name, x.month, x.depot, x.column or "*"):
+        return True
+    base_file = cubes["extracted"].path.name
+    return any(known_issue(base_file, x.month, x.depot, ref.strip())
+               for ref in x.reference_column.split(" + ") if ref)
+
+
+def main():
+    t0 = time.perf_counter()
+    found = crosscheck(load_cubes())
+    elapsed = time.perf_counter() - t0
+    for x in sorted(found, key=lambda x: (x.table, x.column, x.month, x.depot)):
+        if x.kind == "presence":
+            print(f"  {x.table} · {x.month} · {x.depot} — row has no extracted.csv partner")
+        else:
+            rel = "≠" if x.kind == "equal" else ">"
+            print(f"  {x.table} · {x.month} · {x.depot} — {x.column} {x.value:,.2f} {rel} "
+                  f"extracted {x.reference_column} {x.reference:,.2f}")
+    print(f"\n  {len(found)} disagreement(s) · {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+tools/csvdiff.py — Row-level diff of the PMPML CSVs between two versions.
+
+Regenerating extracted.csv from the ODS consolidation rewrites 176-column
+rows, and a line diff shows little more than "every line changed". This stage
+keys every row on (Date, canonical Depot) and reports only what a reviewer
+needs to check:
+
+    + month  Jan 2026 (18 rows)              month present only in the new file
+    - month  Feb 2023 (17 rows)              month present only in the old file
+    + row    Dec 2025 · Upper Depot          row added to / removed from a month
+    ~ cell   Dec 2025 · Hadapsar · "Total Vehicles Per Day"  120 → 121
+      columns added / removed between the two headers
+
+Cells that only changed spelling of the same number ("1234" → "1234.0") are
+counted as reformatted instead of listed.
+
+Method — both versions are streamed through csv.reader, never loaded whole:
+  1. Old version: keep one BLAKE2b digest per row key (over the columns both
+     headers share, in a fixed order).
+  2. New version: hash each row the same way. Keys with no old digest are added;
+     keys whose digest differs keep their new cells (changes only).
+  3. Old version again: fetch the old cells of just the changed keys and compare
+     them cell by cell. Keys never seen in step 2 are removed.
+Memory is one digest per row plus the changed rows, so a full 2007–present
+history diffs the same way as today's files.
+
+Old versions are read with `git show <rev>:<path>`, the new one from another
+revision or the working tree. Both revisions are checked with `git rev-parse
+--verify` before anything is read, so a mistyped one exits 1 instead of
+reporting every month as added. Duplicate keys in one file are told apart by
+occurrence ("#2").
+
+Run: python3 -m tools.csvdiff                     — HEAD vs working tree, all PMPML tables
+     python3 -m tools.csvdiff HEAD~3               — HEAD~3 vs working tree
+     python3 -m tools.csvdiff v1 v2 --table extracted
+     python3 -m tools.csvdiff --json diff.json
+
+Standard library only.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import subprocess
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+from lint import BASE, DEPRECATED_DEPOT_NAMES, PMPML_TABLES, SOURCES_DIR
+
+WORKTREE = ""               # revision label for the checked-out files
+
+csv.field_size_limit(1 << 24)
+
+
+@dataclass
+class CellChange:
+    date: str
+    depot: str
+    column: str
+    old: str
+    new: str
+
+
+@dataclass
+class TableDiff:
+    table: str
+    old_rev: str
+    new_rev: str
+    added_months: dict[str, int] = field(default_factory=dict)      # month → rows
+    removed_months: dict[str, int] = field(default_factory=dict)
+    added_rows: list[tuple[str, str]] = field(default_factory=list)
+    removed_rows: list[tuple[str, str]] = field(default_factory=list)
+    changed: list[CellChange] = field(default_factory=list)
+    added_columns: list[str] = field(default_factory=list)
+    removed_columns: list[str] = field(default_factory=list)
+    reformatted: int = 0
+    rows_old: int = 0
+    rows_new: int = 0
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added_months or self.removed_months or self.added_rows
+                    or self.removed_rows or self.changed or self.added_columns
+                    or self.removed_columns)
+
+
+def verify_rev(rev: str) -> str | None:
+    """Return rev's commit id, or None if git cannot resolve it (WORKTREE passes)."""
+    if rev == WORKTREE:
+        return WORKTREE
+    proc = subprocess.run(["git", "-C", str(BASE), "rev-parse", "--verify", "--quiet",
+                           f"{rev}^{{commit}}"], capture_output=True, text=True)
+    return proc.stdout.strip() if proc.returncode == 0 else None
+
+
+@contextmanager
+def open_version(table: str, rev: str) -> Iterator[io.TextIOBase | None]:
+    """Stream sources/CMP/<table>.csv at rev (WORKTREE = checked-out file).
+
+    Yields None when the file does not exist at that revision; rev itself must
+    already have passed verify_rev().
+    """
+    path = SOURCES_DIR / f"{table}.csv"
+    if rev == WORKTREE:
+        if not path.exists():
+            yield None
+            return
+        with open(path, newline="", encoding="utf-8") as f:
+            yield f
+        return
+    spec = f"{rev}:{path.relative_to(BASE).as_posix()}"
+    probe = subprocess.run(["git", "-C", str(BASE), "cat-file", "-e", spec], capture_output=True)
+    if probe.returncode != 0:
+        yield None
+        return
+    proc = subprocess.Popen(["git", "-C", str(BASE), "show", spec], stdout=subprocess.PIPE)
+    assert proc.stdout is not None
+    try:
+        yield io.TextIOWrapper(proc.stdout, encoding="utf-8", newline="")
+    finally:
+        proc.stdout.close()
+        proc.wait()
+
+
+def read_header(table: str, rev: str) -> list[str]:
+    with open_version(table, rev) as f:
+        return next(csv.reader(f), []) if f is not None else []
+
+
+def _rows(table: str, rev: str) -> Iterator[tuple[tuple[str, str, int], list[str]]]:
+    """Yield ((date, canonical depot, occurrence), cells) for every data row."""
+    with open_version(table, rev) as f:
+        if f is None:
+            return
+        reader = csv.reader(f)
+        header = next(reader, [])
+        i_date, i_depot = header.index("Date"), header.index("Depot")
+        seen: dict[tuple[str, str], int] = {}
+        for cells in reader:
+            if not any(c.strip() for c in cells):
+                continue
+            cells += [""] * (len(header) - len(cells))
+            depot = cells[i_depot].strip()
+            key = (cells[i_date].strip(), DEPRECATED_DEPOT_NAMES.get(depot, depot))
+            seen[key] = seen.get(key, 0) + 1
+            yield (*key, seen[key]), cells
+
+
+def _digest(cells: list[str], positions: list[int]) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for i in positions:
+        h.update(cells[i].encode("utf-8"))
+        h.update(b"\x1f")
+    return h.digest()
+
+
+def _same_number(a: str, b: str) -> bool:
+    try:
+        return float(a.replace(",", "")) == float(b.replace(",", ""))
+    except ValueError:
+        return False
+
+
+def _label(key: tuple[str, str, int]) -> tuple[str, str]:
+    date, depot, n = key
+    return date, depot if n == 1 else f"{depot} #{n}"
+
+
+def diff_table(table: str, old_rev: str = "HEAD", new_rev: str = WORKTREE) -> TableDiff:
+    result = TableDiff(table, old_rev, new_rev or "working tree")
+    old_header, new_header = read_header(table, old_rev), read_header(table, new_rev)
+    common = [c for c in old_header if c in new_header]
+    if old_header and new_header:                  # a missing file is all rows, not all columns
+        result.added_columns = [c for c in new_header if c not in old_header]
+        result.removed_columns = [c for c in old_header if c not in new_header]
+    old_pos = [old_header.index(c) for c in common]
+    new_pos = [new_header.index(c) for c in common]
+
+    # 1. one digest per old row
+    old_digests: dict[tuple[str, str, int], bytes] = {}
+    for key, cells in _rows(table, old_rev):
+        old_digests[key] = _digest(cells, old_pos)
+    result.rows_old = len(old_digests)
+    old_months = {k[0] for k in old_digests}
+    new_months: set[str] = set()
+
+    # 2. stream the new rows; keep only changed ones
+    added: list[tuple[str, str, int]] = []
+    changed_new: dict[tuple[str, str, int], list[str]] = {}
+    for key, cells in _rows(table, new_rev):
+        result.rows_new += 1
+        new_months.add(key[0])
+        digest = old_digests.pop(key, None)
+        if digest is None:
+            added.append(key)
+        elif digest != _digest(cells, new_pos):
+            changed_new[key] = cells
+    removed = list(old_digests)                    # never matched in step 2
+
+    # 3. old cells for the changed keys only
+    if changed_new:
+        for key, cells in _rows(table, old_rev):
+            new_cells = changed_new.get(key)
+            if new_cells is None:
+                continue
+            date, depot = _label(key)
+            for col, i, j in zip(common, old_pos, new_pos):
+                a, b = cells[i], new_cells[j]
+                if a == b:
+                    continue
+                if _same_number(a, b):
+                    result.reformatted += 1
+                else:
+                    result.changed.append(CellChange(date, depot, col, a, b))
+
+    # a month absent from the other version is reported whole, not row by row
+    for keys, other, months, rows in ((added, old_months, result.added_months, result.added_rows),
+                                      (removed, new_months, result.removed_months, result.removed_rows)):
+        for key in keys:
+            if key[0] in other:
+                rows.append(_label(key))
+            else:
+                months[key[0]] = months.get(key[0], 0) + 1
+    return result
+
+
+def diff_all(old_rev: str = "HEAD", new_rev: str = WORKTREE,
+             tables: tuple[str, ...] = PMPML_TABLES) -> list[TableDiff]:
+    return [diff_table(t, old_rev, new_rev) for t in tables]
+
+
+def _print(d: TableDiff):
+    print(f"  {d.table}.csv  {d.old_rev} → {d.new_rev}  ·  {d.rows_old} → {d.rows_new} rows")
+    if d.empty:
+        print("      no changes" + (f" ({d.reformatted} reformatted cells)" if d.reformatted else ""))
+        return
+    for c in d.added_columns:
+        print(f"      + column \"{c}\"")
+    for c in d.removed_columns:
+        print(f"      - column \"{c}\"")
+    for m, n in d.added_months.items():
+        print(f"      + month  {m} ({n} rows)")
+    for m, n in d.removed_months.items():
+        print(f"      - month  {m} ({n} rows)")
+    for date, depot in d.added_rows:
+        print(f"      + row    {date} · {depot}")
+    for date, depot in d.removed_rows:
+        print(f"      - row    {date} · {depot}")
+    for cell in d.changed:
+        print(f"      ~ cell   {cell.date} · {cell.depot} · \"{cell.column}\"  {cell.old or '∅'} → {cell.new or '∅'}")
+    rows = len({(cell.date, cell.depot) for cell in d.changed})
+    print(f"      {len(d.changed)} cell(s) changed in {rows} row(s)"
+          + (f" · {d.reformatted} reformatted" if d.reformatted else ""))
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    flags = sys.argv[1:]
+    table = flags[flags.index("--table") + 1] if "--table" in flags else None
+    out = flags[flags.index("--json") + 1] if "--json" in flags else None
+    revs = [a for a in args if a not in (table, out)]
+    old_rev = revs[0] if revs else "HEAD"
+    new_rev = revs[1] if len(revs) > 1 else WORKTREE
+
+    bad = [r for r in (old_rev, new_rev) if verify_rev(r) is None]
+    for r in bad:
+        print(f"  unknown revision: {r}")
+    if bad:
+        sys.exit(1)
+
+    t0 = time.perf_counter()
+    diffs = diff_all(old_rev, new_rev, (table,) if table else PMPML_TABLES)
+    elapsed = time.perf_counter() - t0
+    for d in diffs:
+        _print(d)
+    print(f"\n  {elapsed * 1000:.0f} ms")
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump([asdict(d) for d in diffs], f, indent=1)
+        print(f"  wrote {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+tools/cube.py — Load PMPML monthly tables as depot × month × column arrays.
+
+extracted.csv, brt_extracted.csv and ebus_extracted.csv are all "one row per
+(Date, Depot)" tables with dozens of numeric columns. The data checks in tools/
+need every column of every depot across every month at once, so this module
+pivots a table into a dense float64 cube:
+
+    cube.values[d, m, c]   depot d, month m, column c  (NaN = missing/unparseable)
+    cube.gap[m]            True where KNOWN_GAPS says the month was never retrieved
+
+The month axis is continuous from the first to the last month in the file, so
+gaps are real positions on the axis rather than silently skipped — rolling
+windows and month-over-month comparisons stay calendar-aligned.
+
+Depot names are canonicalised through DEPRECATED_DEPOT_NAMES. "System Total"
+rows are kept in the cube; use cube.depot_mask() to select depots only.
+
+Requires numpy.
+"""
+
+import csv
+import datetime
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from lint import DEPRECATED_DEPOT_NAMES, KNOWN_DATA_ISSUES, KNOWN_GAPS, PMPML_TABLES, SOURCES_DIR
+from tools.fiscal import parse_month
+
+KEY_COLS = ("Date", "Depot")
+SYSTEM_TOTAL = "System Total"
+
+
+def month_label(d: datetime.date) -> str:
+    return d.strftime("%b %Y")
+
+
+def month_range(first: datetime.date, last: datetime.date) -> list[datetime.date]:
+    """Every first-of-month from first to last inclusive."""
+    out = []
+    y, m = first.year, first.month
+    while (y, m) <= (last.year, last.month):
+        out.append(datetime.date(y, m, 1))
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return out
+
+
+def canonical_depot(name: str) -> str:
+    name = name.strip()
+    return DEPRECATED_DEPOT_NAMES.get(name, name)
+
+
+def to_float(v: str) -> float:
+    """Parse a plain numeric cell; anything else (blank, 'null', tabula debris) → NaN."""
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def gap_mask(table: str, months: list[datetime.date]) -> np.ndarray:
+    """Boolean mask over months marking KNOWN_GAPS entries for this table."""
+    mask = np.zeros(len(months), dtype=bool)
+    for label, start, end, _ in KNOWN_GAPS:
+        if label != table:
+            continue
+        s, e = parse_month(start), parse_month(end)
+        if s is None or e is None:
+            continue
+        for i, mo in enumerate(months):
+            if s <= mo <= e:
+                mask[i] = True
+    return mask
+
+
+@dataclass
+class Cube:
+    table: str
+    path: Path
+    depots: list[str]
+    months: list[datetime.date]
+    columns: list[str]
+    values: np.ndarray          # (depots, months, columns) float64
+    present: np.ndarray         # (depots, months) bool — a source row exists
+    gap: np.ndarray             # (months,) bool — KNOWN_GAPS month for this table
+
+    @property
+    def month_labels(self) -> list[str]:
+        return [month_label(m) for m in self.months]
+
+    def depot_mask(self) -> np.ndarray:
+        """Boolean mask over the depot axis excluding the System Total row."""
+        return np.array([d != SYSTEM_TOTAL for d in self.depots])
+
+    def col(self, name: str) -> np.ndarray:
+        """(depots, months) slice for one column."""
+        return self.values[:, :, self.columns.index(name)]
+
+
+def load_cube(table: str, path: Path | None = None) -> Cube | None:
+    """Pivot sources/CMP/<table>.csv (or path) into a Cube; None if the file is missing."""
+    path = path or SOURCES_DIR / f"{table}.csv"
+    if not path.exists():
+        return None
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = [r for r in reader if r]
+
+    i_date, i_depot = header.index("Date"), header.index("Depot")
+    col_idx = [i for i, h in enumerate(header) if h not in KEY_COLS]
+    columns = [header[i] for i in col_idx]
+
+    keyed = []
+    for r in rows:
+        mo = parse_month(r[i_date]) if len(r) > i_date else None
+        if mo is None:
+            continue
+        keyed.append((mo, canonical_depot(r[i_depot]), r))
+
+    if keyed:
+        months = month_range(min(k[0] for k in keyed), max(k[0] for k in keyed))
+    else:
+        months = []
+    depots = sorted({k[1] for k in keyed}, key=lambda d: (d == SYSTEM_TOTAL, d))
+    d_pos = {d: i for i, d in enumerate(depots)}
+    m_pos = {m: i for i, m in enumerate(months)}
+
+    values = np.full((len(depots), len(months), len(columns)), np.nan)
+    present = np.zeros((len(depots), len(months)), dtype=bool)
+    for mo, depot, r in keyed:
+        di, mi = d_pos[depot], m_pos[mo]
+        present[di, mi] = True
+        values[di, mi] = [to_float(r[i]) if i < len(r) else np.nan for i in col_idx]
+
+    return Cube(table, path, depots, months, columns, values, present, gap_mask(table, months))
+
+
+def load_cubes() -> dict[str, Cube]:
+    """Load every PMPML monthly table that exists."""
+    cubes = {}
+    for t in PMPML_TABLES:
+        c = load_cube(t)
+        if c is not None:
+            cubes[t] = c
+    return cubes
+
+
+def known_issue(file: str, date: str, depot: str, column: str) -> bool:
+    """True if KNOWN_DATA_ISSUES covers this cell (exact or '*' wildcards)."""
+    for d in (date, "*"):
+        for dp in (depot, "*"):
+            for c in (column, "*"):
+                if (file, d, dp, c) in KNOWN_DATA_ISSUES:
+                    return True
+    return False
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+tools/fiscal.py — Generate the calendar dimension table sources/CMP/calendar.csv.
+
+Every PMPML query keys on the Date string ("Jan 2023") and re-derives what it
+needs from it with STRPTIME(Date, '%b %Y'); FY bucketing and days-in-month
+math would have to be re-derived the same way. This stage writes one row per
+month covered by any PMPML table, so pages can join on Date instead:
+
+    Date                 "Jan 2023" — same format as the PMPML tables' key
+    month_start          2023-01-01 (DuckDB infers DATE)
+    year, month
+    fy                   Indian fiscal year, April–March: "2022-23"
+    fy_quarter           "Q1" (Apr–Jun) … "Q4" (Jan–Mar)
+    fy_month             1 = April … 12 = March
+    days_in_month
+    gap_<table>          true where KNOWN_GAPS lists the month for that table
+    diesel_km_estimated  true from DIESEL_KM_ESTIMATED_FROM: the reports dropped
+                         the direct diesel-km column, and Depotwise.md derives
+                         it as KMPL × diesel consumption
+
+    SELECT c.month_start, c.fy, SUM(...) / c.days_in_month
+    FROM extracted e JOIN calendar c USING (Date)
+
+The file is checked in like any other source CSV. lint.py (DATA_CALENDAR)
+fails when it no longer matches what this script would write, e.g. after a
+new month is ingested or KNOWN_GAPS changes.
+
+Run: python3 -m tools.fiscal            — rewrite calendar.csv
+     python3 -m tools.fiscal --check    — exit 1 if calendar.csv is stale
+
+Standard library only.
+"""
+
+import calendar
+import csv
+import datetime
+import io
+import sys
+
+from lint import KNOWN_GAPS, PMPML_TABLES, SOURCES_DIR
+
+CALENDAR_CSV = SOURCES_DIR / "calendar.csv"
+DIESEL_KM_ESTIMATED_FROM = datetime.date(2024, 4, 1)
+
+COLUMNS = (["Date", "month_start", "year", "month", "fy", "fy_quarter", "fy_month", "days_in_month"]
+           + [f"gap_{t}" for t in PMPML_TABLES]
+           + ["diesel_km_estimated"])
+
+
+def parse_month(s: str) -> datetime.date | None:
+    """'Jan 2023' → date(2023, 1, 1); None for anything else. The one parser of
+    the PMPML Date format — tools/cube.py and tools/colstats.py import it."""
+    try:
+        return datetime.datetime.strptime(s.strip(), "%b %Y").date()
+    except ValueError:
+        return None
+
+
+def fiscal_year(d: datetime.date) -> str:
+    start = d.year if d.month >= 4 else d.year - 1
+    return f"{start}-{(start + 1) % 100:02d}"
+
+
+def source_months() -> list[datetime.date]:
+    """Every month from the earliest to the latest Date in any PMPML table."""
+    seen = set()
+    for t in PMPML_TABLES:
+        path = SOURCES_DIR / f"{t}.csv"
+        if not path.exists():
+            continue
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                mo = parse_month(row.get("Date") or "")
+                if mo is not None:
+                    seen.add(mo)
+    if not seen:
+        return []
+    out, (y, m) = [], (min(seen).year, min(seen).month)
+    last = max(seen)
+    while (y, m) <= (last.year, last.month):
+        out.append(datetime.date(y, m, 1))
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return out
+
+
+def gap_months(table: str) -> set[datetime.date]:
+    out = set()
+    for label, start, end, _ in KNOWN_GAPS:
+        s, e = parse_month(start), parse_month(end)
+        if label != table or s is None or e is None:
+            continue
+        y, m = s.year, s.month
+        while (y, m) <= (e.year, e.month):
+            out.add(datetime.date(y, m, 1))
+            y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return out
+
+
+def build_rows(months: list[datetime.date] | None = None,
+               gaps: dict[str, set[datetime.date]] | None = None) -> list[dict]:
+    """Calendar rows for months (default: source_months()) with per-table gap sets
+    (default: KNOWN_GAPS). tools/scaletest.py passes its synthetic months here."""
+    if gaps is None:
+        gaps = {t: gap_months(t) for t in PMPML_TABLES}
+    rows = []
+    for mo in source_months() if months is None else months:
+        fy_month = (mo.month - 4) % 12 + 1
+        row = {
+            "Date": mo.strftime("%b %Y"),
+            "month_start": mo.isoformat(),
+            "year": mo.year,
+            "month": mo.month,
+            "fy": fiscal_year(mo),
+            "fy_quarter": f"Q{(fy_month - 1) // 3 + 1}",
+            "fy_month": fy_month,
+            "days_in_month": calendar.monthrange(mo.year, mo.month)[1],
+        }
+        for t in PMPML_TABLES:
+            row[f"gap_{t}"] = str(mo in gaps.get(t, ())).lower()
+        row["diesel_km_estimated"] = str(mo >= DIESEL_KM_ESTIMATED_FROM).lower()
+        rows.append(row)
+    return rows
+
+
+def render() -> str:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=COLUMNS, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(build_rows())
+    return buf.getvalue()
+
+
+def is_stale() -> bool:
+    """True if calendar.csv is missing or differs from a fresh render."""
+    if not CALENDAR_CSV.exists():
+        return True
+    return CALENDAR_CSV.read_text(encoding="utf-8") != render()
+
+
+def main():
+    if "--check" in sys.argv:
+        if is_stale():
+            print(f"  stale: {CALENDAR_CSV.relative_to(SOURCES_DIR.parent.parent)} — run `npm run calendar`")
+            sys.exit(1)
+        print("  calendar.csv is up to date")
+        return
+    text = render()
+    CALENDAR_CSV.write_text(text, encoding="utf-8")
+    print(f"  wrote {CALENDAR_CSV.name} · {text.count(chr(10)) - 1} months")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+tools/formulas.py — Recompute derived PMPML columns from their raw inputs.
+
+Of the ~176 columns in extracted.csv only about a third are raw counts; the
+rest are totals, per-day averages and ratios the PMPML report derives from
+them (see Drafts/DepotWise/Raw vs Derivable.md). When tabula shifts a column,
+or a clerk swaps two cells, the derived column stops matching its formula.
+
+FORMULAS below is the declarative formula table — one entry per derivable
+column that the data actually supports (every formula here holds for the
+large majority of rows). Columns whose report formula uses a base the table
+does not carry are left out rather than guessed: % of Fleet Utilization, the
+KMPL/KMPG/KMPU fuel efficiencies and the breakdown rate (extracted), and the
+per-bus ratios of brt_extracted (its on-road count is not the one the report
+divides by). The engine
+evaluates all of them over the depot × month cube in one vectorized pass and
+reports:
+
+  deviations   cells where |reported − recomputed| exceeds tolerance
+  systematic   a (month, column) where ≥ SYSTEMATIC_MIN_DEPOTS depots (System
+               Total row not counted) deviate together — a column shift, not a typo
+  swaps        ORDER_CHECKS violations (e.g. schedules operated > sanctioned),
+               flagged systematic when several depots flip in the same month
+
+SHIFTS lists blocks that tabula shifts left by one slot when the report leaves
+the block's first cell out. That is the Jan/Mar 2023 "swap": those reports
+have no Schedules Total, so operated, hired and total schedules each sit one
+column early, up to the next empty slot. realign() moves them back and
+recomputes the missing cell; tools/coerce.py applies it to the typed tables
+the pages read, so page SQL uses the schedule columns as they are.
+
+Run: python3 -m tools.formulas            — full history, grouped report
+     python3 -m tools.formulas --latest   — latest month per table only
+
+lint.py runs the --latest variant as DATA_FORMULA.
+
+Requires numpy.
+"""
+
+import calendar
+import sys
+from collections import Counter
+import time
+from dataclasses import dataclass
+from typing import NamedTuple
+
+import numpy as np
+
+from tools.cube import SYSTEM_TOTAL, Cube, known_issue, load_cubes, month_label
+
+REL_TOLERANCE = 0.01        # 1% of the reported value…
+ABS_TOLERANCE = {           # …or this many units, whichever is larger
+    "sum": 1.0, "sum0": 1.0, "diff": 1.0, "per_day": 1.0, "ratio": 0.02,
+}
+SYSTEMATIC_MIN_DEPOTS = 4
+SWAP_MIN_GAP = 5            # ignore order violations smaller than this many units
+
+
+class Formula(NamedTuple):
+    target: str
+    op: str                 # sum | sum0 | diff | ratio | per_day
+    inputs: tuple[str, ...]
+    scale: float = 1.0
+
+
+# op semantics:
+#   sum      Σ inputs; any blank input → not checkable
+#   sum0     Σ inputs with blanks as zero (PMPML leaves zero counts empty)
+#   diff     inputs[0] − inputs[1]
+#   ratio    scale · inputs[0] / inputs[1]
+#   per_day  inputs[0] / days in month
+_ACC_P = tuple(f"No.of Accidents (PMPML) {s}" for s in
+               ("1. Fatal", "2. Major", "3. Minor", "4. Insignificants"))
+_ACC_H = tuple(f"No.of Accidents (HIRED) {s}" for s in
+               ("1. Fatal", "2. Major", "3. Minor", "4. Insignificants"))
+_PAX_TRAFFIC = ("Avg. Passenger per day on Traffic (including Ticket Sales, Commuters Passes, "
+                "Student Passes, Monthly Passes & Casual Contract, Luxury Service, Mobile App etc.)")
+
+FORMULAS: dict[str, list[Formula]] = {
+    "extracted": [
+        # Fleet held / on road / off road
+        Formula("Held Total PMPML (Own+PPP)", "sum",
+                ("Avg. Vehicles Held - Per Day PMPML", "Held PPP Vehicles per day")),
+        Formula("Total Vehicles Per Day", "sum",
+                ("Held Total PMPML (Own+PPP)", "Held Hire Vehicles Per Day")),
+        Formula("Held Total PMPML (Own+PPP) (alt)", "sum",
+                ("Avg.Vehicle Held Per Day PMPML", "Held PPP Vehicles per day (alt)")),
+        Formula("Held Total (PMPML+HIRE) Per Day", "sum",
+                ("Held Total PMPML (Own+PPP) (alt)", "Held Hire Vehicles Per Day (alt)")),
+        Formula("Avg. Spare Vehicles Per Day", "diff",
+                ("Avg.Available Veh. On Road (PMPML)", "Avg. Vehicles On Road- PMPML Per Day (OWN)")),
+        Formula("% of Spare Vehicles", "ratio",
+                ("Avg. Spare Vehicles Per Day", "Avg.Vehicle Held Per Day PMPML"), 100),
+        Formula("% of Workshop Vehicles", "ratio",
+                ("Avg.Workshop Vehicles Per Day", "Avg.Vehicle Held Per Day PMPML"), 100),
+        Formula("On Road Total (OWN+PPP)", "sum",
+                ("Avg. Vehicles On Road - PMPML Per Day", "On Road PPP Vehicles per day")),
+        Formula("Total Avg.Veh- On Road Per Day", "sum",
+                ("On Road Total (OWN+PPP)", "On Road Hire Vehicles Per Day")),
+        Formula("Off Road Total (OWN+PPP)", "sum",
+                ("Average Vehicles Off road - PMPML Per Day", "PPP Vehicles Off Road per day")),
+        Formula("Total Vehicles Off Road Per Day", "sum",
+                ("Off Road Total (OWN+PPP)", "Hire Vehicles Off Road Per Day")),
+        # Schedules
+        Formula("Schedules Total (PMPML+HIRE) Per Day", "sum",
+                ("No.of Schedules Sanctioned Per Day (PMPML + PPP)", "Hired")),
+        Formula("Total Per Day (PMPML+HIRED)", "sum",
+                ("Average No.of Schedule operated Per Day (PMPML+PPP)", "Hired Vehicles Per Day")),
+        # Effective / dead / crew / cancelled km
+        Formula("Total Eff;km.Diesel (Own+PPP)", "sum",
+                ("Eff. KMs Operated Diesel (Own)", "Effective Kms Operated Diesel(PPP)")),
+        Formula("Total Eff.km CNG (Own+PPP)", "sum",
+                ("Effective KMs Operated CNG (Own)", "Effective KMs Operated CNG (PPP)")),
+        Formula("Effe. KMs Operated Diesel+CNG+E (Own+PPP)", "sum",
+                ("Total Eff;km.Diesel (Own+PPP)", "Total Eff.km CNG (Own+PPP)", "Total Eff.km E-Bus (Own)")),
+        Formula("Total Hired Vehicle Eff. KMs", "sum",
+                ("Hired Vehicles Eff. KMs CNG", "Hired Vehicles Eff. KMs - E")),
+        Formula("Total Eff.Km (Own+Hire)", "sum",
+                ("Effe. KMs Operated Diesel+CNG+E (Own+PPP)", "Total Hired Vehicle Eff. KMs")),
+        Formula("Daily Average Effective Km", "per_day", ("Total Eff.Km (Own+Hire)",)),
+        Formula("Effective Km Per Bus Per day", "ratio",
+                ("Daily Average Effective Km", "Total Avg.Veh- On Road Per Day")),
+        Formula("Total Dead KMs (Diesel+CNG+E)", "sum",
+                ("Route Dead KMs- Diesel", "Route Dead KMs- CNG", "Route Dead KMs- Electric")),
+        Formula("Daily Average Dead Km - Diesel", "per_day", ("Route Dead KMs- Diesel",)),
+        Formula("Daily Average Dead Km - CNG", "per_day", ("Route Dead KMs- CNG",)),
+        Formula("Daily Average Dead Km - Electric", "per_day", ("Route Dead KMs- Electric",)),
+        Formula("Total Per Day Dead KMs (Diesel+CNG+E)", "per_day", ("Total Dead KMs (Diesel+CNG+E)",)),
+        Formula("Crew & Misc.KMs (PMPML) Total", "sum",
+                ("Crew & Misc.KMs (PMPML) Diesel", "Crew & Misc.KMs (PMPML) CNG",
+                 "Crew & Misc.KMs (PMPML) E-Bus")),
+        Formula("Daily Average Crew & Misc.KMs", "per_day", ("Crew & Misc.KMs (PMPML) Total",)),
+        Formula("Daily Average of Gross Km- Diesel", "per_day", ("Gross KMs- Diesel (Own)",)),
+        Formula("Daily average of Cancelled KMs", "per_day", ("Total Cancelled KMs",)),
+        # Ticket earnings
+        Formula("Average daily earning in Rs.", "per_day", ("Passenger Earning (Sale of Ticket)(₹)",)),
+        Formula("Earning per KMs in Rs.(EPK) (₹)", "ratio",
+                ("Passenger Earning (Sale of Ticket)(₹)", "Total Eff.Km (Own+Hire)")),
+        Formula("Earning Per Vehicle Per day in Rs.", "ratio",
+                ("Average daily earning in Rs.", "Total Avg.Veh- On Road Per Day")),
+        Formula("Earning / passenger / day in Rs", "ratio",
+                ("Average daily earning in Rs.", "Avg. Passenger travel per day (On Ticket Sale)")),
+        Formula("Passenger Per Bus Per day", "ratio",
+                ("Avg. Passenger travel per day (On Ticket Sale)", "Total Avg.Veh- On Road Per Day")),
+        # All-traffic earnings
+        Formula("Average Daily Earning (₹)", "per_day", ("All Traffic Earning (₹)",)),
+        Formula("Earning per KMs in Rs. (EPK) (₹)", "ratio",
+                ("All Traffic Earning (₹)", "Total Eff.Km (Own+Hire)")),
+        Formula("Earning per passenger per day (₹)", "ratio",
+                ("Average Daily Earning (₹)", _PAX_TRAFFIC)),
+        Formula("Avg Passenger per Bus per day on Traffic", "ratio",
+                (_PAX_TRAFFIC, "Total Avg.Veh- On Road Per Day")),
+        Formula("Earning per Bus per day on Traffic Revenue (₹)", "ratio",
+                ("Average Daily Earning (₹)", "Total Avg.Veh- On Road Per Day")),
+        # Passes
+        Formula("One Day Passes Total Daily Passes", "sum0", (
+            "One Day Passes ₹ 10 (Punyadasham)", "One Day Passes ₹ 40 (Sr.Citizen)",
+            "One Day Passes ₹ 40 (within PMC Limit)", "One Day Passes ₹ 40 (within PCMC Limit)",
+            "One Day Passes ₹ 50 (within Both Municipal limit)", "One Day Passes ₹ 120 (All Route)")),
+        Formula("Total (Monthly Passes)", "sum0", (
+            "Monthly Passes ₹ 500 (Sr.Citizens)", "Monthly Passes ₹ 700 (Mun.Corpn.Employees)",
+            "Monthly Passes ₹ 900 (within One Mun.Corpn.)", "Monthly Passes ₹ 1200 (within Both Mun.Corpn.)",
+            "Monthly Passes ₹ 2700 (All Route)", "Monthly Passes -Other Punching Passes")),
+        # Safety and reliability
+        Formula("No.of Accidents (PMPML) Total", "sum0", _ACC_P),
+        Formula("No.of Accidents (HIRED) Total", "sum0", _ACC_H),
+        Formula("Rate of Accidents per 1 Lakh KMs (PMPML)", "ratio",
+                ("No.of Accidents (PMPML) Total", "Effe. KMs Operated Diesel+CNG+E (Own+PPP)"), 100_000),
+        # Fuel and energy
+        Formula("Total Diesel (PMPML Own+PPP)", "sum",
+                ("Diesel Consumption in Litres- PMPML(Own)", "Diesel Consumption In litres (PPP)")),
+        Formula("Diesel Conusmption per Day in litres- PMPML(Own+PPP)", "per_day",
+                ("Total Diesel (PMPML Own+PPP)",)),
+        Formula("Total CNG (PMPML Own+PPP)", "sum",
+                ("CNG Consumption in Kg. (PMPML)", "CNG Consumption in Kg. (PPP)")),
+        Formula("CNG Consumption Per Day (PMPML + PPP)", "per_day", ("Total CNG (PMPML Own+PPP)",)),
+        Formula("E-Bus Consumption Per Day in Units (Own)", "per_day", ("E-Bus Consumption in Units (Own)",)),
+        Formula("Engine Oil Cons.in Litres per day (Top-up)", "per_day",
+                ("Engine Oil Consumption in Litres (Top-up Oil)",)),
+        Formula("Engine Oil Consumption in Litres (Total Oil)", "sum",
+                ("Engine Oil Consumption in Litres (Top-up Oil)", "Engine Oil Consumption in Litres (Change Oil)")),
+        # Staff
+        Formula("Total Bus Staff ratio – Norm Total (A+B+C) - 9.00", "sum", (
+            "Total Bus Staff ratio – Norm A) Administration - 1.00",
+            "Total Bus Staff ratio – Norm B) Traffic - 6.50",
+            "Total Bus Staff ratio – Norm C) Workshop - 1.50")),
+    ],
+    "brt_extracted": [
+        Formula("daily_avg_effective_km", "per_day", ("effective_km",)),
+        Formula("daily_avg_cancelled_km", "per_day", ("cancelled_km",)),
+        Formula("daily_avg_ticket_earning", "per_day", ("ticket_sale_earning",)),
+        Formula("daily_avg_all_traffic", "per_day", ("all_traffic_earning",)),
+        Formula("pct_cancelled_km", "ratio", ("cancelled_km", "planned_km"), 100),
+        Formula("epk_ticket", "ratio", ("ticket_sale_earning", "effective_km")),
+        Formula("epk_total", "ratio", ("all_traffic_earning", "effective_km")),
+        Formula("earning_per_passenger_per_day", "ratio", ("daily_avg_all_traffic", "passengers_per_day")),
+        Formula("accidents_total", "sum0", ("accidents_fatal", "accidents_major",
+                                            "accidents_minor", "accidents_insignificant")),
+    ],
+    "ebus_extracted": [
+        Formula("daily_avg_effective_km", "per_day", ("effective_km",)),
+        Formula("daily_avg_cancelled_km", "per_day", ("cancelled_km",)),
+        Formula("daily_avg_ticket_earning", "per_day", ("ticket_sale_earning",)),
+        Formula("daily_avg_all_traffic", "per_day", ("all_traffic_earning",)),
+        Formula("ticket_passengers_per_day", "per_day", ("total_ticket_passengers",)),
+        Formula("electricity_per_day", "per_day", ("electricity_units",)),
+        Formula("pct_cancelled_km", "ratio", ("cancelled_km", "planned_km"), 100),
+        Formula("epk_ticket", "ratio", ("ticket_sale_earning", "effective_km")),
+        Formula("epk_total", "ratio", ("all_traffic_earning", "effective_km")),
+        Formula("kmpu", "ratio", ("effective_km", "electricity_units")),
+        Formula("earning_per_passenger_ticket", "ratio", ("ticket_sale_earning", "total_ticket_passengers")),
+        Formula("fleet_utilization_pct", "ratio", ("avg_on_road", "buses_held"), 100),
+        Formula("km_per_bus_per_day", "ratio", ("daily_avg_effective_km", "avg_on_road")),
+        Formula("earning_per_bus_per_day", "ratio", ("daily_avg_all_traffic", "avg_on_road")),
+        Formula("avg_passengers_per_bus_per_day", "ratio", ("passengers_per_day", "avg_on_road")),
+        Formula("earning_per_passenger_per_day", "ratio", ("daily_avg_all_traffic", "passengers_per_day")),
+        Formula("accidents_total", "sum0", ("accidents_fatal", "accidents_major",
+                                            "accidents_minor", "accidents_insignificant")),
+    ],
+}
+
+# (must_be_larger, must_be_smaller): a row where the second exceeds the first by
+# more than SWAP_MIN_GAP is an order violation. Several depots violating in the
+# same month means the two columns were swapped during extraction.
+ORDER_CHECKS: dict[str, list[tuple[str, str]]] = {
+    "extracted": [
+        ("No.of Schedules Sanctioned Per Day (PMPML + PPP)",
+         "Average No.of Schedule operated Per Day (PMPML+PPP)"),
+        ("Schedules Total (PMPML+HIRE) Per Day", "Total Per Day (PMPML+HIRED)"),
+    ],
+    "brt_extracted": [("schedules_planned", "avg_schedules_operated"), ("planned_km", "effective_km")],
+    "ebus_extracted": [("schedules_planned", "avg_schedules_operated"), ("planned_km", "effective_km")],
+}
+
+
+
+class Shift(NamedTuple):
+    block: tuple[str, ...]      # columns in report order
+    first: Formula              # recomputes block[0], which the report left out
+
+
+# A row is shifted when block[0] + block[1] = block[2] — the block[1] + block[2]
+# = block[3] identity one slot to the left — while block[0] disagrees with its
+# own formula, in at least SYSTEMATIC_MIN_DEPOTS depots of the month.
+SHIFTS: dict[str, list[Shift]] = {
+    "extracted": [
+        Shift(("Schedules Total (PMPML+HIRE) Per Day",
+               "Average No.of Schedule operated Per Day (PMPML+PPP)",
+               "Hired Vehicles Per Day",
+               "Total Per Day (PMPML+HIRED)",
+               "Schedules Sanctioned KMs"),
+              Formula("Schedules Total (PMPML+HIRE) Per Day", "sum",
+                      ("No.of Schedules Sanctioned Per Day (PMPML + PPP)", "Hired"))),
+    ],
+}
+
+
+@dataclass
+class Deviation:
+    table: str
+    month: str
+    depot: str
+    column: str
+    reported: float
+    expected: float
+    rule: str           # formula text or "a ≥ b"
+    systematic: bool = False
+
+
+def formula_text(f: Formula) -> str:
+    if f.op in ("sum", "sum0"):
+        body = " + ".join(f.inputs)
+    elif f.op == "diff":
+        body = f"{f.inputs[0]} − {f.inputs[1]}"
+    elif f.op == "per_day":
+        body = f"{f.inputs[0]} / days"
+    else:
+        body = f"{f.inputs[0]} / {f.inputs[1]}"
+        if f.scale != 1:
+            body = f"{f.scale:g} × {body}"
+    return body
+
+
+def days_in_month(cube: Cube) -> np.ndarray:
+    return np.array([calendar.monthrange(m.year, m.month)[1] for m in cube.months], dtype=float)
+
+
+def evaluate(cube: Cube, f: Formula, days: np.ndarray) -> np.ndarray | None:
+    """Recompute one formula over every (depot, month); None if an input column is absent."""
+    if any(i not in cube.columns for i in f.inputs):
+        return None
+    x = [cube.col(i) for i in f.inputs]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if f.op == "sum":
+            out = np.sum(x, axis=0)
+        elif f.op == "sum0":
+            stacked = np.stack(x)
+            out = np.where(np.all(np.isnan(stacked), axis=0), np.nan, np.nansum(stacked, axis=0))
+        elif f.op == "diff":
+            out = x[0] - x[1]
+        elif f.op == "per_day":
+            out = x[0] / days[None, :]
+        elif f.op == "ratio":
+            out = f.scale * x[0] / x[1]
+        else:
+            raise ValueError(f"unknown formula op {f.op!r}")
+    return np.where(np.isfinite(out), out, np.nan)
+
+
+def _active(cube: Cube, latest_only: bool) -> np.ndarray:
+    """(depots, months) mask of rows that should be checked."""
+    active = cube.present & ~cube.gap[None, :]
+    if latest_only:
+        observed = np.flatnonzero(cube.present.any(axis=0))
+        if observed.size:
+            active[:, : observed[-1]] = False
+    return active
+
+
+def check_formulas(cube: Cube, latest_only: bool = False) -> list[Deviation]:
+    """Return formula deviations for every derivable column of cube."""
+    days = days_in_month(cube)
+    active = _active(cube, latest_only)
+    found: list[Deviation] = []
+
+    for f in FORMULAS.get(cube.table, []):
+        if f.target not in cube.columns:
+            continue
+        expected = evaluate(cube, f, days)
+        if expected is None:
+            continue
+        reported = cube.col(f.target)
+        with np.errstate(invalid="ignore"):
+            tol = np.maximum(REL_TOLERANCE * np.abs(reported), ABS_TOLERANCE[f.op])
+            bad = active & (np.abs(expected - reported) > tol)
+        found.extend(_collect(cube, bad, f.target, reported, expected, formula_text(f)))
+
+    for big, small in ORDER_CHECKS.get(cube.table, []):
+        if big not in cube.columns or small not in cube.columns:
+            continue
+        a, b = cube.col(big), cube.col(small)
+        with np.errstate(invalid="ignore"):
+            bad = active & (b - a > SWAP_MIN_GAP)
+        found.extend(_collect(cube, bad, big, a, b, f"{big} ≥ {small}"))
+
+    return [d for d in found if not known_issue(cube.path.name, d.month, d.depot, d.column)]
+
+
+def _collect(cube: Cube, bad: np.ndarray, column: str, reported: np.ndarray,
+             expected: np.ndarray, rule: str) -> list[Deviation]:
+    per_month = (bad & cube.depot_mask()[:, None]).sum(axis=0)     # depots, not the total row
+    out = []
+    for d, m in np.argwhere(bad):
+        out.append(Deviation(cube.table, month_label(cube.months[m]), cube.depots[d], column,
+                             float(reported[d, m]), float(expected[d, m]), rule,
+                             systematic=bool(per_month[m] >= SYSTEMATIC_MIN_DEPOTS)))
+    return out
+
+
+def realign(table: str, header: list[str], values: np.ndarray, dates: list[str],
+            depots: list[str]) -> list[int]:
+    """Undo SHIFTS in values (rows × header columns, NaN for blanks) in place.
+
+    Returns the indices of the realigned rows.
+    """
+    col = {h: i for i, h in enumerate(header)}
+    fixed: list[int] = []
+    for s in SHIFTS.get(table, []):
+        names = s.block + s.first.inputs
+        if any(n not in col for n in names):
+            continue
+        b = values[:, [col[n] for n in s.block]]
+        first = values[:, [col[n] for n in s.first.inputs]].sum(axis=1)
+        empty = np.isnan(b[:, 3:])
+        with np.errstate(invalid="ignore"):
+            shifted = ((np.abs(b[:, 0] + b[:, 1] - b[:, 2]) <= ABS_TOLERANCE["sum"])
+                       & (np.abs(b[:, 0] - first) > ABS_TOLERANCE["sum"])
+                       & (b[:, 2] > 0) & empty.any(axis=1))
+        depot_rows = np.array([d.strip() != SYSTEM_TOTAL for d in depots])
+        per_month = Counter(d for d, hit, dep in zip(dates, shifted, depot_rows) if hit and dep)
+        shifted &= np.array([per_month[d] >= SYSTEMATIC_MIN_DEPOTS for d in dates])
+        for r in np.flatnonzero(shifted):
+            gap = 3 + int(np.argmax(empty[r]))         # the slot that absorbed the shift
+            values[r, [col[n] for n in s.block[1:gap + 1]]] = b[r, :gap]
+            values[r, col[s.block[0]]] = first[r]
+            fixed.append(int(r))
+    return sorted(set(fixed))
+
+
+def check_all(latest_only: bool = False) -> list[Deviation]:
+    found = []
+    for cube in load_cubes().values():
+        found.extend(check_formulas(cube, latest_only))
+    return found
+
+
+def main():
+    latest = "--latest" in sys.argv
+    t0 = time.perf_counter()
+    found = check_all(latest_only=latest)
+    elapsed = time.perf_counter() - t0
+
+    groups: dict[tuple[str, str, str], list[Deviation]] = {}
+    for d in found:
+        groups.setdefault((d.table, d.month, d.column), []).append(d)
+    for (table, month, column), items in sorted(groups.items()):
+        tag = "  [systematic]" if items[0].systematic else ""
+        print(f"  {table} · {month} · {column}{tag}")
+        print(f"      rule: {items[0].rule}")
+        for d in items:
+            print(f"      {d.depot:<15} reported {d.reported:>14,.2f}  recomputed {d.expected:>14,.2f}")
+    n_sys = sum(1 for items in groups.values() if items[0].systematic)
+    print(f"\n  {len(found)} deviating cell(s) in {len(groups)} group(s), "
+          f"{n_sys} systematic · {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
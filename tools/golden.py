@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+tools/golden.py — Golden-result regression suite for every page query.
+
+A data fix (a KNOWN_DATA_ISSUES imputation, a re-extracted month, a new typed
+table) changes some charts and not others, and the only way to find out which
+used to be clicking through every built page. This stage runs every named
+```sql block of the active city's pages in an in-process DuckDB over the
+city's sources, hashes each result and compares it with the checked-in
+snapshot, so the answer is a list of pages and queries.
+
+Templates are rendered as tools/scaletest.py does: ${query} references become
+views over the referenced block, ${inputs…} take their default.
+
+Memoization. Each block gets a key: SHA-256 of
+  - its rendered SQL with comments dropped and whitespace collapsed,
+  - the SHA-256 of every source table it names,
+  - the keys of the blocks it references, and the DuckDB version.
+Results are memoized under that key in .cache/golden/<City>.json. A re-run
+executes only the blocks whose SQL, input tables or upstream blocks changed,
+and opens no DuckDB tables at all when nothing did. Tables are loaded on first
+use, once per run.
+
+Result hash. Column names and types, then every row with floats to 10
+significant digits, rows sorted, so the hash ignores row order the SQL does
+not pin down and float noise below what any chart shows. A short hash per
+column is kept too, so a change is reported by column.
+
+Snapshot: golden/<City>.json (checked in), page → query → {rows, columns,
+hash} or {error}. A run reports every page with a changed, new, missing or
+failing query and exits 1 if there is one. After an intended change, record
+the new snapshot and commit it.
+
+Run: python3 -m tools.golden                      — compare against golden/<City>.json
+     python3 -m tools.golden --record             — run and write the snapshot
+     python3 -m tools.golden --page Depotwise --no-cache
+
+Requires duckdb (pip install duckdb).
+"""
+
+import hashlib
+import json
+import re
+import sys
+import time
+from dataclasses import dataclass
+
+from lint import BASE, CITY, PAGES_DIR, SOURCES_DIR, city_pages, extract_sql_blocks
+from tools.colstats import file_sha256
+from tools.scaletest import _view, render_sql
+
+GOLDEN_DIR = BASE / "golden"
+CACHE_DIR = BASE / ".cache" / "golden"
+SIGNIFICANT = 10            # digits a float keeps in the result hash
+HASH_CHARS = 16             # hex digits kept per stored hash
+
+
+@dataclass
+class Block:
+    page: str
+    name: str
+    sql: str                # rendered, ready for DuckDB
+    tables: list[str]
+    upstream: list[str]
+    key: str = ""
+
+
+@dataclass
+class Change:
+    page: str
+    name: str
+    kind: str               # changed / new / missing / error
+    detail: str = ""
+
+
+@dataclass
+class RunStats:
+    blocks: int = 0
+    executed: int = 0
+    seconds: float = 0.0
+
+
+def golden_path():
+    return GOLDEN_DIR / f"{CITY['name']}.json"
+
+
+def cache_path():
+    return CACHE_DIR / f"{CITY['name']}.json"
+
+
+def normalize_sql(sql: str) -> str:
+    sql = re.sub(r"/\*.*?\*/", " ", sql, flags=re.DOTALL)
+    sql = re.sub(r"--[^\n]*", " ", sql)
+    return " ".join(sql.split())
+
+
+def _short(data: str) -> str:
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:HASH_CHARS]
+
+
+def collect_blocks(page_filter: str = "") -> list[Block]:
+    """Every named block of the active city's pages, in page order, keyed."""
+    tables = {p.stem: p for p in SOURCES_DIR.glob("*.csv")}
+    table_hash: dict[str, str] = {}
+    blocks = []
+    for page in city_pages():
+        rel = str(page.relative_to(PAGES_DIR))
+        if page_filter.lower() not in rel.lower():
+            continue
+        raw = extract_sql_blocks(page.read_text(encoding="utf-8"))
+        names = {n for n, _ in raw}
+        keys: dict[str, str] = {}
+        for name, sql in raw:
+            if name in keys:                        # pages repeat blocks under "Data Queries"
+                continue
+            rendered = render_sql(sql, names).strip().rstrip(";")
+            words = set(re.findall(r"\w+", rendered))
+            lowered = rendered.lower()              # DuckDB table names are case-insensitive
+            used = sorted(t for t in tables
+                          if re.search(rf"(?<![\w-]){re.escape(t.lower())}(?![\w-])", lowered))
+            upstream = sorted(n for n in names if f"q__{n}" in words and n != name)
+            for t in used:
+                if t not in table_hash:
+                    table_hash[t] = file_sha256(tables[t])
+            block = Block(rel, name, rendered, used, upstream)
+            keys[name] = block.key = _short(json.dumps([
+                normalize_sql(rendered), [(t, table_hash[t]) for t in used],
+                [keys.get(n, n) for n in upstream], _duckdb_version()]))
+            blocks.append(block)
+    return blocks
+
+
+def _duckdb_version() -> str:
+    import duckdb
+    return duckdb.__version__
+
+
+def _cell(v) -> str:
+    if isinstance(v, float):
+        return f"{v:.{SIGNIFICANT}g}"
+    return repr(v)
+
+
+def fingerprint(cursor) -> dict:
+    """{rows, columns: {name: hash}, hash} of an executed DuckDB result."""
+    names = [d[0] for d in cursor.description]
+    types = [str(d[1]) for d in cursor.description]
+    rows = [[_cell(v) for v in r] for r in cursor.fetchall()]
+    columns = {n: _short("\x1f".join(sorted(r[i] for r in rows))) for i, n in enumerate(names)}
+    body = "\x1e".join(sorted("\x1f".join(r) for r in rows))
+    return {"rows": len(rows), "columns": columns,
+            "hash": _short("\x1d".join(["\x1f".join(names), "\x1f".join(types), body]))}
+
+
+class Runner:
+    """One DuckDB connection; source tables are loaded the first time a block needs them."""
+
+    def __init__(self):
+        import duckdb
+        self.con = duckdb.connect()
+        self.loaded: set[str] = set()
+        self.page = ""
+        self.views: dict[str, str] = {}             # view → definition error ("" if none)
+
+    def _table(self, name: str):
+        if name not in self.loaded:
+            self.con.execute(f'CREATE TABLE "{name}" AS '
+                             f"SELECT * FROM read_csv_auto('{SOURCES_DIR / (name + '.csv')}')")
+            self.loaded.add(name)
+
+    def define(self, block: Block):
+        """Register the block as a view (its page's later blocks may reference it)."""
+        if block.page != self.page:
+            for name in self.views:
+                self.con.execute(f"DROP VIEW IF EXISTS {_view(name)}")
+            self.views.clear()
+            self.page = block.page
+        for t in block.tables:
+            self._table(t)
+        try:
+            self.con.execute(f"CREATE OR REPLACE VIEW {_view(block.name)} AS {block.sql}")
+            self.views[block.name] = ""
+        except Exception as e:                      # duckdb raises many Error subclasses
+            self.views[block.name] = str(e).splitlines()[0]
+
+    def execute(self, block: Block) -> dict:
+        if self.views.get(block.name):
+            return {"error": self.views[block.name]}
+        try:
+            return fingerprint(self.con.execute(f"SELECT * FROM {_view(block.name)}"))
+        except Exception as e:
+            return {"error": str(e).splitlines()[0]}
+
+
+def run(page_filter: str = "", use_cache: bool = True) -> tuple[dict, RunStats]:
+    """page → query → result entry for every block, executing only cache misses."""
+    t0 = time.perf_counter()
+    blocks = collect_blocks(page_filter)
+    memo = {}
+    if use_cache and cache_path().exists():
+        memo = json.loads(cache_path().read_text(encoding="utf-8"))
+    stats = RunStats(blocks=len(blocks))
+
+    # a page with any miss gets all its blocks defined, so references resolve
+    dirty = {b.page for b in blocks if b.key not in memo}
+    runner = Runner() if dirty else None
+    results: dict[str, dict[str, dict]] = {}
+    used = {}
+    for b in blocks:
+        if b.page in dirty:
+            assert runner is not None           # built whenever dirty is non-empty
+            runner.define(b)
+            if b.key not in memo:
+                memo[b.key] = runner.execute(b)
+                stats.executed += 1
+        used[b.key] = memo[b.key]
+        results.setdefault(b.page, {})[b.name] = memo[b.key]
+
+    if use_cache:
+        # a full run drops entries no block uses any more; a filtered run keeps them
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_path().write_text(json.dumps(memo if page_filter else used, sort_keys=True),
+                                encoding="utf-8")
+    stats.seconds = time.perf_counter() - t0
+    return results, stats
+
+
+def compare(results: dict, golden: dict, page_filter: str = "") -> list[Change]:
+    changes = []
+    pages = sorted(set(results) | {p for p in golden if page_filter.lower() in p.lower()})
+    for page in pages:
+        now, then = results.get(page, {}), golden.get(page, {})
+        for name in list(now) + [n for n in then if n not in now]:
+            new, old = now.get(name), then.get(name)
+            if new is None:
+                changes.append(Change(page, name, "missing"))
+            elif "error" in new:
+                if new != old:
+                    changes.append(Change(page, name, "error", new["error"]))
+            elif old is None:
+                changes.append(Change(page, name, "new", f"{new['rows']} rows"))
+            elif "error" in old or new["hash"] != old["hash"]:
+                changes.append(Change(page, name, "changed", _describe(old, new)))
+    return changes
+
+
+def _describe(old: dict, new: dict) -> str:
+    if "error" in old:
+        return f"was failing, now {new['rows']} rows"
+    parts = [f"rows {old['rows']} → {new['rows']}"] if old["rows"] != new["rows"] else []
+    cols_old, cols_new = old["columns"], new["columns"]
+    added = [c for c in cols_new if c not in cols_old]
+    removed = [c for c in cols_old if c not in cols_new]
+    changed = [c for c in cols_new if c in cols_old and cols_new[c] != cols_old[c]]
+    if added:
+        parts.append("added " + ", ".join(added))
+    if removed:
+        parts.append("removed " + ", ".join(removed))
+    if changed:
+        parts.append("values in " + ", ".join(changed))
+    return " · ".join(parts) or "column types or order"
+
+
+def _arg(argv: list[str], flag: str) -> str:
+    return argv[argv.index(flag) + 1] if flag in argv and argv.index(flag) + 1 < len(argv) else ""
+
+
+def main():
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        print("  tools.golden needs duckdb — pip install duckdb")
+        sys.exit(1)
+    page_filter = _arg(sys.argv, "--page")
+    results, stats = run(page_filter, use_cache="--no-cache" not in sys.argv)
+    path = golden_path()
+    print(f"  {stats.blocks} queries on {len(results)} pages · {stats.executed} executed, "
+          f"{stats.blocks - stats.executed} memoized · {stats.seconds:.2f} s")
+
+    if "--record" in sys.argv:
+        golden = json.loads(path.read_text(encoding="utf-8")) if path.exists() and page_filter else {}
+        golden.update(results)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(golden, indent=1, sort_keys=True, ensure_ascii=False) + "\n",
+                        encoding="utf-8")
+        print(f"  wrote {path.relative_to(BASE)}")
+        return
+
+    if not path.exists():
+        print(f"  no snapshot yet — run `npm run golden -- --record` and commit {path.relative_to(BASE)}")
+        sys.exit(1)
+    changes = compare(results, json.loads(path.read_text(encoding="utf-8")), page_filter)
+    by_page: dict[str, list[Change]] = {}
+    for c in changes:
+        by_page.setdefault(c.page, []).append(c)
+    for page, cs in by_page.items():
+        print(f"\n  {page}")
+        for c in cs:
+            print(f"      {c.kind:<8} {c.name}" + (f"  ·  {c.detail}" if c.detail else ""))
+    if changes:
+        print(f"\n  {len(by_page)} page(s) with changed results — check the charts, then "
+              "`npm run golden -- --record` and commit the snapshot")
+        sys.exit(1)
+    print("  every query matches the snapshot")
+
+
+if __name__ == "__main__":
+    main()
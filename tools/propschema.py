@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+tools/propschema.py — Cache the props every Evidence component accepts.
+
+Props that Evidence does not know are dropped without a word: lon= instead of
+long= on a PointMap, scaleColor= after its rename, a misspelt handleMissing=.
+lint.py has hand-written rules for the ones we have tripped over. This stage
+reads the components themselves so that every prop can be checked:
+
+  - @evidence-dev/core-components under node_modules: the public names in
+    dist/index.js, each resolved to its .svelte file
+  - the project's own components/*.svelte
+
+For each component it records the `export let` props and, where the prop's
+JSDoc type is a union of string literals (/** @type {'gap' | 'zero'} */), the
+allowed values. A component that forwards {...$$restProps} or {...$$props}
+to another component inherits that component's props. When it forwards them
+to anything it cannot resolve, it is marked open and its unknown props are
+not reported.
+
+Output: tools/component_props.json (checked in, so lint needs no node_modules)
+
+    {"core_components": "5.2.2",
+     "components": {"LineChart": {"source": "…/LineChart.svelte", "open": false,
+                                  "props": {"x": null, "handleMissing": ["gap", "zero", "connect"], …}},
+                    …}}
+
+lint.py validates every component tag against it as COMPONENT_PROP (unknown
+prop) and COMPONENT_PROP_VALUE (literal outside the allowed values), and warns
+as COMPONENT_SCHEMA when the cache no longer matches the installed package or
+components/. A cache without core components is stale as soon as the package
+is installed; until then lint can only note that COMPONENT_PROP skips them.
+package.json pins the core-components version, so the cache is rebuilt on
+purpose, not on every npm install.
+
+Run: python3 -m tools.propschema            — (re)build the cache (after npm install)
+     python3 -m tools.propschema --check    — exit 1 if the cache is stale
+
+Standard library only.
+"""
+
+import json
+import re
+import sys
+from pathlib import Path
+
+from lint import BASE
+
+CORE_DIR = BASE / "node_modules" / "@evidence-dev" / "core-components"
+LOCAL_DIR = BASE / "components"
+SCHEMA_JSON = BASE / "tools" / "component_props.json"
+
+_EXPORT = re.compile(r"""export\s*\{\s*default\s+as\s+(\w+)\s*\}\s*from\s*['"]([^'"]+\.svelte)['"]""")
+_IMPORT = re.compile(r"""import\s+(\w+)\s+from\s*['"]([^'"]+\.svelte)['"]""")
+_PROP = re.compile(r"""(?:/\*\*((?:(?!\*/).)*)\*/\s*)?export\s+let\s+(\w+)""", re.DOTALL)
+_ENUM_TYPE = re.compile(r"""@type\s*\{([^}]*)\}""")
+_SPREAD = re.compile(r"""<([\w.]+)\b[^>]*\{\s*\.\.\.\s*\$\$(?:rest)?[Pp]rops\s*\}""")
+
+
+def _enum(doc: str | None) -> list[str] | None:
+    """Allowed values from a JSDoc @type of string literals, else None."""
+    m = _ENUM_TYPE.search(doc or "")
+    if not m:
+        return None
+    options = [o.strip() for o in m.group(1).split("|")]
+    values = [o[1:-1] for o in options if len(o) > 1 and o[0] == o[-1] and o[0] in "'\""]
+    rest = [o for o in options if o not in ("undefined", "null") and not (o and o[0] in "'\"")]
+    return values if values and not rest else None
+
+
+def parse_component(path: Path) -> tuple[dict[str, list[str] | None], list[Path], bool]:
+    """Return (own props, .svelte files it forwards props to, forwards to unknown)."""
+    text = path.read_text(encoding="utf-8", errors="replace")
+    script = "\n".join(re.findall(r"<script\b[^>]*>(.*?)</script>", text, re.DOTALL))
+    props = {name: _enum(doc) for doc, name in _PROP.findall(script)}
+    imports = {name: (path.parent / rel).resolve() for name, rel in _IMPORT.findall(script)}
+    targets, unresolved = [], False
+    for tag in _SPREAD.findall(text):
+        target = imports.get(tag)
+        if target is not None and target.exists():
+            targets.append(target)
+        else:
+            unresolved = True                   # HTML element or component we can't read
+    return props, targets, unresolved
+
+
+def _flatten(path: Path, parsed: dict, stack: tuple = ()) -> tuple[dict, bool]:
+    if path not in parsed:
+        parsed[path] = parse_component(path)
+    props, targets, open_ = parsed[path]
+    out = {}
+    for target in targets:
+        if target in stack:
+            continue
+        inherited, inherited_open = _flatten(target, parsed, stack + (path,))
+        out.update(inherited)
+        open_ = open_ or inherited_open
+    out.update(props)
+    return out, open_
+
+
+def core_version() -> str | None:
+    pkg = CORE_DIR / "package.json"
+    return json.loads(pkg.read_text(encoding="utf-8"))["version"] if pkg.exists() else None
+
+
+def _entry(path: Path, parsed: dict) -> dict:
+    props, open_ = _flatten(path.resolve(), parsed)
+    source = path.relative_to(BASE) if path.is_relative_to(BASE) else path
+    return {"source": source.as_posix(), "open": open_, "props": dict(sorted(props.items()))}
+
+
+def local_components() -> dict[str, dict]:
+    parsed: dict = {}
+    return {p.stem: _entry(p, parsed) for p in sorted(LOCAL_DIR.glob("*.svelte"))}
+
+
+def core_components() -> dict[str, dict]:
+    index = CORE_DIR / "dist" / "index.js"
+    if not index.exists():
+        return {}
+    parsed: dict = {}
+    out = {}
+    for name, rel in _EXPORT.findall(index.read_text(encoding="utf-8")):
+        path = index.parent / rel
+        if path.exists():
+            out[name] = _entry(path, parsed)
+    return out
+
+
+def build(stored: dict | None = None) -> dict:
+    """The schema for what is installed now. Without node_modules the core
+    components are carried over from `stored` (default: the checked-in cache)."""
+    stored = load() if stored is None else stored
+    version = core_version()
+    core = core_components() if version else {
+        k: v for k, v in stored.get("components", {}).items() if not v["source"].startswith("components/")}
+    return {"core_components": version or stored.get("core_components"),
+            "components": dict(sorted({**core, **local_components()}.items()))}
+
+
+def load() -> dict:
+    if not SCHEMA_JSON.exists():
+        return {}
+    return json.loads(SCHEMA_JSON.read_text(encoding="utf-8"))
+
+
+def stale_reasons(stored: dict | None = None) -> list[str]:
+    """Why the cache no longer matches node_modules / components/ ([] if current)."""
+    stored = load() if stored is None else stored
+    reasons = []
+    version = core_version()
+    if version and not stored.get("core_components"):
+        reasons.append(f"@evidence-dev/core-components {version} is installed but the schema "
+                       "has no core component props, so COMPONENT_PROP checks only components/")
+    elif version and version != stored.get("core_components"):
+        reasons.append(f"@evidence-dev/core-components is {version}, "
+                       f"schema was built from {stored.get('core_components')}")
+    cached = {k: v for k, v in stored.get("components", {}).items() if v["source"].startswith("components/")}
+    local = local_components()
+    for name in sorted(set(cached) | set(local)):
+        if cached.get(name) != local.get(name):
+            reasons.append(f"components/{name}.svelte props changed")
+    return reasons
+
+
+def main():
+    if "--check" in sys.argv:
+        reasons = stale_reasons()
+        for r in reasons:
+            print(f"  stale: {r}")
+        if reasons:
+            print("  run `npm run propschema`")
+            sys.exit(1)
+        print(f"  {SCHEMA_JSON.name} is up to date")
+        return
+    schema = build()
+    SCHEMA_JSON.write_text(json.dumps(schema, indent=1, ensure_ascii=False) + "\n", encoding="utf-8")
+    n = len(schema["components"])
+    core = schema["core_components"]
+    print(f"  wrote {SCHEMA_JSON.name} · {n} components"
+          + (f" · core-components {core}" if core else " · core-components not installed (npm install)"))
+
+
+if __name__ == "__main__":
+    main()
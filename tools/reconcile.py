@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+tools/reconcile.py — Reconcile depot rows against the System Total row.
+
+brt_extracted.csv and ebus_extracted.csv carry a "System Total" row per month,
+copied from the bottom line of each PMPML report. If tabula shifts a column or
+a depot row is mis-keyed, the depot rows stop adding up to that total. This
+module checks every month and every numeric column in one vectorized pass:
+
+  Additive columns (km, earnings, buses, passengers, accident counts, …)
+      Σ depot rows must equal the System Total within ADDITIVE_TOLERANCE, or
+      within ±0.5 per contributing depot for rounded per-day averages.
+      Blank depot cells count as zero (PMPML leaves zero-accident cells empty);
+      a month where every depot cell is blank is not checked.
+
+  Ratio columns (EPK, utilization %, km/bus/day, …)
+      Summing or averaging ratios is meaningless. The system-level ratio is
+      recomputed from summed numerator and denominator (RATIO_COLUMNS), or as a
+      weighted mean of the depot ratios (WEIGHTED_COLUMNS) where the report's
+      own formula is not derivable from the table, then compared to the total.
+
+extracted.csv has no System Total row, so it is not reconciled here — its
+earnings columns are covered by the row-level formula checks instead.
+
+Run: python3 -m tools.reconcile
+
+lint.py reports each mismatch as DATA_RECONCILE unless KNOWN_DATA_ISSUES has
+an entry for (file, month, "System Total", column) — column may be "*" when a
+whole total row is known to be off.
+
+Requires numpy.
+"""
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from tools.cube import Cube, SYSTEM_TOTAL, known_issue, load_cubes, month_label
+
+ADDITIVE_TOLERANCE = 0.005      # 0.5% relative…
+ROUNDING_PER_DEPOT = 0.5        # …or ±0.5 per contributing depot (per-day averages are rounded)
+RATIO_TOLERANCE = 0.02          # 2% — reported ratios are rounded to 2 dp per depot
+WEIGHTED_TOLERANCE = 0.05       # 5% — the weight is our best proxy, not the report's formula
+RATIO_ABS_TOLERANCE = 0.05      # ignore ratio differences below this many units
+
+# column → (numerator, denominator, scale): total = scale · Σnum / Σden
+RATIO_COLUMNS = {
+    "km_per_bus_per_day":             ("daily_avg_effective_km", "avg_on_road", 1),
+    "pct_cancelled_km":               ("cancelled_km", "planned_km", 100),
+    "epk_ticket":                     ("ticket_sale_earning", "effective_km", 1),
+    "epk_total":                      ("all_traffic_earning", "effective_km", 1),
+    "fleet_utilization_pct":          ("avg_on_road", "buses_held", 100),
+    "kmpu":                           ("effective_km", "electricity_units", 1),
+    "earning_per_passenger_ticket":   ("ticket_sale_earning", "total_ticket_passengers", 1),
+    "earning_per_passenger_per_day":  ("daily_avg_all_traffic", "passengers_per_day", 1),
+    "earning_per_bus_per_day":        ("daily_avg_all_traffic", "avg_on_road", 1),
+    "avg_passengers_per_bus_per_day": ("passengers_per_day", "avg_on_road", 1),
+}
+
+# column → weight column: total = Σ(ratio · weight) / Σweight
+WEIGHTED_COLUMNS = {
+    "load_factor_overall":     "effective_km",
+    "load_factor_ticket":      "effective_km",
+    "load_factor_all_traffic": "effective_km",
+    "avg_route_length_km":     "routes_operated",
+}
+
+# Columns whose System Total cannot be derived from the depot rows:
+#   complaints                — logged centrally; depot cells are blank, only the total is filled
+#   accident_rate_per_lakh_km — total is ~10x the BRT-km rate; the report uses a
+#                               different km base that this table does not carry
+UNCHECKED = frozenset(["complaints", "accident_rate_per_lakh_km"])
+
+
+@dataclass
+class Mismatch:
+    table: str
+    month: str
+    column: str
+    kind: str           # "additive" | "ratio" | "weighted"
+    expected: float     # recomputed from depot rows
+    reported: float     # System Total row
+
+
+def _relative_diff(expected: np.ndarray, reported: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.abs(expected - reported) / np.maximum(np.abs(reported), 1e-9)
+
+
+def reconcile(cube: Cube) -> list[Mismatch]:
+    """Return every (month, column) where depot rows disagree with System Total."""
+    if SYSTEM_TOTAL not in cube.depots:
+        return []
+    depots = cube.depot_mask()
+    rows = cube.values[depots]                          # (depots, months, cols)
+    total = cube.values[cube.depots.index(SYSTEM_TOTAL)]  # (months, cols)
+    col = {c: i for i, c in enumerate(cube.columns)}
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        summed = np.nansum(rows, axis=0)
+        has_any = np.any(~np.isnan(rows), axis=0)
+        expected = np.where(has_any, summed, np.nan)
+        kind = np.array(["additive"] * len(cube.columns), dtype=object)
+
+        for c, (num, den, scale) in RATIO_COLUMNS.items():
+            if c in col and num in col and den in col:
+                expected[:, col[c]] = scale * summed[:, col[num]] / summed[:, col[den]]
+                kind[col[c]] = "ratio"
+        for c, weight in WEIGHTED_COLUMNS.items():
+            if c in col and weight in col:
+                v, w = rows[:, :, col[c]], rows[:, :, col[weight]]
+                w = np.where(np.isnan(v), np.nan, w)
+                expected[:, col[c]] = np.nansum(v * w, axis=0) / np.nansum(w, axis=0)
+                kind[col[c]] = "weighted"
+        for c in UNCHECKED:
+            if c in col:
+                expected[:, col[c]] = np.nan
+
+        rel = _relative_diff(expected, total)
+        diff = np.abs(expected - total)
+        tol = np.select([kind == "additive", kind == "ratio"],
+                        [ADDITIVE_TOLERANCE, RATIO_TOLERANCE], WEIGHTED_TOLERANCE)
+        abs_tol = np.where(kind == "additive",
+                           ROUNDING_PER_DEPOT * np.sum(~np.isnan(rows), axis=0),
+                           RATIO_ABS_TOLERANCE)
+        bad = (rel > tol) & (diff > abs_tol) & ~np.isnan(expected) & ~np.isnan(total)
+    bad[cube.gap, :] = False
+
+    file = cube.path.name
+    out = []
+    for m, c in np.argwhere(bad):
+        month = month_label(cube.months[m])
+        if known_issue(file, month, SYSTEM_TOTAL, cube.columns[c]):
+            continue
+        out.append(Mismatch(cube.table, month, cube.columns[c], kind[c],
+                            float(expected[m, c]), float(total[m, c])))
+    return out
+
+
+def reconcile_all() -> list[Mismatch]:
+    found = []
+    for cube in load_cubes().values():
+        found.extend(reconcile(cube))
+    return found
+
+
+def main():
+    t0 = time.perf_counter()
+    found = reconcile_all()
+    elapsed = time.perf_counter() - t0
+    for m in found:
+        print(f"  {m.table} · {m.month} · {m.column} [{m.kind}] — "
+              f"depot rows give {m.expected:,.2f}, System Total says {m.reported:,.2f}")
+    print(f"\n  {len(found)} mismatch(es) · {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
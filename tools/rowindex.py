@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+tools/rowindex.py — Persistent (Date, Depot) → byte-offset index for PMPML tables.
+
+Targeted checks ("the Feb 2023 rows", "the row a KNOWN_DATA_ISSUES entry points
+at") used to load every row of extracted.csv with csv.DictReader and scan the
+list. This module indexes each PMPML table once:
+
+    .cache/rowindex/<source>/<table>.json        <source>: the city's sources/ folder
+        {"sha256": …, "size": …, "mtime_ns": …, "header": [...],
+         "rows": [[date, depot as written, offset, length], …]}
+
+and reads rows back through a memory-mapped file, so a lookup parses exactly
+one CSV record no matter how long the history grows. The index is rebuilt only
+when the file's SHA-256 changes; a size/mtime match skips the hash entirely.
+
+Record boundaries are found on the memory-mapped bytes with a quote-aware
+pattern, so quoted cells that contain newlines (tabula's "0\\n0") stay inside
+their row and the file is never read into memory whole.
+
+    idx = RowIndex.open("extracted")
+    idx.get("Feb 2023", "Pune Station")    → dict or None
+    idx.month("Feb 2023")                  → list of dicts, one per depot
+    idx.depots()                           → depot names as written, no parsing
+    idx.column("% of Fleet Utilization(PMPML+PPP)")   → [(date, depot, cell), …]
+    idx.duplicates                         → {(date, canonical depot): row count}
+
+Lookups are keyed on the canonical depot name (DEPRECATED_DEPOT_NAMES); when
+two rows share a key, get() returns the first and the key is listed in
+duplicates (lint.py reports it as DATA_DUPLICATE_ROW).
+
+Run: python3 -m tools.rowindex   — (re)build every index and print timings
+
+Standard library only.
+"""
+
+import csv
+import datetime
+import hashlib
+import json
+import mmap
+import re
+import time
+from pathlib import Path
+
+from lint import BASE, DEPRECATED_DEPOT_NAMES, PMPML_TABLES, SOURCES_DIR
+
+CACHE_DIR = BASE / ".cache" / "rowindex" / SOURCES_DIR.name
+INDEX_VERSION = 2
+
+# One CSV record: unquoted bytes or whole quoted runs, up to an unquoted newline.
+_RECORD = re.compile(rb'(?:[^"\n]|"[^"]*")+(?:\n|$)')
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _parse(record: bytes) -> list[str]:
+    return next(csv.reader([record.decode("utf-8").rstrip("\r\n")]), [])
+
+
+def build(path: Path) -> dict:
+    """Scan path once through a memory map and return the index document."""
+    stat = path.stat()
+    header: list[str] = []
+    rows = []
+    digest = hashlib.sha256()
+    if stat.st_size:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            digest.update(data)
+            records = _RECORD.finditer(data)
+            first = next(records, None)
+            header = _parse(first.group()) if first else []
+            i_date, i_depot = header.index("Date"), header.index("Depot")
+            for m in records:
+                cells = _parse(m.group())
+                if len(cells) <= max(i_date, i_depot) or not cells[i_date].strip():
+                    continue
+                rows.append([cells[i_date].strip(), cells[i_depot].strip(),
+                             m.start(), m.end() - m.start()])
+    return {"version": INDEX_VERSION, "sha256": digest.hexdigest(),
+            "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "header": header, "rows": rows}
+
+
+def load_or_build(path: Path, cache: Path) -> tuple[dict, bool]:
+    """Return (index, rebuilt). Reuses the cached index while the file hash is unchanged."""
+    stat = path.stat()
+    doc = None
+    if cache.exists():
+        try:
+            doc = json.loads(cache.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            doc = None
+    if doc and doc.get("version") == INDEX_VERSION:
+        if doc["size"] == stat.st_size and doc["mtime_ns"] == stat.st_mtime_ns:
+            return doc, False
+        if doc["size"] == stat.st_size and doc["sha256"] == _sha256(path):
+            doc["mtime_ns"] = stat.st_mtime_ns          # touched, not changed
+            _write(cache, doc)
+            return doc, False
+    doc = build(path)
+    _write(cache, doc)
+    return doc, True
+
+
+def _write(cache: Path, doc: dict):
+    try:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        cache.write_text(json.dumps(doc, separators=(",", ":")), encoding="utf-8")
+    except OSError:
+        pass                                            # read-only checkout: index stays in memory
+
+
+class RowIndex:
+    """O(1) (Date, Depot) access to one CSV through a memory-mapped file."""
+
+    def __init__(self, path: Path, doc: dict, rebuilt: bool = False):
+        self.path = path
+        self.header: list[str] = doc["header"]
+        self.rebuilt = rebuilt
+        self._rows: list[tuple[str, str, int, int]] = [tuple(r) for r in doc["rows"]]
+        self._keys: dict[tuple[str, str], tuple[int, int]] = {}
+        self.duplicates: dict[tuple[str, str], int] = {}
+        self._by_month: dict[str, list[tuple[int, int]]] = {}
+        for d, dp, off, n in self._rows:
+            key = self._key(d, dp)
+            if key in self._keys:
+                self.duplicates[key] = self.duplicates.get(key, 1) + 1
+            else:
+                self._keys[key] = (off, n)
+            self._by_month.setdefault(d, []).append((off, n))
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if doc["size"] else None
+
+    @classmethod
+    def open(cls, table: str, path: Path | None = None) -> "RowIndex | None":
+        path = path or SOURCES_DIR / f"{table}.csv"
+        if not path.exists():
+            return None
+        doc, rebuilt = load_or_build(path, CACHE_DIR / f"{path.stem}.json")
+        return cls(path, doc, rebuilt)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        return self._key(*key) in self._keys
+
+    @staticmethod
+    def _key(date: str, depot: str) -> tuple[str, str]:
+        depot = depot.strip()
+        return date.strip(), DEPRECATED_DEPOT_NAMES.get(depot, depot)
+
+    def _read(self, off: int, n: int) -> dict[str, str]:
+        if self._map is None:                           # empty file: nothing indexed
+            return {}
+        return dict(zip(self.header, _parse(self._map[off:off + n])))
+
+    def get(self, date: str, depot: str) -> dict[str, str] | None:
+        loc = self._keys.get(self._key(date, depot))
+        return self._read(*loc) if loc else None
+
+    def month(self, date: str) -> list[dict[str, str]]:
+        return [self._read(off, n) for off, n in self._by_month.get(date.strip(), [])]
+
+    def depots(self) -> set[str]:
+        """Every depot name as written in the file (straight from the index)."""
+        return {dp for _, dp, _, _ in self._rows}
+
+    def column(self, name: str) -> list[tuple[str, str, str]]:
+        """(Date, Depot, cell) of one column for every row, in file order."""
+        if name not in self.header:
+            return []
+        return [(d, dp, self._read(off, n).get(name, "")) for d, dp, off, n in self._rows]
+
+    def months(self) -> list[str]:
+        """Every Date in the file, oldest first."""
+        def key(d):
+            try:
+                return datetime.datetime.strptime(d, "%b %Y")
+            except ValueError:                          # reported by DATA_DATE_FMT
+                return datetime.datetime.max
+        return sorted(self._by_month, key=key)
+
+
+def open_all() -> dict[str, RowIndex]:
+    out = {}
+    for t in PMPML_TABLES:
+        idx = RowIndex.open(t)
+        if idx is not None:
+            out[t] = idx
+    return out
+
+
+def main():
+    for t in PMPML_TABLES:
+        t0 = time.perf_counter()
+        idx = RowIndex.open(t)
+        if idx is None:
+            continue
+        t1 = time.perf_counter()
+        months = idx.months()
+        sample = idx.month(months[-1]) if months else []
+        t2 = time.perf_counter()
+        state = "rebuilt" if idx.rebuilt else "cached"
+        print(f"  {t}: {len(idx)} rows, {len(months)} months ({state}, {(t1 - t0) * 1000:.1f} ms) · "
+              f"{len(sample)} rows of {months[-1] if months else '—'} read in {(t2 - t1) * 1000:.2f} ms")
+        idx.close()
+
+
+if __name__ == "__main__":
+    main()
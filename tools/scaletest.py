@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+tools/scaletest.py — Synthesize scaled-up PMPML tables and time every page's SQL.
+
+Coverage is meant to grow back to the 2007 PMPML merger and across more
+depots. This stage answers "which page falls over first?" before the data
+exists:
+
+  1. Synthesize. For each scale MxD, extracted, brt_extracted and
+     ebus_extracted are rebuilt with M× the months (extending backwards from
+     the first real month) and D× the depots. Every synthetic (depot, month)
+     row is a real row of the same base depot, taken from the real month at
+     the same position in the repeating month cycle, with numeric cells
+     jittered by ±JITTER. So the synthetic data keeps:
+       - the real headers and per-depot distributions;
+       - KNOWN_GAPS (a gap month stays a gap in every cycle);
+       - the quirks: "null" and "0\\n0" cells, blank cells and System Total
+         rows are copied verbatim.
+     Depot copies are named "<Depot> 2", "<Depot> 3", … so the first copy keeps
+     the real names that page filters use. calendar.csv is regenerated for the
+     synthetic months; every other CSV is used as-is.
+  2. Time. Each page's ```sql blocks are registered as views in an in-process
+     DuckDB, in page order. Evidence ${query} references become view names and
+     ${inputs…} expressions take their `|| default` or INPUT_DEFAULTS. Each
+     block is then executed and fetched REPEATS times; the best wall time and
+     the row count are recorded.
+
+Output: one line per page per scale (total ms, slowest block, rows returned),
+and the growth factor from the smallest to the largest scale, slowest first.
+
+Run: python3 -m tools.scaletest                       — scales 1x1, 10x1, 10x10
+     python3 -m tools.scaletest --scale 6x2 --scale 20x5
+     python3 -m tools.scaletest --page Depotwise --json out.json
+
+Requires duckdb (pip install duckdb).
+"""
+
+import csv
+import datetime
+import json
+import random
+import re
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from lint import PAGES_DIR, PMPML_TABLES, SOURCES_DIR, city_pages, extract_sql_blocks
+from tools import fiscal
+
+SYSTEM_TOTAL = "System Total"
+DEFAULT_SCALES = [(1, 1), (10, 1), (10, 10)]
+JITTER = 0.05
+SEED = 2007
+REPEATS = 3             # best-of-N wall time per block
+
+# Values for ${inputs.<name>…} expressions that have no `|| 'default'` fallback.
+INPUT_DEFAULTS = {
+    "selected_depot": "Hadapsar",
+}
+
+
+@dataclass
+class BlockTiming:
+    name: str
+    ms: float
+    rows: int
+    error: str = ""
+
+
+@dataclass
+class PageTiming:
+    page: str
+    scale: str
+    source_rows: int
+    blocks: list[BlockTiming] = field(default_factory=list)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(b.ms for b in self.blocks)
+
+    @property
+    def slowest(self) -> BlockTiming | None:
+        return max(self.blocks, key=lambda b: b.ms, default=None)
+
+
+# ── Synthesis ──────────────────────────────────────────────────────────────────
+
+def _shift_month(d: datetime.date, k: int) -> datetime.date:
+    y, m = divmod(d.year * 12 + d.month - 1 + k, 12)
+    return datetime.date(y, m + 1, 1)
+
+
+def _jitter(cell: str, rng: random.Random) -> str:
+    try:
+        v = float(cell)
+    except ValueError:
+        return cell                                 # "null", "", "0\n0", labels…
+    if v == 0:
+        return cell
+    out = v * (1 + rng.uniform(-JITTER, JITTER))
+    return str(round(out)) if "." not in cell else f"{out:.2f}"
+
+
+def synthesize_table(path: Path, months_x: int, depots_x: int, rng: random.Random,
+                     ) -> tuple[list[str], list[list[str]], list[datetime.date]]:
+    """Return (header, rows, synthetic months) for one PMPML CSV at scale months_x × depots_x."""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = [r for r in reader if r]
+    i_date, i_depot = header.index("Date"), header.index("Depot")
+
+    by_month: dict[datetime.date, list[list[str]]] = {}
+    for r in rows:
+        mo = fiscal.parse_month(r[i_date])
+        if mo is not None:
+            by_month.setdefault(mo, []).append(r)
+    if not by_month:
+        return header, rows, []
+    first, last = min(by_month), max(by_month)
+    span = (last.year - first.year) * 12 + last.month - first.month + 1
+
+    out, months = [], []
+    for k in range(months_x * span):
+        mo = _shift_month(last, -k)
+        months.append(mo)
+        real = by_month.get(_shift_month(last, -(k % span)), [])   # gap month → no rows
+        for r in real:
+            for copy in range(depots_x):
+                if r[i_depot] == SYSTEM_TOTAL and copy:
+                    continue
+                new = [c if i in (i_date, i_depot) else _jitter(c, rng) for i, c in enumerate(r)]
+                new[i_date] = mo.strftime("%b %Y")
+                if copy:
+                    new[i_depot] = f"{r[i_depot]} {copy + 1}"
+                out.append(new)
+    return header, out, sorted(months)
+
+
+def write_scaled_sources(dest: Path, months_x: int, depots_x: int) -> int:
+    """Write every sources/CMP CSV into dest at the given scale; return PMPML row count."""
+    rng = random.Random(SEED)
+    all_months: set[datetime.date] = set()
+    present: dict[str, set[datetime.date]] = {}
+    n_rows = 0
+    for src in sorted(SOURCES_DIR.glob("*.csv")):
+        if src.stem == "calendar":
+            continue
+        if src.stem not in PMPML_TABLES:
+            (dest / src.name).write_bytes(src.read_bytes())
+            continue
+        header, rows, months = synthesize_table(src, months_x, depots_x, rng)
+        n_rows += len(rows)
+        all_months.update(months)
+        i_date = header.index("Date")
+        parsed = (fiscal.parse_month(r[i_date]) for r in rows)
+        present[src.stem] = {m for m in parsed if m is not None}
+        with open(dest / src.name, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(header)
+            w.writerows(rows)
+
+    months = sorted(all_months)
+    gaps = {t: {m for m in months if m not in present.get(t, set())} for t in PMPML_TABLES}
+    with open(dest / "calendar.csv", "w", newline="", encoding="utf-8") as f:
+        cal = csv.DictWriter(f, fieldnames=fiscal.COLUMNS, lineterminator="\n")
+        cal.writeheader()
+        cal.writerows(fiscal.build_rows(months, gaps))
+    return n_rows
+
+
+# ── Timing ─────────────────────────────────────────────────────────────────────
+
+def _input_value(expr: str) -> str:
+    """Best-effort value for an Evidence ${inputs…} template expression."""
+    if "? '1=1'" in expr:
+        return "1=1"
+    m = re.search(r"\|\|\s*'([^']*)'", expr) or re.search(r"\|\|\s*([\d.]+)", expr)
+    if m:
+        return m.group(1)
+    m = re.match(r"\s*inputs\.(\w+)", expr)
+    return INPUT_DEFAULTS.get(m.group(1), "") if m else ""
+
+
+def _view(query_name: str) -> str:
+    # Evidence keeps query names apart from source tables (a page may name a query
+    # after the table it reads), so views get their own prefix.
+    return f'"q__{query_name}"'
+
+
+def render_sql(sql: str, query_names: set[str]) -> str:
+    """Replace Evidence ${…} templates with something DuckDB can run."""
+    out, i = [], 0
+    while (j := sql.find("${", i)) != -1:
+        depth, k = 0, j + 2
+        while k < len(sql):                         # templates can contain { } in JS
+            if sql[k] == "{":
+                depth += 1
+            elif sql[k] == "}":
+                if depth == 0:
+                    break
+                depth -= 1
+            k += 1
+        expr = sql[j + 2:k].strip()
+        out.append(sql[i:j])
+        out.append(_view(expr) if expr in query_names else _input_value(expr))
+        i = k + 1
+    out.append(sql[i:])
+    return "".join(out)
+
+
+def time_page(con, page: Path, scale: str, source_rows: int) -> PageTiming:
+    blocks = extract_sql_blocks(page.read_text(encoding="utf-8"))
+    names = {n for n, _ in blocks}
+    result = PageTiming(str(page.relative_to(PAGES_DIR)), scale, source_rows)
+    seen = set()
+    for name, sql in blocks:
+        if name in seen:                            # pages repeat blocks under "Data Queries"
+            continue
+        seen.add(name)
+        text = render_sql(sql, names).strip().rstrip(";")
+        try:
+            con.execute(f"CREATE OR REPLACE TEMP VIEW {_view(name)} AS {text}")
+            best = float("inf")
+            for _ in range(REPEATS):
+                t0 = time.perf_counter()
+                rows = len(con.execute(f"SELECT * FROM {_view(name)}").fetchall())
+                best = min(best, (time.perf_counter() - t0) * 1000)
+            result.blocks.append(BlockTiming(name, best, rows))
+        except Exception as e:                      # duckdb raises many Error subclasses
+            result.blocks.append(BlockTiming(name, 0.0, 0, str(e).splitlines()[0]))
+    for name in seen:
+        con.execute(f"DROP VIEW IF EXISTS {_view(name)}")
+    return result
+
+
+def run(scales: list[tuple[int, int]], page_filter: str = "") -> list[PageTiming]:
+    import duckdb
+
+    pages = [p for p in city_pages() if page_filter.lower() in str(p).lower()]
+    results = []
+    for months_x, depots_x in scales:
+        label = f"{months_x}x{depots_x}"
+        with tempfile.TemporaryDirectory(prefix=f"scaletest-{label}-") as tmp:
+            n_rows = write_scaled_sources(Path(tmp), months_x, depots_x)
+            con = duckdb.connect()
+            for csv_path in sorted(Path(tmp).glob("*.csv")):
+                con.execute(f'CREATE TABLE "{csv_path.stem}" AS '
+                            f"SELECT * FROM read_csv_auto('{csv_path}')")
+            for page in pages:
+                if extract_sql_blocks(page.read_text(encoding="utf-8")):
+                    results.append(time_page(con, page, label, n_rows))
+            con.close()
+    return results
+
+
+def parse_scales(argv: list[str]) -> list[tuple[int, int]]:
+    scales = []
+    for i, a in enumerate(argv):
+        if a == "--scale" and i + 1 < len(argv):
+            m, _, d = argv[i + 1].lower().partition("x")
+            scales.append((int(m), int(d or 1)))
+    return scales or DEFAULT_SCALES
+
+
+def _arg(argv: list[str], flag: str) -> str:
+    return argv[argv.index(flag) + 1] if flag in argv and argv.index(flag) + 1 < len(argv) else ""
+
+
+def main():
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        print("  tools.scaletest needs duckdb — pip install duckdb")
+        sys.exit(1)
+    scales = parse_scales(sys.argv)
+    results = run(scales, _arg(sys.argv, "--page"))
+
+    by_page: dict[str, list[PageTiming]] = {}
+    for r in results:
+        by_page.setdefault(r.page, []).append(r)
+
+    def growth(rs):
+        return rs[-1].total_ms / max(rs[0].total_ms, 0.01)
+
+    for page, rs in sorted(by_page.items(), key=lambda kv: -kv[1][-1].total_ms):
+        print(f"  {page}  ·  ×{growth(rs):.1f} from {rs[0].scale} to {rs[-1].scale}")
+        for r in rs:
+            slow = r.slowest
+            print(f"      {r.scale:>6}  {r.source_rows:>8,} PMPML rows  {r.total_ms:>9.1f} ms total  "
+                  f"slowest {slow.name if slow else '—'} ({slow.ms if slow else 0:.1f} ms)  "
+                  f"{sum(b.rows for b in r.blocks):>9,} result rows")
+        for b in rs[-1].blocks:
+            if b.error:
+                print(f"      ! {b.name}: {b.error}")
+
+    out = _arg(sys.argv, "--json")
+    if out:
+        Path(out).write_text(json.dumps(
+            [dict(asdict(r), total_ms=r.total_ms) for r in results], indent=1), encoding="utf-8")
+        print(f"\n  wrote {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+tools/sitematch.py — Match the 2008 and 2021 traffic survey locations.
+
+The 2008 PCMC survey (V1…V15) and the 2021 Pune Metro survey (SL45, MB11, …)
+use unrelated location IDs and free-text names, but both record coordinates.
+This stage pairs them once, at build time, so pages can show 2008→2021 change
+with a plain join instead of hand-maintained VALUES lists.
+
+Method:
+  1. Project both surveys to metres (equirectangular around their mean
+     latitude, well under 1 m error across the metro region) and bucket the
+     2021 points into a grid of MAX_DISTANCE_M cells. Candidates for a 2008
+     point are the 2021 points in its 3×3 cell neighbourhood within
+     MAX_DISTANCE_M.
+  2. Pairs are taken greedily, nearest first, each location used once.
+     Candidates within TIE_MARGIN_M of a 2008 point's nearest candidate count
+     as a tie: they all sort at that nearest distance and, among themselves,
+     by location_detail similarity (difflib ratio over lower-cased words,
+     parentheses dropped). Names never rank one 2008 point against another.
+  3. The 2008 survey counts vehicles by class but not PCU, so its PCU is
+     computed with the IRC:106-1990 urban equivalence factors, interpolated
+     between the 5% and 10% class-share values as the code prescribes. The
+     2021 PCU is the survey's own.
+
+Output: sources/CMP/traffic_site_matches.csv (checked in, loaded by Evidence
+as `traffic_site_matches`), one row per matched site with both IDs and names,
+distance_m, name_similarity, vehicles and PCU in each year, their % change and
+the PCU/vehicle ratio in each year.
+
+lint.py fails as DATA_SITEMATCH while the CSV differs from a fresh match.
+
+Run: python3 -m tools.sitematch            — rewrite traffic_site_matches.csv
+     python3 -m tools.sitematch --check    — exit 1 if it is stale
+
+Standard library only.
+"""
+
+import csv
+import difflib
+import io
+import math
+import re
+import sys
+
+from lint import SOURCES_DIR
+
+SURVEY_2008 = SOURCES_DIR / "Pimpri_Chinchwad_Traffic_at_Locations.csv"
+SURVEY_2021 = SOURCES_DIR / "Pimpri_Chinchwad_Traffic_at_Locations_2021.csv"
+MATCHES_CSV = SOURCES_DIR / "traffic_site_matches.csv"
+
+MAX_DISTANCE_M = 500        # survey points further apart are different sites
+TIE_MARGIN_M = 100          # candidates this close to the nearest are ranked by name
+EARTH_RADIUS_M = 6_371_000
+
+# IRC:106-1990 PCU factors for urban roads: (at 5% share, at ≥10% share).
+PCU_FACTORS = {
+    "four_wheelers":   (1.0, 1.0),
+    "two_wheelers":    (0.5, 0.75),
+    "auto_rickshaws":  (1.2, 2.0),
+    "minibuses":       (1.4, 2.0),      # light commercial vehicle
+    "local_buses":     (2.2, 3.7),
+    "intercity_buses": (2.2, 3.7),
+    "cycles":          (0.4, 0.5),
+}
+
+COLUMNS = ["location_no_2008", "location_no_2021", "location_detail_2008", "location_detail_2021",
+           "latitude_2008", "longitude_2008", "latitude_2021", "longitude_2021",
+           "distance_m", "name_similarity",
+           "vehicles_2008", "vehicles_2021", "vehicle_change_pct",
+           "pcu_2008", "pcu_2021", "pcu_change_pct",
+           "pcu_per_vehicle_2008", "pcu_per_vehicle_2021"]
+
+
+def read_survey(path) -> list[dict]:
+    with open(path, newline="", encoding="utf-8") as f:
+        return [r for r in csv.DictReader(f) if r.get("latitude") and r.get("longitude")]
+
+
+def pcu_2008(row: dict) -> float:
+    """IRC:106 PCU of a 2008 survey row from its per-class counts."""
+    counts = {c: float(row[c] or 0) for c in PCU_FACTORS}
+    total = sum(counts.values()) or 1.0
+    pcu = 0.0
+    for cls, n in counts.items():
+        low, high = PCU_FACTORS[cls]
+        t = min(max((n / total - 0.05) / 0.05, 0.0), 1.0)
+        pcu += n * (low + t * (high - low))
+    return pcu
+
+
+def _words(text: str) -> str:
+    text = re.sub(r"\([^)]*\)", " ", text.lower())
+    return " ".join(re.findall(r"[a-z0-9]+", text))
+
+
+def name_similarity(a: str, b: str) -> float:
+    return difflib.SequenceMatcher(None, _words(a), _words(b)).ratio()
+
+
+class GridIndex:
+    """2021 survey points bucketed into MAX_DISTANCE_M square cells."""
+
+    def __init__(self, rows: list[dict], lat0: float):
+        self.cos0 = math.cos(math.radians(lat0))
+        self.cells: dict[tuple[int, int], list[tuple[float, float, dict]]] = {}
+        for r in rows:
+            x, y = self.project(r)
+            self.cells.setdefault(self.cell(x, y), []).append((x, y, r))
+
+    def project(self, row: dict) -> tuple[float, float]:
+        lat, lon = math.radians(float(row["latitude"])), math.radians(float(row["longitude"]))
+        return EARTH_RADIUS_M * lon * self.cos0, EARTH_RADIUS_M * lat
+
+    @staticmethod
+    def cell(x: float, y: float) -> tuple[int, int]:
+        return int(x // MAX_DISTANCE_M), int(y // MAX_DISTANCE_M)
+
+    def near(self, row: dict) -> list[tuple[float, dict]]:
+        """(distance_m, row) for every indexed point within MAX_DISTANCE_M, nearest first."""
+        x, y = self.project(row)
+        cx, cy = self.cell(x, y)
+        out = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for px, py, r in self.cells.get((cx + dx, cy + dy), []):
+                    d = math.hypot(px - x, py - y)
+                    if d <= MAX_DISTANCE_M:
+                        out.append((d, r))
+        return sorted(out, key=lambda c: c[0])
+
+
+def match(old: list[dict], new: list[dict]) -> list[tuple[dict, dict, float]]:
+    """One-to-one (2008 row, 2021 row, distance_m) pairs."""
+    lat0 = sum(float(r["latitude"]) for r in old + new) / max(len(old + new), 1)
+    index = GridIndex(new, lat0)
+    candidates = []
+    for o in old:
+        near = index.near(o)
+        for d, n in near:
+            tie = d <= near[0][0] + TIE_MARGIN_M
+            sim = name_similarity(o["location_detail"], n["location_detail"]) if tie else 0.0
+            # a tie group sorts at its nearest distance; names order it within the same 2008 point
+            candidates.append(((near[0][0] if tie else d, o["location_no"], -sim, d), o, n, d))
+    used_old, used_new, pairs = set(), set(), []
+    for _, o, n, d in sorted(candidates, key=lambda c: c[0]):
+        if o["location_no"] in used_old or n["location_no"] in used_new:
+            continue
+        used_old.add(o["location_no"])
+        used_new.add(n["location_no"])
+        pairs.append((o, n, d))
+    return sorted(pairs, key=lambda p: p[0]["location_no"].zfill(4))
+
+
+def _pct(new: float, old: float) -> str:
+    return f"{(new - old) * 100 / old:.1f}" if old else ""
+
+
+def build_rows() -> list[dict]:
+    rows = []
+    for o, n, d in match(read_survey(SURVEY_2008), read_survey(SURVEY_2021)):
+        v08, v21 = float(o["total_vehicles"]), float(n["total_vehicles"])
+        p08, p21 = pcu_2008(o), float(n["Passenger_Car_Units"])
+        rows.append({
+            "location_no_2008": o["location_no"], "location_no_2021": n["location_no"],
+            "location_detail_2008": o["location_detail"], "location_detail_2021": n["location_detail"],
+            "latitude_2008": o["latitude"], "longitude_2008": o["longitude"],
+            "latitude_2021": n["latitude"], "longitude_2021": n["longitude"],
+            "distance_m": round(d), "name_similarity": f"{name_similarity(o['location_detail'], n['location_detail']):.2f}",
+            "vehicles_2008": round(v08), "vehicles_2021": round(v21), "vehicle_change_pct": _pct(v21, v08),
+            "pcu_2008": round(p08), "pcu_2021": round(p21), "pcu_change_pct": _pct(p21, p08),
+            "pcu_per_vehicle_2008": f"{p08 / v08:.2f}" if v08 else "",
+            "pcu_per_vehicle_2021": f"{p21 / v21:.2f}" if v21 else "",
+        })
+    return rows
+
+
+def render() -> str:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=COLUMNS, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(build_rows())
+    return buf.getvalue()
+
+
+def is_stale() -> bool:
+    """True if traffic_site_matches.csv is missing or differs from a fresh match."""
+    if not (SURVEY_2008.exists() and SURVEY_2021.exists()):
+        return False
+    if not MATCHES_CSV.exists():
+        return True
+    return MATCHES_CSV.read_text(encoding="utf-8") != render()
+
+
+def main():
+    if "--check" in sys.argv:
+        if is_stale():
+            print(f"  stale: {MATCHES_CSV.name} — run `npm run sitematch`")
+            sys.exit(1)
+        print(f"  {MATCHES_CSV.name} is up to date")
+        return
+    text = render()
+    MATCHES_CSV.write_text(text, encoding="utf-8")
+    print(f"  wrote {MATCHES_CSV.name} · {text.count(chr(10)) - 1} matched sites "
+          f"(within {MAX_DISTANCE_M} m)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+tools/sparklines.py — Per-depot monthly series for DataTable sparklines.
+
+A sparkline column needs one array per row. Building those in the page means
+LIST() over every month of the wide PMPML tables, in the browser, for each
+table that shows one. This stage writes the arrays once: one row per
+(table, depot, metric), holding that metric's value for every month on the
+table's continuous month axis (tools/cube.py).
+
+Months are null where KNOWN_GAPS says the month was never retrieved, where the
+depot has no row, where the cell does not parse, and where KNOWN_DATA_ISSUES
+covers the cell — so a sparkline breaks instead of drawing a shifted column or
+bridging a gap as if it were data. The same KPI keeps the same metric name
+across extracted, brt_extracted and ebus_extracted (see METRICS).
+
+Values are also cleaned the way the pages clean them: a metric in CAPS is
+capped like the pages' LEAST(…, 100), and the fill-in values the reports use
+when a depot has nothing to report (PLACEHOLDERS: extracted.csv writes 0 or
+100 for "% of Fleet Utilization" at PPP-only and new depots) are nulled.
+
+Output: sources/CMP/depot_sparklines.csv (checked in, loaded by Evidence as
+`depot_sparklines`): table_name, depot, metric, first_month (ISO date), months,
+series ("[v1,v2,null,…]", castable with CAST(series AS DOUBLE[])), latest,
+latest_month and mean over the non-null months. A page turns a row into the
+{month, value} structs a sparkline reads with
+
+    list_transform(range(months), i -> {'month': first_month + to_months(i::INT),
+                                        'value': CAST(series AS DOUBLE[])[i + 1]})
+
+Run: python3 -m tools.sparklines            — rewrite depot_sparklines.csv
+     python3 -m tools.sparklines --check    — exit 1 if it is stale
+
+lint.py fails as DATA_SPARKLINES while the CSV differs from a fresh build.
+
+Requires numpy.
+"""
+
+import csv
+import io
+import sys
+
+import numpy as np
+
+from lint import SOURCES_DIR
+from tools.cube import known_issue, load_cubes, month_label
+
+SPARKLINES_CSV = SOURCES_DIR / "depot_sparklines.csv"
+
+_DEPOT_KPIS = {
+    "fleet": "buses_held",
+    "km_per_bus": "km_per_bus_per_day",
+    "utilization_pct": "fleet_utilization_pct",
+    "passengers_per_bus": "avg_passengers_per_bus_per_day",
+    "earning_per_bus": "earning_per_bus_per_day",
+    "epk": "epk_total",
+}
+
+# metric → source column, per table
+METRICS = {
+    "extracted": {
+        "fleet": "Total Vehicles Per Day",
+        "km_per_bus": "Effective Km Per Bus Per day",
+        "utilization_pct": "% of Fleet Utilization(PMPML+PPP)",
+        "passengers_per_bus": "Avg Passenger per Bus per day on Traffic",
+        "earning_per_bus": "Earning Per Vehicle Per day in Rs.",
+        "epk": "Earning per KMs in Rs.(EPK) (₹)",
+    },
+    "brt_extracted": _DEPOT_KPIS,
+    "ebus_extracted": _DEPOT_KPIS,
+}
+
+# metric → upper bound applied to every table
+CAPS = {"utilization_pct": 100.0}
+
+# (table, metric) → values that stand for "not reported", nulled
+PLACEHOLDERS = {("extracted", "utilization_pct"): (0.0, 100.0)}
+
+COLUMNS = ["table_name", "depot", "metric", "first_month", "months", "series",
+           "latest", "latest_month", "mean"]
+
+
+def _fmt(v: float) -> str:
+    return f"{v:.6g}"
+
+
+def build_rows() -> list[dict]:
+    rows = []
+    for table, cube in load_cubes().items():
+        metrics = {m: c for m, c in METRICS.get(table, {}).items() if c in cube.columns}
+        if not metrics or not cube.months:
+            continue
+        file = cube.path.name
+        labels = cube.month_labels
+        # null every month that is not real data: gaps, absent rows, known issues
+        blank = ~cube.present | cube.gap[None, :]
+        for metric, column in metrics.items():
+            values = cube.col(column).copy()
+            values[blank] = np.nan
+            values[np.isin(values, PLACEHOLDERS.get((table, metric), ()))] = np.nan
+            if metric in CAPS:
+                values = np.minimum(values, CAPS[metric])           # NaN stays NaN
+            for d, depot in enumerate(cube.depots):
+                for m in np.flatnonzero(~np.isnan(values[d])):
+                    if known_issue(file, labels[m], depot, column):
+                        values[d, m] = np.nan
+                observed = np.flatnonzero(~np.isnan(values[d]))
+                if not len(observed):
+                    continue
+                last = int(observed[-1])
+                rows.append({
+                    "table_name": table, "depot": depot, "metric": metric,
+                    "first_month": cube.months[0].isoformat(), "months": len(cube.months),
+                    "series": "[" + ",".join("null" if np.isnan(v) else _fmt(v) for v in values[d]) + "]",
+                    "latest": _fmt(values[d, last]), "latest_month": month_label(cube.months[last]),
+                    "mean": _fmt(float(np.nanmean(values[d]))),
+                })
+    return rows
+
+
+def render() -> str:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=COLUMNS, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(build_rows())
+    return buf.getvalue()
+
+
+def is_stale() -> bool:
+    """True if depot_sparklines.csv is missing or differs from a fresh build."""
+    if not any((SOURCES_DIR / f"{t}.csv").exists() for t in METRICS):
+        return False
+    if not SPARKLINES_CSV.exists():
+        return True
+    return SPARKLINES_CSV.read_text(encoding="utf-8") != render()
+
+
+def main():
+    if "--check" in sys.argv:
+        if is_stale():
+            print(f"  stale: {SPARKLINES_CSV.name} — run `npm run sparklines`")
+            sys.exit(1)
+        print(f"  {SPARKLINES_CSV.name} is up to date")
+        return
+    text = render()
+    SPARKLINES_CSV.write_text(text, encoding="utf-8")
+    print(f"  wrote {SPARKLINES_CSV.name} · {text.count(chr(10)) - 1} series · "
+          f"{len(text.encode('utf-8')) / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
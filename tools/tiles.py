@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+tools/tiles.py — Cut large raster images into a DeepZoom tile pyramid.
+
+The CMP corridor map (27 Nov 2015 revision) is a single 8882×5929 JPEG
+(1.6 MB). Shipping it as-is means every visitor downloads the full image before
+anything renders. This stage cuts it into a multi-resolution pyramid of small
+WebP tiles plus a thumbnail, so the <DeepZoomImage> component can paint the
+thumbnail (its thumbnail= prop) and a handful of tiles first and fetch more
+only when the reader zooms in.
+
+Run: python3 -m tools.tiles            — (re)build every pyramid in TILED_IMAGES
+     python3 -m tools.tiles --check    — exit 1 if any pyramid is stale
+
+Output layout (DeepZoom convention, level 0 = 1×1 px, top level = full size):
+
+    static/<name>/manifest.json
+    static/<name>/thumbnail.webp
+    static/<name>/<level>/<col>_<row>.webp
+
+manifest.json records the source file and its SHA-256 so lint.py (ASSET_SIZE)
+can tell an oversized raster that has been tiled from one that has not, and
+so --check can detect a source image that changed after tiling.
+
+Requires Pillow (pip install pillow).
+"""
+
+import hashlib
+import json
+import math
+import shutil
+import sys
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parent.parent
+STATIC_DIR = BASE / "static"
+
+TILE_SIZE = 512
+TILE_FORMAT = "webp"
+TILE_QUALITY = 80
+THUMBNAIL_WIDTH = 640
+
+# source image (relative to BASE) → output directory name under static/
+TILED_IMAGES = {
+    "pcmc-corridor-map-27-nov-2015.jpg": "corridor-map",
+}
+
+MANIFEST_NAME = "manifest.json"
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def pyramid_levels(width: int, height: int) -> list[dict]:
+    """Return one dict per DeepZoom level, smallest (1×1) first.
+
+    Each level halves the previous one (rounding up), so the top level is the
+    original resolution and level 0 is a single pixel.
+    """
+    max_level = math.ceil(math.log2(max(width, height)))
+    levels = []
+    for level in range(max_level + 1):
+        scale = 2 ** (max_level - level)
+        w = max(1, math.ceil(width / scale))
+        h = max(1, math.ceil(height / scale))
+        levels.append({
+            "level": level,
+            "width": w,
+            "height": h,
+            "cols": math.ceil(w / TILE_SIZE),
+            "rows": math.ceil(h / TILE_SIZE),
+        })
+    return levels
+
+
+def build_pyramid(src: Path, out_dir: Path) -> dict:
+    """Write tiles, thumbnail and manifest for src into out_dir; return the manifest."""
+    from PIL import Image
+
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    out_dir.mkdir(parents=True)
+
+    with Image.open(src) as opened:
+        im: Image.Image = opened.convert("RGB")
+        width, height = im.size
+        levels = pyramid_levels(width, height)
+
+        # Walk from the top level down, resizing the previous level rather than the
+        # original each time — each step is a cheap 2× reduction.
+        current = im
+        for lv in reversed(levels):
+            if current.size != (lv["width"], lv["height"]):
+                current = current.resize((lv["width"], lv["height"]), Image.Resampling.LANCZOS)
+            level_dir = out_dir / str(lv["level"])
+            level_dir.mkdir()
+            for col in range(lv["cols"]):
+                for row in range(lv["rows"]):
+                    box = (
+                        col * TILE_SIZE,
+                        row * TILE_SIZE,
+                        min((col + 1) * TILE_SIZE, lv["width"]),
+                        min((row + 1) * TILE_SIZE, lv["height"]),
+                    )
+                    current.crop(box).save(
+                        level_dir / f"{col}_{row}.{TILE_FORMAT}",
+                        quality=TILE_QUALITY,
+                    )
+
+        thumb_h = round(height * THUMBNAIL_WIDTH / width)
+        im.resize((THUMBNAIL_WIDTH, thumb_h), Image.Resampling.LANCZOS).save(
+            out_dir / f"thumbnail.{TILE_FORMAT}", quality=TILE_QUALITY,
+        )
+
+    manifest = {
+        "source": src.relative_to(BASE).as_posix(),
+        "source_sha256": file_sha256(src),
+        "width": width,
+        "height": height,
+        "tile_size": TILE_SIZE,
+        "format": TILE_FORMAT,
+        "thumbnail": f"thumbnail.{TILE_FORMAT}",
+        "thumbnail_width": THUMBNAIL_WIDTH,
+        "thumbnail_height": thumb_h,
+        "levels": levels,
+    }
+    (out_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    return manifest
+
+
+def load_manifests() -> dict[str, dict]:
+    """Return {source path relative to BASE: manifest} for every pyramid under static/."""
+    manifests = {}
+    for p in sorted(STATIC_DIR.glob(f"*/{MANIFEST_NAME}")):
+        try:
+            m = json.loads(p.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            continue
+        if "source" in m:
+            manifests[m["source"]] = m
+    return manifests
+
+
+def is_stale(src: Path, manifest: dict | None) -> bool:
+    return manifest is None or manifest.get("source_sha256") != file_sha256(src)
+
+
+def main():
+    check_only = "--check" in sys.argv
+    manifests = load_manifests()
+    stale = []
+
+    for src_name, out_name in TILED_IMAGES.items():
+        src = BASE / src_name
+        if not src.exists():
+            print(f"  ✗  {src_name} not found")
+            stale.append(src_name)
+            continue
+        if not is_stale(src, manifests.get(src_name)):
+            print(f"  ✓  {src_name} — tiles up to date")
+            continue
+        if check_only:
+            print(f"  ✗  {src_name} — tiles missing or stale, run: npm run assets")
+            stale.append(src_name)
+            continue
+        m = build_pyramid(src, STATIC_DIR / out_name)
+        n_tiles = sum(lv["cols"] * lv["rows"] for lv in m["levels"])
+        print(f"  ✓  {src_name} → static/{out_name}/ "
+              f"({len(m['levels'])} levels, {n_tiles} tiles)")
+
+    sys.exit(1 if stale else 0)
+
+
+if __name__ == "__main__":
+    main()
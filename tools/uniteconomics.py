@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+tools/uniteconomics.py — Fiscal-year unit economics: P&L and balance sheet per km and passenger.
+
+The financial statements (PMPML_Financial_PnL.csv, PMPML_Balance_Sheet.csv,
+₹ lakhs) and the operating data (Annual_Statistics_2023_2025.csv in rupees
+and counts, extracted.csv monthly per depot) live on separate pages, so no
+page can say what a kilometre or a passenger costs. This stage joins them by
+Indian fiscal year (April–March) and writes one row per FY.
+
+Operating totals per FY, in order of preference:
+  annual_statistics  the audited FY figures from Annual_Statistics_2023_2025.csv
+                     (Total Effective KM Own+Hire; Total Avg Passengers Per Day
+                     × days in the FY; All Traffic Earning)
+  monthly            extracted.csv depot rows summed per month ("Total Eff.Km
+                     (Own+Hire)"; all-traffic passengers per day × days in the
+                     month; "All Traffic Earning (₹)"). KNOWN_GAPS months and
+                     months with no rows are left out, and the totals are
+                     scaled to the full FY by days covered. ops_months says how
+                     many months were reported and ops_complete is false
+                     unless all twelve were.
+
+Money is normalised once: lakhs × 1e5 and rupees are both turned into rupees
+before any ratio, and amounts are written in crores (× 1e7).
+
+Per FY: revenue, employee cost, expenditure, operating deficit, reimbursements,
+cash and short-term borrowings (₹ Cr); effective km and passengers; cost and
+revenue per effective km, cost and revenue per passenger (₹); staff cost share
+(employee benefits / total expenses, %); reimbursement dependency
+(reimbursements / total expenses, %); days of expenditure covered by cash.
+Ratios are blank for FYs without both P&L and operating data.
+
+Output: sources/CMP/fy_unit_economics.csv (checked in, loaded by Evidence as
+`fy_unit_economics`).
+
+Run: python3 -m tools.uniteconomics            — rewrite fy_unit_economics.csv
+     python3 -m tools.uniteconomics --check    — exit 1 if it is stale
+
+lint.py fails as DATA_UNITECON while the CSV differs from a fresh build.
+
+Standard library only.
+"""
+
+import calendar
+import csv
+import datetime
+import io
+import sys
+
+from lint import SOURCES_DIR
+from tools.fiscal import fiscal_year, gap_months, parse_month
+
+PNL_CSV = SOURCES_DIR / "PMPML_Financial_PnL.csv"
+BALANCE_SHEET_CSV = SOURCES_DIR / "PMPML_Balance_Sheet.csv"
+ANNUAL_CSV = SOURCES_DIR / "Annual_Statistics_2023_2025.csv"
+MONTHLY_TABLE = "extracted"
+UNIT_ECONOMICS_CSV = SOURCES_DIR / "fy_unit_economics.csv"
+
+LAKH = 100_000
+CRORE = 10_000_000
+
+# extracted.csv columns (the all-traffic passenger header spans several lines)
+KM_COLUMN = "Total Eff.Km (Own+Hire)"
+EARNING_COLUMN = "All Traffic Earning (₹)"
+PASSENGER_PREFIX = "Avg. Passenger per day on Traffic"
+
+# Annual_Statistics_2023_2025.csv particulars
+ANNUAL_KM = "Total Effective KM Own+Hire"
+ANNUAL_PASSENGERS_PER_DAY = "Total Avg Passengers Per Day"
+ANNUAL_EARNING = "All Traffic Earning"
+
+COLUMNS = ["fiscal_year", "has_pnl", "ops_source", "ops_months", "ops_complete",
+           "effective_km", "passengers", "traffic_earning_cr",
+           "revenue_cr", "employee_cr", "expenses_cr", "operating_deficit_cr", "reimbursements_cr",
+           "cash_cr", "borrowings_cr",
+           "cost_per_km_rs", "revenue_per_km_rs", "cost_per_passenger_rs", "revenue_per_passenger_rs",
+           "staff_cost_share_pct", "reimbursement_dependency_pct", "cash_days"]
+
+
+def _float(v: str | None) -> float | None:
+    if v is None:
+        return None
+    try:
+        return float(v)
+    except ValueError:
+        return None
+
+
+def _read(path) -> list[dict]:
+    if not path.exists():
+        return []
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def fy_days(fy: str) -> int:
+    start = int(fy[:4])
+    return 366 if calendar.isleap(start + 1) else 365
+
+
+def pnl() -> dict[str, dict[str, float | None]]:
+    """fiscal_year → P&L row, amounts in rupees; None where the cell is blank."""
+    out: dict[str, dict[str, float | None]] = {}
+    for r in _read(PNL_CSV):
+        row: dict[str, float | None] = {}
+        for k, v in r.items():
+            if k not in ("fiscal_year", "notes"):
+                amount = _float(v)
+                row[k] = amount * LAKH if amount is not None else None
+        out[r["fiscal_year"]] = row
+    return out
+
+
+def balance_sheet() -> dict[str, dict[str, float]]:
+    """fiscal_year → {item: rupees} from the wide fyYYYY_YY_lakhs columns."""
+    out: dict[str, dict[str, float]] = {}
+    for r in _read(BALANCE_SHEET_CSV):
+        for col, v in r.items():
+            amount = _float(v)
+            if col.startswith("fy") and col.endswith("_lakhs") and amount is not None:
+                fy = col[2:-6].replace("_", "-")
+                out.setdefault(fy, {})[r["item"]] = amount * LAKH
+    return out
+
+
+def annual_ops() -> dict[str, dict]:
+    """fiscal_year → operating totals from the annual statistics."""
+    rows = {r["Particular"]: r for r in _read(ANNUAL_CSV)}
+    out = {}
+    for col in (rows[ANNUAL_KM].keys() if ANNUAL_KM in rows else []):
+        if not col.startswith("FY"):
+            continue
+        fy = f"{col[2:6]}-{col[-2:]}"
+        km = _float(rows[ANNUAL_KM][col])
+        per_day = _float(rows.get(ANNUAL_PASSENGERS_PER_DAY, {}).get(col))
+        earning = _float(rows.get(ANNUAL_EARNING, {}).get(col))
+        if km is None or per_day is None:
+            continue
+        out[fy] = {"source": "annual_statistics", "months": 12, "complete": True, "km": km,
+                   "passengers": per_day * fy_days(fy), "earning": earning}
+    return out
+
+
+def monthly_ops() -> dict[str, dict]:
+    """fiscal_year → operating totals summed from the monthly depot rows, scaled
+    to the whole FY by the days the reported months cover."""
+    path = SOURCES_DIR / f"{MONTHLY_TABLE}.csv"
+    rows = _read(path)
+    if not rows:
+        return {}
+    passenger_col = next((c for c in rows[0] if c.startswith(PASSENGER_PREFIX)), None)
+    gaps = gap_months(MONTHLY_TABLE)
+    months: dict[datetime.date, dict[str, float]] = {}
+    for r in rows:
+        mo = parse_month(r.get("Date") or "")
+        if mo is None or mo in gaps or r.get("Depot", "").strip() == "System Total":
+            continue
+        days = calendar.monthrange(mo.year, mo.month)[1]
+        acc = months.setdefault(mo, {"km": 0.0, "passengers": 0.0, "earning": 0.0})
+        acc["km"] += _float(r.get(KM_COLUMN)) or 0.0
+        acc["passengers"] += (_float(r.get(passenger_col)) or 0.0) * days
+        acc["earning"] += _float(r.get(EARNING_COLUMN)) or 0.0
+    by_fy: dict[str, list[datetime.date]] = {}
+    for mo in months:
+        by_fy.setdefault(fiscal_year(mo), []).append(mo)
+    out = {}
+    for fy, mos in by_fy.items():
+        covered = sum(calendar.monthrange(m.year, m.month)[1] for m in mos)
+        scale = fy_days(fy) / covered
+        out[fy] = {"source": "monthly", "months": len(mos), "complete": len(mos) == 12,
+                   **{k: sum(months[m][k] for m in mos) * scale for k in ("km", "passengers", "earning")}}
+    return out
+
+
+def _cr(rupees: float | None) -> str:
+    return "" if rupees is None else f"{rupees / CRORE:.2f}"
+
+
+def _ratio(num: float | None, den: float | None, scale: float = 1.0, digits: int = 2) -> str:
+    if num is None or not den:
+        return ""
+    return f"{num * scale / den:.{digits}f}"
+
+
+def build_rows() -> list[dict]:
+    fin, bs = pnl(), balance_sheet()
+    ops = {**monthly_ops(), **annual_ops()}         # audited annual figures win
+    rows = []
+    for fy in sorted(set(fin) | set(ops)):
+        p, o, b = fin.get(fy), ops.get(fy), bs.get(fy, {})
+        expenses = p["total_expenses"] if p else None
+        revenue = p["revenue_bus_ops"] if p else None
+        employee = p["employee_benefits"] if p else None
+        reimbursed = p["total_reimbursements"] if p else None
+        km = o["km"] if o else None
+        passengers = o["passengers"] if o else None
+        cash = b.get("Cash & Cash Equivalents")
+        rows.append({
+            "fiscal_year": fy,
+            "has_pnl": str(p is not None).lower(),
+            "ops_source": o["source"] if o else "",
+            "ops_months": o["months"] if o else 0,
+            "ops_complete": str(bool(o and o["complete"])).lower(),
+            "effective_km": round(km) if km is not None else "",
+            "passengers": round(passengers) if passengers is not None else "",
+            "traffic_earning_cr": _cr(o["earning"]) if o and o["earning"] is not None else "",
+            "revenue_cr": _cr(revenue),
+            "employee_cr": _cr(employee),
+            "expenses_cr": _cr(expenses),
+            "operating_deficit_cr": (_cr(-p["operating_profit_loss"])
+                                     if p and p["operating_profit_loss"] is not None else ""),
+            "reimbursements_cr": _cr(reimbursed),
+            "cash_cr": _cr(cash),
+            "borrowings_cr": _cr(b.get("Short-Term Borrowings")),
+            "cost_per_km_rs": _ratio(expenses, km),
+            "revenue_per_km_rs": _ratio(revenue, km),
+            "cost_per_passenger_rs": _ratio(expenses, passengers),
+            "revenue_per_passenger_rs": _ratio(revenue, passengers),
+            "staff_cost_share_pct": _ratio(employee, expenses, 100, 1),
+            "reimbursement_dependency_pct": _ratio(reimbursed, expenses, 100, 1),
+            "cash_days": _ratio(cash, expenses, fy_days(fy), 0),
+        })
+    return rows
+
+
+def render() -> str:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=COLUMNS, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(build_rows())
+    return buf.getvalue()
+
+
+def is_stale() -> bool:
+    """True if fy_unit_economics.csv is missing or differs from a fresh build."""
+    if not PNL_CSV.exists():
+        return False
+    if not UNIT_ECONOMICS_CSV.exists():
+        return True
+    return UNIT_ECONOMICS_CSV.read_text(encoding="utf-8") != render()
+
+
+def main():
+    if "--check" in sys.argv:
+        if is_stale():
+            print(f"  stale: {UNIT_ECONOMICS_CSV.name} — run `npm run uniteconomics`")
+            sys.exit(1)
+        print(f"  {UNIT_ECONOMICS_CSV.name} is up to date")
+        return
+    text = render()
+    UNIT_ECONOMICS_CSV.write_text(text, encoding="utf-8")
+    print(f"  wrote {UNIT_ECONOMICS_CSV.name} · {text.count(chr(10)) - 1} fiscal years")
+
+
+if __name__ == "__main__":
+    main()
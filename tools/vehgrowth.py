@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+tools/vehgrowth.py — Growth, share and trend tables for the RTO registration series.
+
+The three vehicle pages used to derive everything in the browser: a 13-way
+CASE to group the 22 RTO types into categories, LAG() windows for year-over-
+year growth, self-joins for shares and the 2000 index, and a four-way UNION of
+2000-vs-2018 self-joins for the Pune comparison. The series is 18 years × 22
+types × 2 cities, so this stage computes all of it once, at build time, as
+arrays over (city, year, series).
+
+Method — on pune_vehicle_registrations.csv (both cities; its PCMC rows are
+identical to Vehicle_Registrations_by_Type_and_Year.csv):
+  1. Sum the type columns into every grouping at once with one-hot matrices:
+     total, segment (Two Wheelers / Cars & SUVs / Commercial & Others) and the
+     13 page categories. Types keep their RTO names (Motor_Cycles, Cars, …).
+  2. Per series and year: share of the city total, year-over-year change and
+     growth %, and the index against 2000-01 — the same arithmetic as the SQL
+     they replace, so rounding in the pages gives identical figures.
+  3. Per series: 2000-01 → last year growth %, CAGR, and a log-linear least-
+     squares trend over the last FIT_YEARS years (annual trend %, R²).
+  4. For totals, segments and categories, the trend is extended to
+     HORIZON_YEAR with a 95% prediction interval (Student t, n − 2 d.f.).
+     Series with a zero in the fit window are not projected.
+
+Output (checked in, loaded by Evidence under the file stem):
+  sources/CMP/vehicle_trends.csv      city, year, level, name, count,
+                                      new_registrations, yoy_pct, share_pct,
+                                      index_2000 — one row per series and year
+  sources/CMP/vehicle_growth.csv      city, level, name, first/last year and
+                                      count, growth_pct, cagr_pct, trend_pct,
+                                      r_squared — one row per series
+  sources/CMP/vehicle_projection.csv  city, level, name, year, count, lower,
+                                      upper — projected years only
+
+Percentages are written at full precision (Evidence loads them as doubles
+either way), so ROUND() in a page gives exactly what the old SQL did.
+
+Run: python3 -m tools.vehgrowth            — rewrite the three CSVs
+     python3 -m tools.vehgrowth --check    — exit 1 if any is stale
+
+lint.py fails as DATA_VEHGROWTH while any CSV differs from a fresh build.
+
+Requires numpy.
+"""
+
+import csv
+import io
+import sys
+
+import numpy as np
+
+from lint import SOURCES_DIR
+
+REGISTRATIONS_CSV = SOURCES_DIR / "pune_vehicle_registrations.csv"
+TRENDS_CSV = SOURCES_DIR / "vehicle_trends.csv"
+GROWTH_CSV = SOURCES_DIR / "vehicle_growth.csv"
+PROJECTION_CSV = SOURCES_DIR / "vehicle_projection.csv"
+
+FIT_YEARS = 10          # trend fitted on the last ten years (post-2008 slowdown)
+HORIZON_YEAR = 2025     # project to 2025-2026
+PROJECTED_LEVELS = ("total", "segment", "category")
+
+# RTO type name (as in Vehicle_Registrations_by_Type_and_Year.csv) → wide column
+TYPES = {
+    "Motor_Cycles": "motor_cycles", "Scooters": "scooters", "Moped": "moped",
+    "Cars": "cars", "Jeeps": "jeeps", "Stn_Wagons": "stn_wagons",
+    "Taxi_w_meter": "taxis", "Luxury_Tourist_Cabs": "luxury_tourist",
+    "Auto_rickshaw": "auto_rickshaws", "Stage_carriages": "stage_carriages",
+    "Mini_Bus": "contract_minibus", "School_Buses": "school_buses",
+    "Private_Service_Vehicles": "psv", "Ambulances": "ambulances",
+    "Articulated_Multi": "articulated", "Trucks/Lorries": "trucks_lorries",
+    "Tanker": "tanker", "Delivery_Van_4_wheelers": "delivery_van_4w",
+    "Delivery_Van_3_wheelers": "delivery_van_3w", "Tractors": "tractors",
+    "Trailers": "trailers", "Others": "others",
+}
+
+CATEGORIES = {
+    "Two Wheelers": ("Motor_Cycles", "Scooters", "Moped"),
+    "Cars": ("Cars",),
+    "SUVs & Wagons": ("Jeeps", "Stn_Wagons"),
+    "Taxi Services": ("Taxi_w_meter", "Luxury_Tourist_Cabs"),
+    "Auto Rickshaws": ("Auto_rickshaw",),
+    "Public Transport": ("Stage_carriages", "Mini_Bus"),
+    "School Transport": ("School_Buses",),
+    "Service Vehicles": ("Private_Service_Vehicles", "Ambulances"),
+    "Heavy Transport": ("Trucks/Lorries", "Articulated_Multi"),
+    "Tankers": ("Tanker",),
+    "Delivery Vehicles": ("Delivery_Van_4_wheelers", "Delivery_Van_3_wheelers"),
+    "Agricultural Vehicles": ("Tractors", "Trailers"),
+    "Others": ("Others",),
+}
+
+SEGMENTS = {
+    "Two Wheelers": ("Motor_Cycles", "Scooters", "Moped"),
+    "Cars & SUVs": ("Cars", "Jeeps", "Stn_Wagons"),
+    "Commercial & Others": tuple(t for t in TYPES
+                                 if t not in ("Motor_Cycles", "Scooters", "Moped", "Cars", "Jeeps", "Stn_Wagons")),
+}
+
+TREND_COLUMNS = ["city", "year", "level", "name", "count", "new_registrations",
+                 "yoy_pct", "share_pct", "index_2000"]
+GROWTH_COLUMNS = ["city", "level", "name", "first_year", "last_year", "count_first", "count_last",
+                  "growth_pct", "cagr_pct", "trend_pct", "r_squared"]
+PROJECTION_COLUMNS = ["city", "level", "name", "year", "count", "lower", "upper"]
+
+
+def load() -> tuple[list[str], list[int], np.ndarray]:
+    """(cities, start years, counts[city, year, type]) from the wide CSV."""
+    with open(REGISTRATIONS_CSV, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    cities = sorted({r["city"] for r in rows})
+    years = sorted({int(r["year"].split("-")[0]) for r in rows})
+    counts = np.zeros((len(cities), len(years), len(TYPES)))
+    for r in rows:
+        c, y = cities.index(r["city"]), years.index(int(r["year"].split("-")[0]))
+        counts[c, y] = [float(r[col] or 0) for col in TYPES.values()]
+    return cities, years, counts
+
+
+def _onehot(groups: dict[str, tuple]) -> np.ndarray:
+    types = list(TYPES)
+    m = np.zeros((len(types), len(groups)))
+    for j, members in enumerate(groups.values()):
+        m[[types.index(t) for t in members], j] = 1
+    return m
+
+
+def series(counts: np.ndarray) -> tuple[list[tuple[str, str]], np.ndarray]:
+    """[(level, name)] and values[city, year, series] for every grouping."""
+    keys = ([("total", "All Vehicles")]
+            + [("segment", s) for s in SEGMENTS]
+            + [("category", c) for c in CATEGORIES]
+            + [("type", t) for t in TYPES])
+    values = np.concatenate([counts.sum(axis=-1, keepdims=True),
+                             counts @ _onehot(SEGMENTS),
+                             counts @ _onehot(CATEGORIES),
+                             counts], axis=-1)
+    return keys, values
+
+
+def _t975(df: float | np.ndarray) -> float | np.ndarray:
+    """Two-sided 95% Student t quantile (Cornish-Fisher; < 0.001 off for df ≥ 5)."""
+    z = 1.959963984540054
+    return (z + (z**3 + z) / (4 * df) + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * df**2)
+            + (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * df**3))
+
+
+def trend_fit(years: np.ndarray, values: np.ndarray) -> dict:
+    """Log-linear OLS of every series over its last FIT_YEARS years at once.
+
+    values is (city, year, series); every output is (city, series), NaN where
+    the window holds a zero (log undefined) or fewer than three years.
+    """
+    x = years[-FIT_YEARS:].astype(float)
+    v = values[:, -FIT_YEARS:, :]
+    ok = (v > 0).all(axis=1) & (len(x) >= 3)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        y = np.where(v > 0, np.log(v), np.nan)
+        n = len(x)
+        xbar = x.mean()
+        sxx = ((x - xbar) ** 2).sum()
+        ybar = y.mean(axis=1)
+        slope = ((x - xbar)[None, :, None] * (y - ybar[:, None, :])).sum(axis=1) / sxx
+        intercept = ybar - slope * xbar
+        resid = y - (intercept[:, None, :] + slope[:, None, :] * x[None, :, None])
+        ss_res = (resid ** 2).sum(axis=1)
+        ss_tot = ((y - ybar[:, None, :]) ** 2).sum(axis=1)
+        r2 = np.where(ss_tot > 0, 1 - ss_res / ss_tot, 1.0)
+    nan = np.full_like(slope, np.nan)
+    return {"slope": np.where(ok, slope, nan), "intercept": np.where(ok, intercept, nan),
+            "s2": np.where(ok, ss_res / (n - 2), nan), "r2": np.where(ok, r2, nan),
+            "n": n, "xbar": xbar, "sxx": sxx}
+
+
+def project(fit: dict, horizon: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(centre, lower, upper), each (city, horizon year, series), from trend_fit output."""
+    x0 = horizon.astype(float)[None, :, None]
+    centre = fit["intercept"][:, None, :] + fit["slope"][:, None, :] * x0
+    se = np.sqrt(fit["s2"][:, None, :] * (1 + 1 / fit["n"] + (x0 - fit["xbar"]) ** 2 / fit["sxx"]))
+    half = _t975(fit["n"] - 2) * se
+    return np.exp(centre), np.exp(centre - half), np.exp(centre + half)
+
+
+def _fy(start: int) -> str:
+    return f"{start}-{start + 1}"
+
+
+def _num(v: float) -> str:
+    return "" if np.isnan(v) else repr(float(v))
+
+
+def build() -> dict[str, list[dict]]:
+    cities, years, counts = load()
+    keys, values = series(counts)
+    yrs = np.array(years)
+
+    prev = np.full_like(values, np.nan)
+    prev[:, 1:] = values[:, :-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        new = values - prev
+        yoy = np.where(prev > 0, new * 100.0 / prev, np.nan)
+        share = values * 100.0 / values[..., :1]
+        base = values[:, :1, :]
+        index = np.where(base > 0, values * 100.0 / base, np.nan)
+        first, last = values[:, 0, :], values[:, -1, :]
+        growth = np.where(first > 0, 100.0 * (last - first) / first, np.nan)
+        cagr = np.where(first > 0, ((last / first) ** (1 / (len(years) - 1)) - 1) * 100, np.nan)
+    fit = trend_fit(yrs, values)
+    horizon = np.arange(years[-1] + 1, HORIZON_YEAR + 1)
+    centre, lower, upper = project(fit, horizon)
+
+    trends, growths, projections = [], [], []
+    for c, city in enumerate(cities):
+        for s, (level, name) in enumerate(keys):
+            for y, year in enumerate(years):
+                trends.append({
+                    "city": city, "year": _fy(year), "level": level, "name": name,
+                    "count": int(values[c, y, s]),
+                    "new_registrations": "" if np.isnan(new[c, y, s]) else int(new[c, y, s]),
+                    "yoy_pct": _num(yoy[c, y, s]), "share_pct": _num(share[c, y, s]),
+                    "index_2000": _num(index[c, y, s]),
+                })
+            growths.append({
+                "city": city, "level": level, "name": name,
+                "first_year": _fy(years[0]), "last_year": _fy(years[-1]),
+                "count_first": int(first[c, s]), "count_last": int(last[c, s]),
+                "growth_pct": _num(growth[c, s]), "cagr_pct": _num(cagr[c, s]),
+                "trend_pct": _num(np.expm1(fit["slope"][c, s]) * 100), "r_squared": _num(fit["r2"][c, s]),
+            })
+            if level not in PROJECTED_LEVELS or np.isnan(fit["slope"][c, s]):
+                continue
+            for h, year in enumerate(horizon.tolist()):
+                projections.append({
+                    "city": city, "level": level, "name": name, "year": _fy(year),
+                    "count": round(float(centre[c, h, s])), "lower": round(float(lower[c, h, s])),
+                    "upper": round(float(upper[c, h, s])),
+                })
+    return {TRENDS_CSV.name: trends, GROWTH_CSV.name: growths, PROJECTION_CSV.name: projections}
+
+
+def render() -> dict[str, str]:
+    """{file name: CSV text} for the three output tables."""
+    columns = {TRENDS_CSV.name: TREND_COLUMNS, GROWTH_CSV.name: GROWTH_COLUMNS,
+               PROJECTION_CSV.name: PROJECTION_COLUMNS}
+    out = {}
+    for name, rows in build().items():
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=columns[name], lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+        out[name] = buf.getvalue()
+    return out
+
+
+def stale_files() -> list[str]:
+    """Output CSVs that are missing or differ from a fresh build ([] if current)."""
+    if not REGISTRATIONS_CSV.exists():
+        return []
+    return [name for name, text in render().items()
+            if not (SOURCES_DIR / name).exists()
+            or (SOURCES_DIR / name).read_text(encoding="utf-8") != text]
+
+
+def main():
+    if "--check" in sys.argv:
+        stale = stale_files()
+        for name in stale:
+            print(f"  stale: {name}")
+        if stale:
+            print("  run `npm run vehgrowth`")
+            sys.exit(1)
+        print("  vehicle growth tables are up to date")
+        return
+    for name, text in render().items():
+        (SOURCES_DIR / name).write_text(text, encoding="utf-8")
+        print(f"  wrote {name} · {text.count(chr(10)) - 1} rows")
+
+
+if __name__ == "__main__":
+    main()